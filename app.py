@@ -1,15 +1,80 @@
+import os
+import time
 import streamlit as st
 import pandas as pd
-import joblib
 import numpy as np
-import shap
-import matplotlib.pyplot as plt
-
-# 1. Load the model and column names
-model = joblib.load('churn_model.pkl')
-model_columns = joblib.load('model_columns.pkl')
+from app_metrics import StageMetrics, show_debug_panel
+from explain import ExplanationCache
+from explain_charts import ChartCache, render_png
+from model_registry import ActiveModel
+from shap_store import ShapStore, churn_probability
+from startup import warm_up
+from whatif import SURFACE_FILE, load_surface
 
 st.set_page_config(page_title="ChurnShield AI", layout="wide")
+rerun_start = time.perf_counter()
+
+# 1. Load the active model, column names and SHAP explainer (once per model version)
+@st.cache_resource
+def load_active_model():
+    # Active version of the model registry (model_registry.py), or the local
+    # artifacts when there is none. Each rerun gets the current version; a newly
+    # activated one is picked up and swapped in without restarting the app
+    return ActiveModel()
+
+@st.cache_resource(max_entries=2)
+def load_explainer(version, _artifacts):
+    # One per model version; the previous one is evicted after a swap
+    return ExplanationCache(_artifacts.model)
+
+@st.cache_resource
+def start_warm_up(_artifacts):
+    # Once per process: load the model and the SHAP/matplotlib stack in the
+    # background after the first render, so the first analysis finds them ready
+    return warm_up(lambda: _artifacts.model, 'shap', 'matplotlib.pyplot')
+
+@st.cache_resource
+def load_chart_cache():
+    # Waterfall PNGs keyed by the explanation's content hash
+    return ChartCache()
+
+@st.cache_resource(max_entries=2)
+def load_shap_store(model_dir):
+    # Precomputed explanations written by shap_store.py, if present and built from this model
+    store = ShapStore.open_if_exists(model_dir=model_dir)
+    if store is None:
+        raise LookupError(f"no SHAP store for the model in {model_dir}")
+    return store
+
+@st.cache_resource
+def load_metrics():
+    # Per-stage timings shared by all sessions of this process
+    return StageMetrics('app')
+
+@st.cache_resource(max_entries=2)
+def load_whatif_surface(model_dir):
+    # Churn risk precomputed over every sidebar combination by whatif.py, if present
+    # Published with the model into its registry version, so it is checked against that model
+    surface = load_surface(os.path.join(model_dir, SURFACE_FILE), model_dir)
+    if surface is None:
+        raise LookupError(f"no what-if surface for the model in {model_dir}")
+    return surface
+
+def load_if_present(loader, *args):
+    # The loaders above raise LookupError when their file is missing or stale.
+    # Exceptions are not cached, so a file written after startup is picked up on a later rerun
+    try:
+        return loader(*args)
+    except LookupError:
+        return None
+
+metrics = load_metrics()
+active = load_active_model()
+# Version and artifacts from one read, so a hot swap in between cannot pair them wrongly
+version, artifacts = active.snapshot()
+preprocessor = artifacts.preprocessor
+shap_store = load_if_present(load_shap_store, artifacts.directory)
+surface = load_if_present(load_whatif_surface, artifacts.directory)
 
 st.title("📊 ChurnShield: Explainable Customer Retention")
 st.markdown("""
@@ -39,20 +104,25 @@ def user_input_features():
         'OnlineSecurity': online_security,
         'InternetService': fiber_optic # Assuming this maps to a specific encoded column
     }
-    return pd.DataFrame(data, index=[0])
+    return data
+
+input_data = user_input_features()
 
-input_df = user_input_features()
+# Look up an existing customer in the precomputed SHAP store
+stored_explanation = None
+if shap_store is not None:
+    customer_id = st.sidebar.text_input('Customer ID (precomputed)').strip()
+    if customer_id:
+        stored_explanation = shap_store.explanation(customer_id)
+        if stored_explanation is None:
+            st.sidebar.warning(f"Customer '{customer_id}' is not in the SHAP store.")
 
 # --- Preprocessing ---
-# Align input with model training columns
-# We fill missing columns with 0 (representing 'No' or 'Average' depending on encoding)
+# Align input with model training columns in one step
+# Missing columns are 0 (representing 'No' or 'Average' depending on encoding)
 # In a real production app, you would ask for all inputs.
-for col in model_columns:
-    if col not in input_df.columns:
-        input_df[col] = 0 
-
-# Reorder columns to match the training order strictly
-input_df = input_df[model_columns]
+with metrics.span('align'):
+    input_df = pd.DataFrame(preprocessor.align(input_data), columns=preprocessor.columns)
 
 # --- Main Section ---
 col1, col2 = st.columns([1, 2])
@@ -61,8 +131,15 @@ with col1:
     st.subheader("Prediction")
     if st.button('Analyze Customer Risk'):
         # Predict
-        prediction_prob = model.predict_proba(input_df)
-        churn_risk = prediction_prob[0][1]
+        with metrics.span('predict'):
+            if stored_explanation is not None:
+                churn_risk = churn_probability(stored_explanation)
+            else:
+                # Precomputed surface when the inputs are on its grid, otherwise the model
+                churn_risk = surface.risk_for(input_data) if surface is not None else None
+                if churn_risk is None:
+                    prediction_prob = artifacts.model.predict_proba(input_df)
+                    churn_risk = prediction_prob[0][1]
         
         # Visual Gauge
         if churn_risk > 0.5:
@@ -72,6 +149,13 @@ with col1:
             st.success(f"Low Churn Risk: {churn_risk:.1%}")
             st.markdown("**Action:** ✅ Monitor Normally")
 
+        # What-if: how the risk would move with tenure, everything else unchanged
+        if surface is not None and stored_explanation is None:
+            with metrics.span('whatif_curve'):
+                curve = surface.tenure_curve_for(input_data)
+            st.caption("Churn risk vs tenure")
+            st.line_chart(pd.DataFrame({'Churn risk': curve}, index=pd.RangeIndex(len(curve), name='Tenure (months)')))
+
         # Save the risk for the explanation section
         st.session_state['churn_risk'] = churn_risk
         st.session_state['calculated'] = True
@@ -83,22 +167,28 @@ with col2:
         with st.spinner('Calculating SHAP values...'):
             
             # --- SHAP EXPLANATION CORE ---
-            # 1. Initialize the explainer with the XGBoost model
-            explainer = shap.TreeExplainer(model)
+            # The plotting stack is imported here, not at startup, to keep the first render fast
+            import shap
             
-            # 2. Calculate SHAP values for this specific instance
-            shap_values = explainer.shap_values(input_df)
+            # 1. Get the SHAP explanation for this specific instance
+            # (precomputed for stored customers; otherwise the explainer is
+            # built once and recently seen profiles are cached)
+            with metrics.span('shap'):
+                if stored_explanation is not None:
+                    explanation = stored_explanation
+                else:
+                    explanation = load_explainer(version, artifacts).explain(input_df)
             
-            # 3. Create the Waterfall Plot
-            # We use explainer(input_df) to get an Explanation object for the waterfall plot
-            explanation = explainer(input_df)
-            
-            fig, ax = plt.subplots(figsize=(8, 5))
-            # The waterfall plot shows how each feature pushes the probability from the base value
-            shap.plots.waterfall(explanation[0], show=False)
-            
-            # Display in Streamlit
-            st.pyplot(fig)
+            # 2. Create the Waterfall Plot
+            # The waterfall plot shows how each feature pushes the probability from the base value.
+            # It is rendered once per distinct explanation to PNG bytes and the figure closed,
+            # so repeat views are instant and figures don't pile up over a long session
+            with metrics.span('matplotlib'):
+                png = load_chart_cache().chart('waterfall', explanation,
+                                               lambda e: render_png(shap.plots.waterfall, e, figsize=(8, 5)))
+                
+                # Display in Streamlit
+                st.image(png)
             
             st.info("""
             **How to read this chart:**
@@ -108,3 +198,10 @@ with col2:
             """)
     else:
         st.write("Click 'Analyze Customer Risk' to see the breakdown.")
+
+start_warm_up(artifacts)
+
+# Whole-rerun time, then publish the timings (debug panel / Prometheus text file)
+metrics.record('rerun', time.perf_counter() - rerun_start)
+metrics.write()
+show_debug_panel(st, metrics)
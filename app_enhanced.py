@@ -1,11 +1,15 @@
+import os
+import time
 import streamlit as st
 import pandas as pd
-import joblib
 import numpy as np
-import shap
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
-from streamlit_extras.metric_cards import style_metric_cards
+from explain import ExplanationCache
+from explain_charts import ChartCache, bar_figure, waterfall_figure
+from app_metrics import StageMetrics, show_debug_panel
+from model_registry import ActiveModel
+from shap_store import ShapStore, churn_probability
+from startup import warm_up
+from whatif import SURFACE_FILE, load_surface
 
 # Set page config with custom theme and layout
 st.set_page_config(
@@ -14,6 +18,7 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="expanded"
 )
+rerun_start = time.perf_counter()
 
 # Custom CSS for better styling
 st.markdown("""
@@ -99,12 +104,65 @@ st.markdown("""
 
 # Load the model and column names
 @st.cache_resource
-def load_model():
-    model = joblib.load('churn_model.pkl')
-    model_columns = joblib.load('model_columns.pkl')
-    return model, model_columns
+def load_active_model():
+    # Active version of the model registry (model_registry.py), or the local
+    # artifacts when there is none. Each rerun gets the current version; a newly
+    # activated one is picked up and swapped in without restarting the app
+    return ActiveModel()
 
-model, model_columns = load_model()
+@st.cache_resource(max_entries=2)
+def load_explainer(version, _artifacts):
+    # One per model version; the previous one is evicted after a swap
+    return ExplanationCache(_artifacts.model)
+
+@st.cache_resource
+def load_chart_cache():
+    # Rendered explanation charts keyed by the explanation's content hash
+    return ChartCache()
+
+@st.cache_resource(max_entries=2)
+def load_shap_store(model_dir):
+    # Precomputed explanations written by shap_store.py, if present and built from this model
+    store = ShapStore.open_if_exists(model_dir=model_dir)
+    if store is None:
+        raise LookupError(f"no SHAP store for the model in {model_dir}")
+    return store
+
+@st.cache_resource
+def start_warm_up(_artifacts):
+    # Once per process: load the model, SHAP and Plotly in the background
+    # after the first render, so the first analysis finds them ready
+    return warm_up(lambda: _artifacts.model, 'shap', 'plotly.graph_objects')
+
+@st.cache_resource
+def load_metrics():
+    # Per-stage timings shared by all sessions of this process
+    return StageMetrics('app_enhanced')
+
+@st.cache_resource(max_entries=2)
+def load_whatif_surface(model_dir):
+    # Churn risk precomputed over every input combination by whatif.py, if present
+    # Published with the model into its registry version, so it is checked against that model
+    surface = load_surface(os.path.join(model_dir, SURFACE_FILE), model_dir)
+    if surface is None:
+        raise LookupError(f"no what-if surface for the model in {model_dir}")
+    return surface
+
+def load_if_present(loader, *args):
+    # The loaders above raise LookupError when their file is missing or stale.
+    # Exceptions are not cached, so a file written after startup is picked up on a later rerun
+    try:
+        return loader(*args)
+    except LookupError:
+        return None
+
+metrics = load_metrics()
+active = load_active_model()
+# Version and artifacts from one read, so a hot swap in between cannot pair them wrongly
+version, artifacts = active.snapshot()
+preprocessor = artifacts.preprocessor
+surface = load_if_present(load_whatif_surface, artifacts.directory)
+shap_store = load_if_present(load_shap_store, artifacts.directory)
 
 # --- App Header ---
 st.markdown("""
@@ -154,6 +212,15 @@ with st.sidebar:
             help="Fiber optic customers may have different churn patterns"
         )
     
+    # Look up an existing customer in the precomputed SHAP store
+    stored_explanation = None
+    if shap_store is not None:
+        customer_id = st.text_input('🔎 Customer ID', help="Show the precomputed explanation for an existing customer")
+        if customer_id.strip():
+            stored_explanation = shap_store.explanation(customer_id.strip())
+            if stored_explanation is None:
+                st.warning(f"Customer '{customer_id.strip()}' is not in the SHAP store.")
+    
     # Add a submit button with a nice icon
     analyze_btn = st.button("🚀 Analyze Customer Risk", use_container_width=True)
 
@@ -168,13 +235,9 @@ input_data = {
     'InternetService': fiber_optic
 }
 
-input_df = pd.DataFrame(input_data, index=[0])
-
-# Align input with model training columns
-for col in model_columns:
-    if col not in input_df.columns:
-        input_df[col] = 0 
-input_df = input_df[model_columns]
+# Align input with model training columns (features not asked for are 0)
+with metrics.span('align'):
+    input_df = pd.DataFrame(preprocessor.align(input_data), columns=preprocessor.columns)
 
 # --- Main Content ---
 col1, col2 = st.columns([1, 1.5], gap="large")
@@ -185,44 +248,66 @@ with col1:
     
     if analyze_btn or 'calculated' in st.session_state:
         # Make prediction
-        prediction_prob = model.predict_proba(input_df)
-        churn_risk = prediction_prob[0][1]
+        with metrics.span('predict'):
+            if stored_explanation is not None:
+                churn_risk = churn_probability(stored_explanation)
+            else:
+                # Precomputed surface when the inputs are on its grid, otherwise the model
+                churn_risk = surface.risk_for(input_data) if surface is not None else None
+                if churn_risk is None:
+                    prediction_prob = artifacts.model.predict_proba(input_df)
+                    churn_risk = prediction_prob[0][1]
         
-        # Visual gauge
-        fig = go.Figure(go.Indicator(
-            mode = "gauge+number+delta",
-            value = churn_risk * 100,
-            domain = {'x': [0, 1], 'y': [0, 1]},
-            title = {'text': "Churn Risk Score", 'font': {'size': 18}},
-            gauge = {
-                'axis': {'range': [0, 100], 'tickwidth': 1, 'tickcolor': "darkblue"},
-                'bar': {'color': "darkblue"},
-                'bgcolor': "white",
-                'borderwidth': 2,
-                'bordercolor': "gray",
-                'steps': [
-                    {'range': [0, 30], 'color': "#4CAF50"},
-                    {'range': [30, 70], 'color': "#FFC107"},
-                    {'range': [70, 100], 'color': "#F44336"}
-                ],
-                'threshold': {
-                    'line': {'color': "black", 'width': 3},
-                    'thickness': 0.75,
-                    'value': churn_risk * 100
-                }
-            },
-            number = {'font': {'size': 28, 'color': 'black'}},
-            delta = {'reference': 50, 'increasing': {'color': "red"}, 'decreasing': {'color': "green"}}
-        ))
+        # Visual gauge (Plotly is imported on first use to keep startup fast)
+        with metrics.span('plotly'):
+            import plotly.graph_objects as go
+            fig = go.Figure(go.Indicator(
+                mode = "gauge+number+delta",
+                value = churn_risk * 100,
+                domain = {'x': [0, 1], 'y': [0, 1]},
+                title = {'text': "Churn Risk Score", 'font': {'size': 18}},
+                gauge = {
+                    'axis': {'range': [0, 100], 'tickwidth': 1, 'tickcolor': "darkblue"},
+                    'bar': {'color': "darkblue"},
+                    'bgcolor': "white",
+                    'borderwidth': 2,
+                    'bordercolor': "gray",
+                    'steps': [
+                        {'range': [0, 30], 'color': "#4CAF50"},
+                        {'range': [30, 70], 'color': "#FFC107"},
+                        {'range': [70, 100], 'color': "#F44336"}
+                    ],
+                    'threshold': {
+                        'line': {'color': "black", 'width': 3},
+                        'thickness': 0.75,
+                        'value': churn_risk * 100
+                    }
+                },
+                number = {'font': {'size': 28, 'color': 'black'}},
+                delta = {'reference': 50, 'increasing': {'color': "red"}, 'decreasing': {'color': "green"}}
+            ))
         
-        fig.update_layout(
-            height=300, 
-            margin=dict(l=20, r=20, t=60, b=10),
-            paper_bgcolor='rgba(0,0,0,0)',
-            font={'color': "black", 'family': "Arial"}
-        )
+            fig.update_layout(
+                height=300, 
+                margin=dict(l=20, r=20, t=60, b=10),
+                paper_bgcolor='rgba(0,0,0,0)',
+                font={'color': "black", 'family': "Arial"}
+            )
         
-        st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig, use_container_width=True)
+
+        # What-if: how the risk would move with tenure, everything else unchanged
+        if surface is not None and stored_explanation is None:
+            with metrics.span('plotly'):
+                curve = surface.tenure_curve_for(input_data)
+                fig = go.Figure(go.Scatter(x=np.arange(len(curve)), y=curve * 100, mode='lines', line={'color': 'darkblue'}))
+                fig.add_vline(x=tenure, line_dash='dash', line_color='gray')
+                fig.update_layout(
+                    title={'text': "Churn Risk vs Tenure", 'font': {'size': 16}},
+                    xaxis_title="Tenure (Months)", yaxis_title="Churn Risk (%)", yaxis_range=[0, 100],
+                    height=250, margin=dict(l=20, r=20, t=50, b=10), paper_bgcolor='rgba(0,0,0,0)'
+                )
+                st.plotly_chart(fig, use_container_width=True)
         
         # Risk assessment with emojis and better formatting
         if churn_risk > 0.7:
@@ -289,20 +374,25 @@ with col2:
     
     if 'calculated' in st.session_state and st.session_state['calculated']:
         with st.spinner('🧠 Analyzing factors...'):
-            # SHAP Explanation
-            explainer = shap.TreeExplainer(model)
-            explanation = explainer(input_df)
+            # SHAP Explanation: precomputed for stored customers, otherwise
+            # computed by the shared explainer (recent profiles cached)
+            with metrics.span('shap'):
+                if stored_explanation is not None:
+                    explanation = stored_explanation
+                else:
+                    explanation = load_explainer(version, artifacts).explain(input_df)
             
             # Create two tabs for different visualizations
+            # Charts are drawn with Plotly straight from the SHAP arrays and cached
+            # per explanation, so a profile seen before is not re-rendered
             tab1, tab2 = st.tabs(["📊 Waterfall Plot", "📈 Feature Impact"])            
+            chart_cache = load_chart_cache()
             
             with tab1:
                 # Waterfall plot
-                fig, ax = plt.subplots(figsize=(10, 6))
-                shap.plots.waterfall(explanation[0], max_display=10, show=False)
-                plt.title("Feature Impact on Prediction", fontsize=14)
-                plt.tight_layout()
-                st.pyplot(fig)
+                with metrics.span('plotly'):
+                    fig = chart_cache.chart('waterfall', explanation, waterfall_figure)
+                    st.plotly_chart(fig, use_container_width=True)
                 
                 st.markdown("""
                 <div style='background-color: #f5f5f5; padding: 12px; border-radius: 8px; margin-top: 16px;'>
@@ -319,11 +409,9 @@ with col2:
             
             with tab2:
                 # Feature importance plot
-                fig2, ax = plt.subplots(figsize=(10, 6))
-                shap.plots.bar(explanation[0], max_display=10, show=False)
-                plt.title("Top Features Affecting Prediction", fontsize=14)
-                plt.tight_layout()
-                st.pyplot(fig2)
+                with metrics.span('plotly'):
+                    fig2 = chart_cache.chart('bar', explanation, bar_figure)
+                    st.plotly_chart(fig2, use_container_width=True)
                 
                 st.markdown("""
                 <div style='background-color: #f5f5f5; padding: 12px; border-radius: 8px; margin-top: 16px;'>
@@ -373,3 +461,10 @@ st.components.v1.html("""
     });
 </script>
 """)
+
+start_warm_up(artifacts)
+
+# Whole-rerun time, then publish the timings (debug panel / Prometheus text file)
+metrics.record('rerun', time.perf_counter() - rerun_start)
+metrics.write()
+show_debug_panel(st, metrics)
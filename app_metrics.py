@@ -0,0 +1,124 @@
+import bisect
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import numpy as np
+
+METRICS_DIR = os.environ.get('CHURNSHIELD_METRICS_DIR', '.')
+DEBUG_PANEL = os.environ.get('CHURNSHIELD_DEBUG', '0') == '1'
+# Histogram bucket upper bounds in seconds, from sub-millisecond lookups to slow SHAP renders.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class StageMetrics:
+    """Wall time of each stage of an app rerun (align, predict, shap, render...).
+
+    Keeps a rolling window of recent durations per stage for the debug panel,
+    plus cumulative Prometheus histograms written to ``<app>.prom`` for a
+    textfile scraper. One instance per app process, shared by all sessions.
+    """
+
+    def __init__(self, app, window=500, path=None, min_write_interval=1.0):
+        self.app = app
+        self.window = window
+        self.path = path if path is not None else os.path.join(METRICS_DIR, f'churnshield_{app}.prom')
+        self.min_write_interval = min_write_interval
+        self._recent = {}
+        self._buckets = {}
+        self._sum = {}
+        self._count = {}
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def record(self, stage, seconds):
+        with self._lock:
+            if stage not in self._recent:
+                self._recent[stage] = deque(maxlen=self.window)
+                self._buckets[stage] = [0] * (len(BUCKETS) + 1)
+                self._sum[stage] = 0.0
+                self._count[stage] = 0
+            self._recent[stage].append(seconds)
+            self._buckets[stage][bisect.bisect_left(BUCKETS, seconds)] += 1
+            self._sum[stage] += seconds
+            self._count[stage] += 1
+
+    def summary(self):
+        """Per-stage count, last, p50, p90 and max over the rolling window, in milliseconds."""
+        with self._lock:
+            recent = {stage: list(values) for stage, values in self._recent.items()}
+            counts = dict(self._count)
+        rows = []
+        for stage, values in recent.items():
+            ms = np.array(values) * 1e3
+            p50, p90 = np.percentile(ms, [50, 90])
+            rows.append({'stage': stage, 'count': counts[stage], 'last_ms': ms[-1], 'p50_ms': p50,
+                         'p90_ms': p90, 'max_ms': ms.max()})
+        return rows
+
+    def histogram(self, stage):
+        """Rolling-window counts per bucket for one stage, as ``(upper_bound_ms, count)`` pairs."""
+        with self._lock:
+            values = list(self._recent.get(stage, ()))
+        counts = np.bincount([bisect.bisect_left(BUCKETS, v) for v in values], minlength=len(BUCKETS) + 1)
+        bounds = [f'{b * 1e3:g}' for b in BUCKETS] + ['+Inf']
+        return list(zip(bounds, counts.tolist()))
+
+    def to_prometheus(self):
+        lines = [
+            '# HELP churnshield_stage_seconds Wall time of each stage of a Streamlit app rerun.',
+            '# TYPE churnshield_stage_seconds histogram',
+        ]
+        with self._lock:
+            for stage in self._count:
+                labels = f'app="{self.app}",stage="{stage}"'
+                cumulative = 0
+                for bound, n in zip(BUCKETS + (float('inf'),), self._buckets[stage]):
+                    cumulative += n
+                    le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                    lines.append(f'churnshield_stage_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+                lines.append(f'churnshield_stage_seconds_sum{{{labels}}} {self._sum[stage]:.6f}')
+                lines.append(f'churnshield_stage_seconds_count{{{labels}}} {self._count[stage]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, force=False):
+        """Atomically rewrite the Prometheus text file, at most once per ``min_write_interval``."""
+        now = time.monotonic()
+        if not self.path or (not force and now - self._last_write < self.min_write_interval):
+            return
+        self._last_write = now
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp, 'w') as f:
+                f.write(self.to_prometheus())
+            os.replace(tmp, self.path)
+        except OSError:
+            pass
+
+
+def show_debug_panel(st, metrics):
+    """Sidebar panel with the rolling stage timings, shown with ``?debug=1`` or ``CHURNSHIELD_DEBUG=1``."""
+    if not (DEBUG_PANEL or st.query_params.get('debug') == '1'):
+        return
+    import pandas as pd
+
+    with st.sidebar.expander("⏱️ Stage timings", expanded=True):
+        rows = metrics.summary()
+        if not rows:
+            st.caption("No timings recorded yet.")
+            return
+        st.dataframe(pd.DataFrame(rows).set_index('stage').round(2), use_container_width=True)
+        stage = st.selectbox("Histogram", [row['stage'] for row in rows], key='_debug_stage')
+        hist = pd.DataFrame(metrics.histogram(stage), columns=['≤ ms', 'reruns']).set_index('≤ ms')
+        st.bar_chart(hist)
+        st.caption(f"Prometheus metrics: {os.path.abspath(metrics.path)}")
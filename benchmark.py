@@ -0,0 +1,175 @@
+import argparse
+import datetime
+import fnmatch
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from model_artifacts import load_artifacts
+
+BATCH_SIZES = (1, 10, 100, 1000, 10_000)
+SHAP_BATCH_SIZES = (1, 10, 100)
+DEFAULT_THRESHOLD = 0.15
+RESULTS_FILE = 'benchmark_results.json'
+
+
+def synthetic_inputs(preprocessor, n_rows, seed=0):
+    """Random but plausible rows, already encoded and aligned to the model columns."""
+    rng = np.random.default_rng(seed)
+    tenure = rng.integers(0, 73, n_rows)
+    monthly = rng.uniform(18, 120, n_rows).round(2)
+    data = {'tenure': tenure, 'MonthlyCharges': monthly, 'TotalCharges': tenure * monthly,
+            'SeniorCitizen': rng.integers(0, 2, n_rows)}
+    for col, levels in preprocessor.category_levels.items():
+        data[col] = rng.integers(0, len(levels), n_rows)
+    return pd.DataFrame(preprocessor.align(data), columns=preprocessor.columns)
+
+
+def time_call(fn, repeats, warmup=1):
+    """Run ``fn`` ``warmup + repeats`` times; summary of the timed runs in seconds."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {'median_s': statistics.median(times), 'min_s': min(times), 'max_s': max(times), 'repeats': repeats}
+
+
+def _repeats_for(n_rows, base):
+    # Fewer repeats for the large batches so the suite stays quick
+    return max(3, base // max(1, n_rows // 100))
+
+
+def benchmark_cases(model_dir='.', repeats=20):
+    """Yield ``(name, callable, repeats)`` for every hot path the apps and services use."""
+    artifacts = load_artifacts(model_dir)
+    model = artifacts.model
+    X = synthetic_inputs(artifacts.preprocessor, max(BATCH_SIZES))
+
+    yield 'load_model', lambda: load_artifacts(model_dir).model, repeats
+
+    for n in BATCH_SIZES:
+        batch = X.iloc[:n]
+        yield f'predict_proba/{n}', lambda batch=batch: model.predict_proba(batch), _repeats_for(n, repeats * 5)
+
+    import shap
+    yield 'shap_explainer_init', lambda: shap.TreeExplainer(model), repeats
+
+    explainer = shap.TreeExplainer(model)
+    for n in SHAP_BATCH_SIZES:
+        batch = X.iloc[:n]
+        yield f'shap_values/{n}', lambda batch=batch: explainer(batch), _repeats_for(n, repeats)
+
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    explanation = explainer(X.iloc[:1])[0]
+
+    def render(plot):
+        # shap's own matplotlib plots, as app.py renders its waterfall PNG
+        fig, _ = plt.subplots(figsize=(10, 6))
+        plot(explanation, max_display=10, show=False)
+        plt.tight_layout()
+        fig.savefig(_NullWriter(), format='png')
+        plt.close('all')
+
+    yield 'render_waterfall', lambda: render(shap.plots.waterfall), max(3, repeats // 4)
+    yield 'render_bar', lambda: render(shap.plots.bar), max(3, repeats // 4)
+
+    # Plotly versions used by app_enhanced.py, including the JSON serialisation Streamlit does
+    from explain_charts import bar_figure, waterfall_figure
+    yield 'plotly_waterfall', lambda: waterfall_figure(explanation).to_json(), repeats
+    yield 'plotly_bar', lambda: bar_figure(explanation).to_json(), repeats
+
+
+class _NullWriter:
+    """File-like sink so rendering to PNG is timed without disk I/O."""
+
+    def write(self, data):
+        return len(data)
+
+
+def run(model_dir='.', repeats=20, pattern='*'):
+    results = {}
+    for name, fn, n_repeats in benchmark_cases(model_dir, repeats):
+        if not fnmatch.fnmatch(name, pattern):
+            continue
+        results[name] = time_call(fn, n_repeats)
+        print(f"{name:<24} {results[name]['median_s'] * 1e3:10.3f} ms  (min {results[name]['min_s'] * 1e3:.3f}, "
+              f"n={n_repeats})")
+    return {'meta': environment(), 'results': results}
+
+
+def environment():
+    import shap
+    import xgboost
+
+    return {
+        'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'xgboost': xgboost.__version__,
+        'shap': shap.__version__,
+        'numpy': np.__version__,
+    }
+
+
+def compare(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Rows of ``(name, baseline_s, current_s, ratio, regressed)`` for benchmarks present in both runs.
+
+    A benchmark regresses when its median is more than ``threshold`` (a fraction)
+    slower than the baseline median.
+    """
+    rows = []
+    for name, result in current['results'].items():
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['median_s']
+        after = result['median_s']
+        ratio = after / before if before > 0 else float('inf')
+        rows.append((name, before, after, ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark model loading, prediction, SHAP and chart rendering.")
+    parser.add_argument('--model-dir', default='.', help="Directory holding the model artifacts")
+    parser.add_argument('--output', default=RESULTS_FILE, help="Where to write this run's JSON results")
+    parser.add_argument('--baseline', help="Earlier results JSON to compare against")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed slowdown vs baseline as a fraction (default: 0.15 = 15%%)")
+    parser.add_argument('--repeats', type=int, default=20)
+    parser.add_argument('--filter', default='*', help="Only run benchmarks matching this glob, e.g. 'predict*'")
+    args = parser.parse_args()
+
+    current = run(args.model_dir, args.repeats, args.filter)
+    with open(args.output, 'w') as f:
+        json.dump(current, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        rows = compare(baseline, current, args.threshold)
+        print(f"\n{'benchmark':<24} {'baseline ms':>12} {'current ms':>11} {'ratio':>7}")
+        for name, before, after, ratio, regressed in rows:
+            print(f"{name:<24} {before * 1e3:12.3f} {after * 1e3:11.3f} {ratio:7.2f}{'  REGRESSION' if regressed else ''}")
+        regressions = [row[0] for row in rows if row[4]]
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) slower than baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
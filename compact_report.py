@@ -0,0 +1,90 @@
+import argparse
+import io
+import time
+
+import numpy as np
+import pandas as pd
+
+from generate_telco import calibrate_intercept, generate_chunk
+from model_artifacts import load_artifacts
+from preprocessing import risk_tier, risk_tier_codes
+
+
+def npy_size(dtype, n_rows):
+    """Bytes of a 1-D ``.npy`` file of ``n_rows`` values of ``dtype``."""
+    header = io.BytesIO()
+    np.lib.format.write_array_header_1_0(header, {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)),
+                                                  'fortran_order': False, 'shape': (n_rows,)})
+    return header.tell() + np.dtype(dtype).itemsize * n_rows
+
+
+def measure_chunk(df, model, preprocessor):
+    """``{representation: (memory_bytes, disk_bytes)}`` for one chunk of raw rows.
+
+    Features: the CSV as read by pandas, the original int64/float64 label
+    encoding, the float32 matrix and the compact int8/float32 columns. Scores:
+    float64 probability + tier strings (CSV) vs float32 probability + int8 tier.
+    """
+    n = len(df)
+    csv = df.to_csv(index=False, na_rep=' ')
+    raw = pd.read_csv(io.StringIO(csv))
+    X = preprocessor.transform(raw)
+    compact = preprocessor.compact(X)
+    dtypes = preprocessor.column_dtypes()
+    legacy = {col: np.dtype(np.int64 if dtype.kind == 'i' or col == 'tenure' else np.float64)
+              for col, dtype in dtypes.items()}
+
+    probability = model.predict_proba(preprocessor.model_frame(compact))[:, 1]
+    scored_csv = pd.DataFrame({'churn_probability': probability, 'risk_tier': risk_tier(probability)})
+    scored_legacy = scored_csv.memory_usage(deep=True, index=False).sum()
+    tiers = risk_tier_codes(probability)
+
+    return {
+        'features: CSV / pandas as read': (raw.memory_usage(deep=True, index=False).sum(), len(csv.encode())),
+        'features: int64/float64 (original)': (sum(d.itemsize for d in legacy.values()) * n,
+                                                sum(npy_size(d, n) for d in legacy.values())),
+        'features: float32 matrix': (X.nbytes, sum(npy_size(np.float32, n) for _ in dtypes)),
+        'features: compact int8/float32': (sum(v.nbytes for v in compact.values()),
+                                            sum(npy_size(d, n) for d in dtypes.values())),
+        'scores: float64 + tier strings': (scored_legacy,
+                                           len(scored_csv.to_csv(index=False, float_format='%.6f').encode())),
+        'scores: float32 + int8 tier': (probability.astype(np.float32).nbytes + tiers.nbytes,
+                                        npy_size(np.float32, n) + npy_size(np.int8, n)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory and file size of the feature and score representations.")
+    parser.add_argument('--rows', type=int, default=10_000_000, help="Synthetic rows to measure (default: 10M)")
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    parser.add_argument('--model-dir', default='.', help="Directory holding the model artifacts")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    artifacts = load_artifacts(args.model_dir)
+    intercept = calibrate_intercept(seed=args.seed)
+    totals = {}
+    start = time.perf_counter()
+    # Chunks are measured one at a time and summed, so no representation of all rows is ever held at once
+    for index, offset in enumerate(range(0, args.rows, args.chunksize)):
+        n = min(args.chunksize, args.rows - offset)
+        rng = np.random.default_rng([args.seed, index])
+        sizes = measure_chunk(generate_chunk(n, offset, intercept, rng), artifacts.model, artifacts.preprocessor)
+        for name, (memory, disk) in sizes.items():
+            total = totals.setdefault(name, [0, 0])
+            total[0] += memory
+            total[1] += disk
+        print(f"  {offset + n:,} / {args.rows:,} rows", end='\r')
+
+    report = pd.DataFrame(totals, index=['memory_mb', 'disk_mb']).T / 2**20
+    for kind, baseline in (('features', 'features: int64/float64 (original)'),
+                           ('scores', 'scores: float64 + tier strings')):
+        rows = report.index.str.startswith(kind)
+        report.loc[rows, 'memory_vs_original'] = report.loc[rows, 'memory_mb'] / report.loc[baseline, 'memory_mb']
+        report.loc[rows, 'disk_vs_original'] = report.loc[rows, 'disk_mb'] / report.loc[baseline, 'disk_mb']
+    print(f"\n{args.rows:,} rows measured in {time.perf_counter() - start:.1f}s (disk: CSV text or .npy columns)")
+    print(report.to_string(float_format=lambda v: f"{v:,.2f}"))
+
+
+if __name__ == '__main__':
+    main()
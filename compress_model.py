@@ -0,0 +1,185 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
+from sklearn.model_selection import train_test_split
+from xgboost import XGBClassifier
+
+from model_artifacts import load_artifacts, save_artifacts
+
+DEFAULT_TOLERANCE = 0.005
+REPORT_FILE = 'compression_report.csv'
+# Distilled student shapes as (trees, max_depth), smallest first
+STUDENT_SHAPES = ((10, 3), (25, 3), (50, 3), (25, 4), (50, 4), (100, 4))
+TRUNCATE_FRACTIONS = (0.1, 0.25, 0.5, 0.75)
+
+
+def as_classifier(booster):
+    """Wrap a raw ``Booster`` as an ``XGBClassifier`` so it saves and serves like the trained model."""
+    model = XGBClassifier()
+    model.load_model(bytearray(booster.save_raw('json')))
+    return model
+
+
+def truncate(model, n_trees):
+    """The first ``n_trees`` boosting rounds of ``model``: pruning without retraining."""
+    return as_classifier(model.get_booster()[:n_trees])
+
+
+def distill(teacher, X, n_trees, max_depth, learning_rate=None, seed=0):
+    """Train a smaller student on the teacher's churn probabilities (soft labels) for the rows of ``X``.
+
+    ``binary:logistic`` accepts labels in [0, 1], so the student minimises the
+    cross-entropy to the teacher's probabilities rather than to the hard labels.
+    """
+    soft_labels = teacher.predict_proba(X)[:, 1]
+    params = {
+        'objective': 'binary:logistic', 'eval_metric': 'logloss', 'max_depth': max_depth,
+        'eta': learning_rate if learning_rate is not None else min(0.3, 10 / n_trees), 'seed': seed,
+        'tree_method': 'hist',
+    }
+    booster = xgb.train(params, xgb.DMatrix(X, label=soft_labels), num_boost_round=n_trees)
+    return as_classifier(booster)
+
+
+def model_shape(model):
+    """``(n_trees, max_depth, n_leaves)`` of a fitted model."""
+    trees = model.get_booster().trees_to_dataframe()
+    depth = 0
+    for _, tree in trees.groupby('Tree'):
+        depth = max(depth, _tree_depth(tree))
+    return trees['Tree'].nunique(), depth, int((trees['Feature'] == 'Leaf').sum())
+
+
+def _tree_depth(tree):
+    children = {row.ID: (row.Yes, row.No) for row in tree.itertuples() if row.Feature != 'Leaf'}
+    depth, level = 0, [tree['ID'].iloc[0]]
+    while True:
+        level = [c for node in level for c in children.get(node, ())]
+        if not level:
+            return depth
+        depth += 1
+
+
+def _median_time(fn, repeats):
+    fn()
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def evaluate(name, model, teacher_probability, X_test, y_test, repeats=50):
+    """Holdout metrics, fidelity to the teacher, latency and serialised size of one candidate."""
+    probability = model.predict_proba(X_test)[:, 1]
+    n_trees, depth, n_leaves = model_shape(model)
+    row, batch = X_test.iloc[:1], X_test.iloc[:1000]
+    return {
+        'model': name,
+        'trees': n_trees,
+        'max_depth': depth,
+        'leaves': n_leaves,
+        'size_kb': len(model.get_booster().save_raw('ubj')) / 1024,
+        'predict_1_ms': _median_time(lambda: model.predict_proba(row), repeats) * 1e3,
+        'predict_1k_ms': _median_time(lambda: model.predict_proba(batch), max(5, repeats // 5)) * 1e3,
+        'auc': roc_auc_score(y_test, probability),
+        'accuracy': accuracy_score(y_test, probability > 0.5),
+        'logloss': log_loss(y_test, probability, labels=[0, 1]),
+        'teacher_mae': float(np.abs(probability - teacher_probability).mean()),
+    }
+
+
+def compress(teacher, X, y, tolerance=DEFAULT_TOLERANCE, distill_rows=200_000, seed=0):
+    """Evaluate truncated and distilled candidates against the teacher on a holdout split.
+
+    Returns ``(report, models)``: a DataFrame with one row per candidate (the
+    teacher first, with deltas against it) and ``{name: model}``. A candidate is
+    ``eligible`` when its AUC is at most ``tolerance`` below the teacher's.
+    """
+    # Same split as train_model.py, so the holdout was never seen by the teacher
+    X_train, X_test, _, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+    if len(X_train) > distill_rows:
+        X_train = X_train.sample(distill_rows, random_state=seed)
+    teacher_probability = teacher.predict_proba(X_test)[:, 1]
+
+    models = {'teacher': teacher}
+    n_rounds = teacher.get_booster().num_boosted_rounds()
+    for fraction in TRUNCATE_FRACTIONS:
+        n = max(1, int(n_rounds * fraction))
+        models[f'truncate_{n}'] = truncate(teacher, n)
+    for n_trees, depth in STUDENT_SHAPES:
+        models[f'distill_{n_trees}x{depth}'] = distill(teacher, X_train, n_trees, depth, seed=seed)
+
+    rows = [evaluate(name, model, teacher_probability, X_test, y_test) for name, model in models.items()]
+    report = pd.DataFrame(rows).set_index('model')
+    base = report.loc['teacher']
+    for metric in ('auc', 'accuracy', 'logloss'):
+        report[f'{metric}_delta'] = report[metric] - base[metric]
+    report['speedup_1'] = base['predict_1_ms'] / report['predict_1_ms']
+    report['speedup_1k'] = base['predict_1k_ms'] / report['predict_1k_ms']
+    report['eligible'] = report['auc_delta'] >= -tolerance
+    return report, models
+
+
+def pick(report):
+    """Fastest eligible candidate on 1k-row batches (the scoring path), ties broken by size."""
+    eligible = report[report['eligible']]
+    return eligible.sort_values(['predict_1k_ms', 'size_kb']).index[0]
+
+
+def main():
+    from preprocessing import ID_COLUMN
+
+    parser = argparse.ArgumentParser(description="Prune or distil the churn model into a faster serving model.")
+    parser.add_argument('--data', required=True, help="Training CSV (the holdout split matches train_model.py)")
+    parser.add_argument('--model-dir', default='.', help="Directory holding the teacher model artifacts")
+    parser.add_argument('--output-dir', default='compressed_model', help="Where to save the chosen model")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Largest acceptable AUC drop vs the teacher (default: 0.005)")
+    parser.add_argument('--distill-rows', type=int, default=200_000,
+                        help="Training rows the students learn the teacher's probabilities on")
+    parser.add_argument('--report', default=REPORT_FILE)
+    args = parser.parse_args()
+
+    # Encode with the teacher's own preprocessor: the students are saved with it, and teacher and students
+    # are compared on this one matrix
+    artifacts = load_artifacts(args.model_dir)
+    preprocessor = artifacts.preprocessor
+    df = pd.read_csv(args.data, dtype={ID_COLUMN: str})
+    X = pd.DataFrame(preprocessor.transform(df), columns=preprocessor.columns)
+    y = pd.Series(preprocessor.transform_target(df), name='Churn')
+    start = time.perf_counter()
+    report, models = compress(artifacts.model, X, y, args.tolerance, args.distill_rows)
+    report.to_csv(args.report, float_format='%.6g')
+
+    columns = ['trees', 'max_depth', 'size_kb', 'predict_1_ms', 'predict_1k_ms', 'speedup_1k', 'auc', 'auc_delta',
+               'accuracy_delta', 'logloss_delta', 'teacher_mae', 'eligible']
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(report[columns].round(4).to_string())
+    print(f"\nEvaluated {len(report)} models in {time.perf_counter() - start:.1f}s; report written to {args.report}")
+
+    name = pick(report)
+    if name == 'teacher':
+        print(f"No candidate is within {args.tolerance} AUC of the teacher; nothing saved.")
+        return
+    chosen = report.loc[name]
+    save_artifacts(models[name], artifacts.preprocessor, args.output_dir, training={
+        'compressed_from': artifacts.training.get('created_at'),
+        'method': name,
+        'auc': chosen['auc'],
+        'auc_delta': chosen['auc_delta'],
+        'accuracy': chosen['accuracy'],
+        'tolerance': args.tolerance,
+    })
+    print(f"Saved {name} ({chosen['speedup_1k']:.1f}x faster on 1k rows, AUC {chosen['auc_delta']:+.4f}) "
+          f"to {os.path.join(args.output_dir, '')}; serve it with --model-dir {args.output_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+import argparse
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+# Explanation modes, most accurate first.
+#   exact  - shap.TreeExplainer (path-dependent TreeSHAP), what the apps always used
+#   native - XGBoost's own TreeSHAP (pred_contribs): same values, no shap import
+#   saabas - XGBoost's approx_contribs: per-tree Saabas attributions, orders of magnitude faster
+MODES = ('exact', 'native', 'saabas')
+DEFAULT_MODE = os.environ.get('CHURNSHIELD_EXPLAIN_MODE', 'exact')
+if DEFAULT_MODE not in MODES + ('auto',):
+    raise ValueError(f"CHURNSHIELD_EXPLAIN_MODE='{DEFAULT_MODE}' is not 'auto' or one of {', '.join(MODES)}")
+_budget = os.environ.get('CHURNSHIELD_EXPLAIN_BUDGET_MS')
+DEFAULT_BUDGET_MS = float(_budget) if _budget else None
+
+
+class ContributionExplainer:
+    """Per-feature contributions to the churn log-odds in one of ``MODES``.
+
+    With ``mode='auto'`` the most accurate mode whose estimated time for the
+    batch fits ``budget_ms`` is used. Estimates come from a one-off calibration
+    of each mode's fixed and per-row cost on this model.
+    """
+
+    def __init__(self, model, budget_ms=DEFAULT_BUDGET_MS):
+        self.model = model
+        self.booster = model.get_booster()
+        self.budget_ms = budget_ms
+        self._tree_explainer = None
+        self._costs = None
+        self._lock = threading.Lock()
+
+    def contributions(self, X, mode='auto', budget_ms=None):
+        """Return ``(values, base_values, mode)``; ``values`` is ``(n_rows, n_features)`` float32."""
+        if mode == 'auto':
+            mode = self.choose_mode(len(X), budget_ms if budget_ms is not None else self.budget_ms)
+        if mode == 'exact':
+            explainer = self.tree_explainer()
+            values = np.asarray(explainer.shap_values(X), dtype=np.float32)
+            base = np.full(len(X), float(np.ravel(explainer.expected_value)[0]), dtype=np.float32)
+            return values, base, mode
+        if mode not in MODES:
+            raise ValueError(f"Unknown explanation mode '{mode}', expected 'auto' or one of {', '.join(MODES)}")
+
+        import xgboost as xgb
+        # Plain arrays (e.g. ``Preprocessor.transform`` output) get the booster's feature names
+        feature_names = None if isinstance(X, pd.DataFrame) else self.booster.feature_names
+        contribs = self.booster.predict(xgb.DMatrix(X, feature_names=feature_names), pred_contribs=True,
+                                        approx_contribs=(mode == 'saabas'))
+        # The last column is the bias term, i.e. the base value
+        return contribs[:, :-1].astype(np.float32), contribs[:, -1].astype(np.float32), mode
+
+    def explanation(self, input_df, mode='auto', budget_ms=None):
+        """``shap.Explanation`` for the single row in ``input_df``."""
+        import shap
+
+        if mode == 'auto':
+            mode = self.choose_mode(len(input_df), budget_ms if budget_ms is not None else self.budget_ms)
+        if mode == 'exact':
+            return self.tree_explainer()(input_df)[0]
+        values, base, mode = self.contributions(input_df, mode)
+        return shap.Explanation(values=values[0], base_values=float(base[0]),
+                                data=input_df.to_numpy(dtype=np.float64)[0], feature_names=list(input_df.columns))
+
+    def tree_explainer(self):
+        with self._lock:
+            if self._tree_explainer is None:
+                import shap
+                self._tree_explainer = shap.TreeExplainer(self.model)
+            return self._tree_explainer
+
+    def choose_mode(self, n_rows, budget_ms=None):
+        """Most accurate mode expected to explain ``n_rows`` rows within ``budget_ms`` (None: no limit)."""
+        if budget_ms is None:
+            # 'auto' without a budget: nothing to trade accuracy for
+            return DEFAULT_MODE if DEFAULT_MODE in MODES else 'exact'
+        costs = self.calibrate()
+        # 'exact' and 'native' give identical values; prefer whichever is faster
+        exact = min(('exact', 'native'), key=lambda m: self.estimate_ms(m, n_rows))
+        for mode in (exact, 'saabas'):
+            if self.estimate_ms(mode, n_rows) <= budget_ms:
+                return mode
+        return min(costs, key=lambda m: self.estimate_ms(m, n_rows))
+
+    def estimate_ms(self, mode, n_rows):
+        fixed, per_row = self.calibrate()[mode]
+        return (fixed + per_row * n_rows) * 1e3
+
+    def calibrate(self, small=1, large=64, repeats=3):
+        """``{mode: (fixed_seconds, seconds_per_row)}`` fitted from timings at two batch sizes."""
+        if self._costs is not None:
+            return self._costs
+        columns = self.booster.feature_names or [f'f{i}' for i in range(self.booster.num_features())]
+        X = pd.DataFrame(np.zeros((large, len(columns)), dtype=np.float32), columns=columns)
+        costs = {}
+        for mode in MODES:
+            self.contributions(X.iloc[:small], mode)  # warm-up (builds the shap explainer once)
+            t_small = _best_time(lambda: self.contributions(X.iloc[:small], mode), repeats)
+            t_large = _best_time(lambda: self.contributions(X, mode), repeats)
+            per_row = max(t_large - t_small, 0.0) / (large - small)
+            costs[mode] = (max(t_small - per_row * small, 0.0), per_row)
+        self._costs = costs
+        return costs
+
+
+def _best_time(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def accuracy_report(explainer, X, top_k=3):
+    """Speed and agreement with exact TreeSHAP of every mode on the rows of ``X``.
+
+    Errors are on the log-odds scale. ``rel_l1`` is the summed absolute error
+    divided by the summed absolute exact values; ``top{k}_overlap`` is the mean
+    share of the exact top-k features (by magnitude) a mode also ranks top-k,
+    and ``sign_agree`` is the share of those features where the sign matches.
+    """
+    exact, _, _ = explainer.contributions(X, 'exact')
+    exact_top = np.argsort(-np.abs(exact), axis=1)[:, :top_k]
+    rows = []
+    for mode in MODES:
+        start = time.perf_counter()
+        values, _, _ = explainer.contributions(X, mode)
+        elapsed = time.perf_counter() - start
+        error = np.abs(values - exact)
+        top = np.argsort(-np.abs(values), axis=1)[:, :top_k]
+        overlap = np.mean([len(set(a) & set(b)) / top_k for a, b in zip(exact_top, top)])
+        signs = np.take_along_axis(np.sign(values), exact_top, 1) == np.take_along_axis(np.sign(exact), exact_top, 1)
+        rows.append({
+            'mode': mode,
+            'ms_per_row': elapsed * 1e3 / len(X),
+            'mean_abs_err': error.mean(),
+            'max_abs_err': error.max(),
+            'rel_l1': error.sum() / max(np.abs(exact).sum(), 1e-12),
+            f'top{top_k}_overlap': overlap,
+            'sign_agree': signs.mean(),
+        })
+    return pd.DataFrame(rows)
+
+
+def main():
+    from model_artifacts import load_artifacts
+
+    parser = argparse.ArgumentParser(description="Compare explanation modes against exact TreeSHAP.")
+    parser.add_argument('--data', help="Telco-format CSV to sample rows from (default: synthetic inputs)")
+    parser.add_argument('--sample', type=int, default=2000)
+    parser.add_argument('--model-dir', default='.', help="Directory holding the model artifacts")
+    parser.add_argument('--budget-ms', type=float, nargs='*', default=[1, 10, 100, 1000],
+                        help="Budgets to show the automatic mode choice for")
+    args = parser.parse_args()
+
+    artifacts = load_artifacts(args.model_dir)
+    preprocessor = artifacts.preprocessor
+    if args.data:
+        df = pd.read_csv(args.data, nrows=args.sample)
+        X = pd.DataFrame(preprocessor.transform(df), columns=preprocessor.columns)
+    else:
+        from benchmark import synthetic_inputs
+        X = synthetic_inputs(preprocessor, args.sample)
+
+    explainer = ContributionExplainer(artifacts.model)
+    report = accuracy_report(explainer, X)
+    print(f"Accuracy vs exact TreeSHAP on {len(X):,} rows (log-odds scale):")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}"))
+
+    print("\nEstimated cost (fixed + per row):")
+    for mode, (fixed, per_row) in explainer.calibrate().items():
+        print(f"  {mode:<7} {fixed * 1e3:7.2f} ms + {per_row * 1e3:.4f} ms/row")
+    print("\nAutomatic choice:")
+    for budget in args.budget_ms:
+        choices = ', '.join(f"{n:,} rows -> {explainer.choose_mode(n, budget)}" for n in (1, 100, 10_000))
+        print(f"  budget {budget:g} ms: {choices}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import PREPROCESSING_VERSION, Preprocessor
+
+DEFAULT_CACHE_DIR = os.environ.get('CHURNSHIELD_DATA_CACHE', '.data_cache')
+# Training CSV used when --data is not given: the original Kaggle file in the working directory
+DEFAULT_DATA_PATH = os.environ.get('CHURNSHIELD_DATA', 'WA_Fn-UseC_-Telco-Customer-Churn.csv')
+# Bump whenever the on-disk layout of an entry changes (2: compact int8/float32 columns).
+CACHE_FORMAT_VERSION = 2
+
+
+def file_digest(path, block_size=1 << 20):
+    """SHA-256 of the file contents, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(path):
+    """Cache entries are keyed by source content, preprocessing version and cache format."""
+    return f"{file_digest(path)[:20]}-v{PREPROCESSING_VERSION}-c{CACHE_FORMAT_VERSION}"
+
+
+def load_training_data(path, cache_dir=DEFAULT_CACHE_DIR, verbose=True):
+    """Return ``(X, y, preprocessor)`` for a raw Telco CSV, using the columnar cache when possible.
+
+    On a miss the CSV is parsed, a Preprocessor is fitted and every encoded
+    feature is written as its own ``.npy`` file in its compact dtype (int8
+    category codes, float32 numbers, see ``Preprocessor.column_dtypes``) plus
+    the int8 target. On a hit the columns are memory-mapped instead of
+    re-parsing the CSV, and ``X`` keeps the compact dtypes.
+    """
+    entry = os.path.join(cache_dir, cache_key(path))
+    if not os.path.exists(os.path.join(entry, 'meta.json')):
+        if verbose:
+            print(f"Dataset cache miss, parsing {path}...")
+        df = pd.read_csv(path)
+        preprocessor = Preprocessor()
+        columns = preprocessor.fit(df).transform_compact(df)
+        _write_entry(entry, columns, preprocessor.transform_target(df), preprocessor, source=path)
+    elif verbose:
+        print(f"Dataset cache hit: {entry}")
+
+    columns, y, preprocessor = load_columns(entry)
+    X = preprocessor.model_frame(columns)
+    return X, pd.Series(y, name='Churn'), preprocessor
+
+
+def load_columns(entry):
+    """Memory-map one cache entry: ``({column: array}, y, preprocessor)``."""
+    preprocessor = Preprocessor.load(os.path.join(entry, 'preprocessor.json'))
+    columns = {
+        col: np.load(os.path.join(entry, f'{i:03d}.npy'), mmap_mode='r')
+        for i, col in enumerate(preprocessor.columns)
+    }
+    y = np.load(os.path.join(entry, 'target.npy'), mmap_mode='r')
+    return columns, y, preprocessor
+
+
+def _write_entry(entry, columns, y, preprocessor, source):
+    os.makedirs(os.path.dirname(entry) or '.', exist_ok=True)
+    # Build the entry in a temporary directory and rename it into place so a
+    # crashed or concurrent run never leaves a half-written cache behind.
+    tmp = tempfile.mkdtemp(dir=os.path.dirname(entry) or '.')
+    try:
+        for i, col in enumerate(preprocessor.columns):
+            np.save(os.path.join(tmp, f'{i:03d}.npy'), columns[col])
+        np.save(os.path.join(tmp, 'target.npy'), y)
+        preprocessor.save(os.path.join(tmp, 'preprocessor.json'))
+        with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+            json.dump({'source': os.path.abspath(source), 'n_rows': len(y),
+                       'preprocessing_version': PREPROCESSING_VERSION}, f, indent=2)
+        os.replace(tmp, entry)
+    except Exception:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.exists(os.path.join(entry, 'meta.json')):
+            raise
@@ -0,0 +1,296 @@
+import argparse
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+BASELINE_FILE = 'drift_baseline.json'
+DRIFT_DIR = os.environ.get('CHURNSHIELD_DRIFT_DIR', '.')
+STATE_FILE = 'drift_state.json'
+REPORT_FILE = 'drift_report.json'
+ALERT_FILE = 'drift_alert.json'
+PROBABILITY = 'churn_probability'
+N_BINS = 20
+# Usual PSI reading: < 0.1 stable, 0.1-0.25 moderate shift, > 0.25 major shift
+PSI_WARN, PSI_ALERT = 0.1, 0.25
+KS_WARN, KS_ALERT = 0.1, 0.2
+# No verdict until this many rows have been observed
+MIN_ROWS = 500
+# Rows after which an observation counts half, so old traffic can't mask new drift (unset: never forget)
+_half_life = os.environ.get('CHURNSHIELD_DRIFT_HALF_LIFE')
+DEFAULT_HALF_LIFE = int(_half_life) if _half_life else None
+_EPS = 1e-4
+
+logger = logging.getLogger(__name__)
+
+
+class DriftSketch:
+    """Constant-memory summary of a stream of encoded rows.
+
+    Numeric features get fixed-bin histograms (edges taken from training
+    quantiles, plus under/overflow bins and a missing bin); categorical codes
+    get count tables with a trailing bin for missing or unseen codes. Model
+    probabilities, when given, are binned on fixed 5-point bins. Memory depends
+    only on the number of features and bins, never on the rows seen.
+    """
+
+    def __init__(self, features):
+        # {name: {'kind': 'numeric' | 'categorical', 'edges' | 'levels': [...], 'counts': ndarray}}
+        self.features = features
+        self.n_rows = 0
+
+    @classmethod
+    def from_training(cls, X, preprocessor, probabilities=None, n_bins=N_BINS, sample_size=1_000_000, seed=0):
+        """Empty sketch whose numeric bins are the training quantiles of ``X``, then filled with ``X``."""
+        rng = np.random.default_rng(seed)
+        rows = rng.choice(len(X), sample_size, replace=False) if len(X) > sample_size else None
+        features = {}
+        for j, col in enumerate(preprocessor.columns):
+            if col in preprocessor.category_levels:
+                levels = list(preprocessor.category_levels[col])
+                features[col] = {'kind': 'categorical', 'levels': levels, 'counts': np.zeros(len(levels) + 1)}
+                continue
+            values = _column(X, j, col).astype(np.float64)
+            if rows is not None:
+                values = values[rows]
+            quantiles = np.nanquantile(values, np.linspace(0, 1, n_bins + 1)[1:-1]) if np.isfinite(values).any() else []
+            edges = np.unique(quantiles).tolist()
+            features[col] = {'kind': 'numeric', 'edges': edges, 'counts': np.zeros(len(edges) + 2)}
+        if probabilities is not None:
+            edges = np.linspace(0, 1, n_bins + 1)[1:-1].tolist()
+            features[PROBABILITY] = {'kind': 'numeric', 'edges': edges, 'counts': np.zeros(len(edges) + 2)}
+        sketch = cls(features)
+        sketch.update(X, probabilities, preprocessor.columns)
+        return sketch
+
+    def empty(self):
+        """A sketch with the same bins and zero counts."""
+        return DriftSketch({name: {**spec, 'counts': np.zeros_like(spec['counts'])}
+                            for name, spec in self.features.items()})
+
+    def update(self, X, probabilities=None, columns=None, half_life=None):
+        """Add a batch: ``X`` is a float32 matrix from ``Preprocessor.transform`` or a frame of compact columns.
+
+        With ``half_life`` (in rows) existing counts are first decayed, so the
+        sketch tracks recent traffic rather than everything since it started.
+        """
+        columns = columns if columns is not None else list(X.columns)
+        if half_life:
+            decay = 0.5 ** (len(X) / half_life)
+            for spec in self.features.values():
+                spec['counts'] *= decay
+            self.n_rows *= decay
+        for j, col in enumerate(columns):
+            spec = self.features.get(col)
+            if spec is not None:
+                spec['counts'] += _bin_counts(spec, _column(X, j, col))
+        if probabilities is not None and PROBABILITY in self.features:
+            self.features[PROBABILITY]['counts'] += _bin_counts(self.features[PROBABILITY], probabilities)
+        self.n_rows += len(X)
+
+    def to_dict(self):
+        return {'n_rows': self.n_rows,
+                'features': {name: {**spec, 'counts': spec['counts'].tolist()} for name, spec in self.features.items()}}
+
+    @classmethod
+    def from_dict(cls, d):
+        sketch = cls({name: {**spec, 'counts': np.asarray(spec['counts'], dtype=np.float64)}
+                      for name, spec in d['features'].items()})
+        sketch.n_rows = d['n_rows']
+        return sketch
+
+    def save(self, path):
+        _write_json(path, self.to_dict())
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def _column(X, j, col):
+    return X[col].to_numpy() if isinstance(X, pd.DataFrame) else np.asarray(X)[:, j]
+
+
+def _bin_counts(spec, values):
+    values = np.asarray(values, dtype=np.float64)
+    n = len(spec['counts'])
+    missing = ~np.isfinite(values)
+    if spec['kind'] == 'categorical':
+        # Last bin: NaN, the compact -1 code or codes the training data never had
+        missing |= (values < 0) | (values >= n - 1)
+        bins = np.where(missing, n - 1, np.nan_to_num(values)).astype(np.intp)
+    else:
+        bins = np.where(missing, n - 1, np.searchsorted(spec['edges'], np.nan_to_num(values), side='right'))
+    return np.bincount(bins, minlength=n)
+
+
+def psi(expected, actual):
+    """Population stability index between two count vectors over the same bins."""
+    p = np.maximum(expected / max(expected.sum(), 1), _EPS)
+    q = np.maximum(actual / max(actual.sum(), 1), _EPS)
+    return float(np.sum((q - p) * np.log(q / p)))
+
+
+def ks(expected, actual):
+    """Largest gap between the two binned CDFs (a lower bound on the exact KS statistic)."""
+    p = np.cumsum(expected) / max(expected.sum(), 1)
+    q = np.cumsum(actual) / max(actual.sum(), 1)
+    return float(np.max(np.abs(p - q)))
+
+
+def compare(baseline, current):
+    """Per-feature PSI, KS (numeric features only) and status of ``current`` against ``baseline``."""
+    rows = []
+    for name, spec in baseline.features.items():
+        counts = current.features[name]['counts']
+        expected, actual = spec['counts'], counts
+        status = 'insufficient data'
+        value_psi = psi(expected, actual)
+        # KS over ordered bins only: the trailing missing bin has no place in the order
+        value_ks = ks(expected[:-1], actual[:-1]) if spec['kind'] == 'numeric' else None
+        if current.n_rows >= MIN_ROWS:
+            ks_value = value_ks or 0.0
+            status = ('alert' if value_psi >= PSI_ALERT or ks_value >= KS_ALERT
+                      else 'warn' if value_psi >= PSI_WARN or ks_value >= KS_WARN else 'ok')
+        rows.append({
+            'feature': name,
+            'kind': spec['kind'],
+            'psi': value_psi,
+            'ks': value_ks,
+            'missing_share': float(actual[-1] / max(actual.sum(), 1)),
+            'status': status,
+        })
+    return pd.DataFrame(rows)
+
+
+class DriftMonitor:
+    """Streaming drift check of scored traffic against the training baseline.
+
+    ``observe`` folds every scored batch into a running sketch (thread-safe,
+    constant memory). At most once per ``min_write_interval`` seconds the sketch
+    is persisted (so a restart resumes it), the PSI/KS report is rewritten and
+    ``drift_alert.json`` is written while any feature is in alert and removed
+    once none is. History is never re-read. With ``half_life`` (rows, or
+    ``CHURNSHIELD_DRIFT_HALF_LIFE``) older traffic is exponentially down-weighted.
+    """
+
+    def __init__(self, baseline, directory=DRIFT_DIR, min_write_interval=10.0, resume=True,
+                 half_life=DEFAULT_HALF_LIFE):
+        self.baseline = baseline
+        self.directory = directory
+        self.min_write_interval = min_write_interval
+        self.half_life = half_life
+        state_path = os.path.join(directory, STATE_FILE)
+        self.current = baseline.empty()
+        if resume and os.path.exists(state_path):
+            saved = DriftSketch.load(state_path)
+            if _same_bins(saved, baseline):
+                self.current = saved
+        self._last_write = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open_if_exists(cls, baseline_path=BASELINE_FILE, **kwargs):
+        """Monitor against the saved baseline, or None if no baseline has been saved."""
+        if not os.path.exists(baseline_path):
+            return None
+        return cls(DriftSketch.load(baseline_path), **kwargs)
+
+    def observe(self, X, probabilities=None, columns=None):
+        with self._lock:
+            self.current.update(X, probabilities, columns, self.half_life)
+        # Called on the scoring path: a failed write is logged and retried later, never raised
+        try:
+            self.write()
+        except Exception:
+            logger.exception("Could not write the drift state and report to %s", self.directory)
+
+    def report(self):
+        with self._lock:
+            current = DriftSketch.from_dict(self.current.to_dict())
+        return compare(self.baseline, current), current.n_rows
+
+    def write(self, force=False):
+        now = time.monotonic()
+        if not force and now - self._last_write < self.min_write_interval:
+            return
+        self._last_write = now
+        report, n_rows = self.report()
+        with self._lock:
+            state = self.current.to_dict()
+        _write_json(os.path.join(self.directory, STATE_FILE), state)
+        summary = {
+            'updated_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'n_rows': n_rows,
+            'baseline_rows': self.baseline.n_rows,
+            'features': json.loads(report.to_json(orient='records')),
+        }
+        _write_json(os.path.join(self.directory, REPORT_FILE), summary)
+        alert_path = os.path.join(self.directory, ALERT_FILE)
+        alerts = [row for row in summary['features'] if row['status'] == 'alert']
+        if alerts:
+            _write_json(alert_path, {**summary, 'features': alerts})
+        elif os.path.exists(alert_path):
+            os.remove(alert_path)
+
+
+def _same_bins(a, b):
+    return all(name in a.features and len(a.features[name]['counts']) == len(spec['counts'])
+               and a.features[name].get('edges') == spec.get('edges') for name, spec in b.features.items())
+
+
+def _write_json(path, payload):
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(payload, f, indent=2)
+    os.replace(tmp, path)
+
+
+def save_baseline(X, preprocessor, probabilities=None, path=BASELINE_FILE):
+    """Snapshot the training distribution (and the model's scores on it) for later drift checks."""
+    sketch = DriftSketch.from_training(X, preprocessor, probabilities)
+    sketch.save(path)
+    return sketch
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Input drift of scored traffic against the training baseline.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    base = sub.add_parser('baseline', help="Save the baseline sketch from a training CSV")
+    base.add_argument('--data', required=True)
+    base.add_argument('--model-dir', default='.', help="Directory holding the model artifacts")
+    base.add_argument('--output', default=BASELINE_FILE)
+    rep = sub.add_parser('report', help="Compare the running sketch with the baseline")
+    rep.add_argument('--baseline', default=BASELINE_FILE)
+    rep.add_argument('--dir', default=DRIFT_DIR, help="Directory holding drift_state.json")
+    args = parser.parse_args()
+
+    if args.command == 'baseline':
+        from model_artifacts import load_artifacts
+        from preprocessing import ID_COLUMN
+
+        # Encode with the model's own preprocessor, as the scoring paths do, never one refitted on this CSV
+        artifacts = load_artifacts(args.model_dir)
+        preprocessor = artifacts.preprocessor
+        X = preprocessor.transform(pd.read_csv(args.data, dtype={ID_COLUMN: str}))
+        probabilities = artifacts.model.predict_proba(X)[:, 1]
+        sketch = save_baseline(X, preprocessor, probabilities, args.output)
+        print(f"Baseline of {sketch.n_rows:,} rows over {len(sketch.features)} features saved to {args.output}")
+        return
+
+    monitor = DriftMonitor(DriftSketch.load(args.baseline), args.dir)
+    report, n_rows = monitor.report()
+    print(f"{n_rows:,.0f} scored rows vs {monitor.baseline.n_rows:,} baseline rows")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.4f}", na_rep='-'))
+    if (report['status'] == 'alert').any():
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from contributions import DEFAULT_MODE, ContributionExplainer
+
+DEFAULT_CACHE_SIZE = int(os.environ.get('CHURNSHIELD_SHAP_CACHE_SIZE', 256))
+
+
+class LRUCache:
+    """Thread-safe least-recently-used mapping with hit/miss counters."""
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._data:
+                self.hits += 1
+                self._data.move_to_end(key)
+                return self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def info(self):
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self._data), 'maxsize': self.maxsize}
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = 0
+
+
+class ExplanationCache:
+    """A tree explainer with an LRU cache of single-row explanations.
+
+    Explanations are keyed by the explanation mode and the aligned feature
+    vector, so moving the sliders back to a profile that was already explained
+    skips the explainer entirely. ``mode`` is one of ``contributions.MODES`` or
+    ``'auto'`` to pick by ``CHURNSHIELD_EXPLAIN_BUDGET_MS``. Safe to share
+    across Streamlit sessions via ``st.cache_resource``.
+    """
+
+    def __init__(self, model, maxsize=DEFAULT_CACHE_SIZE, mode=DEFAULT_MODE):
+        self.explainer = ContributionExplainer(model)
+        self.mode = mode
+        self._cache = LRUCache(maxsize)
+
+    def explain(self, input_df):
+        """Return the ``shap.Explanation`` for the single row in ``input_df``."""
+        mode = self.explainer.choose_mode(1, self.explainer.budget_ms) if self.mode == 'auto' else self.mode
+        key = (mode, np.ascontiguousarray(input_df.to_numpy(dtype=np.float64)).tobytes())
+        explanation = self._cache.get(key)
+        if explanation is None:
+            explanation = self.explainer.explanation(input_df, mode)
+            self._cache.put(key, explanation)
+        return explanation
+
+    def cache_info(self):
+        return self._cache.info()
+
+    def clear(self):
+        self._cache.clear()
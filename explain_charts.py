@@ -0,0 +1,109 @@
+import hashlib
+import io
+import threading
+
+import numpy as np
+
+from explain import LRUCache
+
+# SHAP's own colours for positive / negative contributions
+POSITIVE_COLOR = '#ff0051'
+NEGATIVE_COLOR = '#008bfb'
+
+# pyplot's current-figure state is global, so renders from concurrent sessions are serialised
+_render_lock = threading.Lock()
+
+
+def explanation_key(explanation):
+    """Content hash of a single-row explanation (values, inputs and base value)."""
+    h = hashlib.sha1()
+    for part in (explanation.values, explanation.data, explanation.base_values):
+        h.update(np.ascontiguousarray(part, dtype=np.float64).tobytes())
+    h.update('\0'.join(explanation.feature_names or ()).encode())
+    return h.hexdigest()
+
+
+def _top_features(explanation, max_display):
+    """``(labels, values, n_rest, rest_sum)`` for the largest contributions, largest first."""
+    values = np.asarray(explanation.values, dtype=float)
+    names = explanation.feature_names or [f'Feature {i}' for i in range(len(values))]
+    order = np.argsort(-np.abs(values))
+    shown = order[:max_display - 1] if len(values) > max_display else order
+    rest = order[len(shown):]
+    labels = [f'{explanation.data[i]:g} = {names[i]}' for i in shown]
+    return labels, values[shown], len(rest), float(values[rest].sum())
+
+
+def waterfall_figure(explanation, max_display=10, title="Feature Impact on Prediction"):
+    """Plotly equivalent of ``shap.plots.waterfall``: from E[f(X)] at the bottom to f(x) at the top."""
+    import plotly.graph_objects as go
+
+    labels, values, n_rest, rest_sum = _top_features(explanation, max_display)
+    if n_rest:
+        labels.append(f'{n_rest} other features')
+        values = np.append(values, rest_sum)
+    base = float(explanation.base_values)
+    # Bottom-to-top order, so the largest contribution ends up at the top
+    fig = go.Figure(go.Waterfall(
+        orientation='h', base=base, measure=['relative'] * len(values),
+        y=labels[::-1], x=values[::-1], text=[f'{v:+.2f}' for v in values[::-1]], textposition='outside',
+        increasing={'marker': {'color': POSITIVE_COLOR}}, decreasing={'marker': {'color': NEGATIVE_COLOR}},
+        connector={'line': {'color': '#bbbbbb', 'width': 1}},
+    ))
+    fig.update_layout(
+        title=title, height=60 + 32 * len(values), margin=dict(l=10, r=10, t=50, b=40), showlegend=False,
+        xaxis_title=f"E[f(X)] = {base:.3f}  →  f(x) = {base + float(np.sum(explanation.values)):.3f}",
+    )
+    return fig
+
+
+def bar_figure(explanation, max_display=10, title="Top Features Affecting Prediction"):
+    """Plotly equivalent of ``shap.plots.bar`` for a single explanation."""
+    import plotly.graph_objects as go
+
+    labels, values, n_rest, rest_sum = _top_features(explanation, max_display)
+    if n_rest:
+        labels.append(f'Sum of {n_rest} other features')
+        values = np.append(values, rest_sum)
+    fig = go.Figure(go.Bar(
+        orientation='h', y=labels[::-1], x=values[::-1], text=[f'{v:+.2f}' for v in values[::-1]],
+        textposition='outside', marker_color=[POSITIVE_COLOR if v > 0 else NEGATIVE_COLOR for v in values[::-1]],
+    ))
+    fig.update_layout(title=title, height=60 + 32 * len(values), margin=dict(l=10, r=10, t=50, b=40),
+                      xaxis_title="SHAP value (impact on model output)")
+    return fig
+
+
+def render_png(plot, explanation, figsize=(8, 5), **kwargs):
+    """Render a ``shap.plots`` function to PNG bytes and release the matplotlib figure."""
+    import matplotlib.pyplot as plt
+
+    with _render_lock:
+        fig = drawn = plt.figure(figsize=figsize)
+        try:
+            plot(explanation, show=False, **kwargs)
+            # shap draws on the current figure, which it may have replaced
+            drawn = plt.gcf()
+            buffer = io.BytesIO()
+            drawn.savefig(buffer, format='png', bbox_inches='tight')
+            return buffer.getvalue()
+        finally:
+            plt.close(fig)
+            if drawn is not fig:
+                plt.close(drawn)
+
+
+class ChartCache(LRUCache):
+    """LRU of rendered explanation charts keyed by ``(chart, explanation_key)``.
+
+    Holds Plotly figures or PNG bytes, so a profile seen before (in any session)
+    is shown without re-rendering.
+    """
+
+    def chart(self, name, explanation, render):
+        key = (name, explanation_key(explanation))
+        chart = self.get(key)
+        if chart is None:
+            chart = render(explanation)
+            self.put(key, chart)
+        return chart
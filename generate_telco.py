@@ -0,0 +1,190 @@
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from preprocessing import CATEGORY_LEVELS, ID_COLUMN, TARGET_COLUMN
+
+# Column order of WA_Fn-UseC_-Telco-Customer-Churn.csv
+COLUMNS = [
+    'customerID', 'gender', 'SeniorCitizen', 'Partner', 'Dependents', 'tenure', 'PhoneService',
+    'MultipleLines', 'InternetService', 'OnlineSecurity', 'OnlineBackup', 'DeviceProtection',
+    'TechSupport', 'StreamingTV', 'StreamingMovies', 'Contract', 'PaperlessBilling', 'PaymentMethod',
+    'MonthlyCharges', 'TotalCharges', 'Churn',
+]
+ADD_ONS = ['OnlineSecurity', 'OnlineBackup', 'DeviceProtection', 'TechSupport', 'StreamingTV', 'StreamingMovies']
+# Churn rate of the original dataset (1869 of 7043 customers)
+DEFAULT_CHURN_RATE = 0.265
+# Share of brand-new customers (tenure 0, blank TotalCharges): 11 of 7043 in the original
+NEW_CUSTOMER_RATE = 0.0016
+
+
+def _customer_ids(start, n):
+    # Same shape as the original IDs ('7590-VHVEG') and unique for up to 10,000 * 26**5 rows.
+    # Built as a byte matrix, one ASCII character per column, to avoid per-row string ops.
+    index = np.arange(start, start + n, dtype=np.int64)
+    chars = np.empty((n, 10), dtype=np.uint8)
+    digits = index % 10_000
+    for j in range(3, -1, -1):
+        chars[:, j] = ord('0') + digits % 10
+        digits //= 10
+    chars[:, 4] = ord('-')
+    rest = index // 10_000
+    for j in range(5, 10):
+        chars[:, j] = ord('A') + rest % 26
+        rest //= 26
+    return chars.view('S10').ravel().astype('U10')
+
+
+def _features(rng, n):
+    """Every column except the ID and churn, plus the churn log-odds without intercept."""
+    # Existing customers have at least one month; only NEW_CUSTOMER_RATE are brand new
+    tenure = np.minimum(1 + rng.exponential(30, n).astype(np.int64), 72)
+    tenure[rng.random(n) < NEW_CUSTOMER_RATE] = 0
+    senior = (rng.random(n) < 0.16).astype(np.int64)
+    partner = rng.random(n) < 0.48
+    dependents = rng.random(n) < np.where(partner, 0.5, 0.1)
+
+    # Longer-tenured customers are more likely to be on longer contracts
+    contract_score = tenure / 72 + rng.normal(0, 0.35, n)
+    contract = np.select([contract_score < 0.45, contract_score < 0.8], [0, 1], 2)
+
+    phone = rng.random(n) < 0.9
+    multiple = phone & (rng.random(n) < 0.47)
+    internet = rng.choice(3, n, p=[0.34, 0.44, 0.22])  # DSL, Fiber optic, No
+    has_internet = internet != 2
+    add_on_rates = {'OnlineSecurity': 0.37, 'OnlineBackup': 0.44, 'DeviceProtection': 0.44,
+                    'TechSupport': 0.37, 'StreamingTV': 0.49, 'StreamingMovies': 0.5}
+    add_ons = {col: has_internet & (rng.random(n) < rate) for col, rate in add_on_rates.items()}
+
+    # Monthly charges follow the services taken, plus some noise
+    monthly = (
+        20.0 * phone + 5.0 * multiple
+        + np.choose(internet, [25.0, 50.0, 0.0])
+        + sum(np.where(add_ons[col], 5.0 if col in ADD_ONS[:4] else 10.0, 0.0) for col in ADD_ONS)
+        + rng.normal(0, 2.5, n)
+    )
+    monthly = np.clip(monthly, 18.25, 118.75).round(2)
+    total = (monthly * tenure * rng.uniform(0.95, 1.05, n)).round(2)
+
+    payment = rng.choice(4, n, p=[0.22, 0.22, 0.34, 0.22])
+    paperless = rng.random(n) < 0.59
+
+    logit = (
+        -0.035 * tenure + np.choose(contract, [1.3, 0.0, -1.3]) + 0.8 * (internet == 1) - 0.6 * (internet == 2)
+        - 0.5 * add_ons['TechSupport'] - 0.5 * add_ons['OnlineSecurity'] + 0.5 * (payment == 2)
+        + 0.3 * paperless + 0.25 * senior - 0.15 * partner + 0.008 * (monthly - 65)
+    )
+
+    # Categoricals are built from integer codes into the sorted CATEGORY_LEVELS.
+    # Yes/No columns: code 0 is 'No', the last code is 'Yes' (code 1 is the
+    # 'No phone service' / 'No internet service' level where there is one).
+    def categorical(col, codes):
+        return pd.Categorical.from_codes(codes, CATEGORY_LEVELS[col])
+
+    def yes_no(col, flags, available=None):
+        codes = np.where(flags, len(CATEGORY_LEVELS[col]) - 1, 0)
+        if available is not None:
+            codes = np.where(available, codes, 1)
+        return categorical(col, codes)
+
+    data = {
+        'gender': categorical('gender', rng.integers(0, 2, n)),
+        'SeniorCitizen': senior,
+        'Partner': yes_no('Partner', partner),
+        'Dependents': yes_no('Dependents', dependents),
+        'tenure': tenure,
+        'PhoneService': yes_no('PhoneService', phone),
+        'MultipleLines': yes_no('MultipleLines', multiple, available=phone),
+        'InternetService': categorical('InternetService', internet),
+    }
+    for col in ADD_ONS:
+        data[col] = yes_no(col, add_ons[col], available=has_internet)
+    data.update({
+        'Contract': categorical('Contract', contract),
+        'PaperlessBilling': yes_no('PaperlessBilling', paperless),
+        'PaymentMethod': categorical('PaymentMethod', payment),
+        'MonthlyCharges': monthly,
+        # New customers have a blank TotalCharges, as in the original file (written via na_rep)
+        'TotalCharges': np.where(tenure == 0, np.nan, total),
+    })
+    return data, logit
+
+
+def calibrate_intercept(churn_rate=DEFAULT_CHURN_RATE, seed=0, n=200_000):
+    """Intercept that makes the expected churn rate ``churn_rate``, found by bisection on a sample."""
+    _, logit = _features(np.random.default_rng([seed, 2 ** 31]), n)
+    lo, hi = -10.0, 10.0
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        if (1 / (1 + np.exp(-(logit + mid)))).mean() < churn_rate:
+            lo = mid
+        else:
+            hi = mid
+    return (lo + hi) / 2
+
+
+def generate_chunk(n_rows, start, intercept, rng):
+    data, logit = _features(rng, n_rows)
+    churn = rng.random(n_rows) < 1 / (1 + np.exp(-(logit + intercept)))
+    data[ID_COLUMN] = _customer_ids(start, n_rows)
+    data[TARGET_COLUMN] = pd.Categorical.from_codes(churn.astype(np.int8), CATEGORY_LEVELS[TARGET_COLUMN])
+    return pd.DataFrame(data, columns=COLUMNS)
+
+
+def _chunk_csv(n_rows, start, intercept, seed, index):
+    chunk = generate_chunk(n_rows, start, intercept, np.random.default_rng([seed, index]))
+    return chunk.to_csv(header=(index == 0), index=False, na_rep=' ')
+
+
+def generate(path, n_rows, chunksize=1_000_000, seed=0, churn_rate=DEFAULT_CHURN_RATE, n_jobs=1):
+    """Write ``n_rows`` synthetic Telco customers to ``path`` in chunks; returns rows written.
+
+    Each chunk draws from its own random stream seeded by ``(seed, chunk number)``,
+    so the output is reproducible for a given seed and chunksize whatever ``n_jobs``.
+    Formatting CSV text is the slowest step, so with ``n_jobs > 1`` chunks are
+    generated and formatted in worker processes and written in order.
+    """
+    intercept = calibrate_intercept(churn_rate, seed)
+    tasks = [(min(chunksize, n_rows - start), start, intercept, seed, i)
+             for i, start in enumerate(range(0, n_rows, chunksize))]
+    with open(path, 'w', newline='') as f:
+        if n_jobs <= 1:
+            for task in tasks:
+                f.write(_chunk_csv(*task))
+            return n_rows
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            # Keep only a few chunks in flight so memory stays bounded
+            pending = deque()
+            for task in tasks:
+                pending.append(pool.submit(_chunk_csv, *task))
+                if len(pending) >= 2 * n_jobs:
+                    f.write(pending.popleft().result())
+            while pending:
+                f.write(pending.popleft().result())
+    return n_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic Telco churn CSV of any size.")
+    parser.add_argument('output', help="CSV to write")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--chunksize', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--churn-rate', type=float, default=DEFAULT_CHURN_RATE)
+    parser.add_argument('--jobs', type=int, default=1, help="Worker processes formatting chunks in parallel")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    n = generate(args.output, args.rows, args.chunksize, args.seed, args.churn_rate, args.jobs)
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {n:,} rows to {args.output} ({os.path.getsize(args.output) / 1e6:,.0f} MB) "
+          f"in {elapsed:.1f}s ({n / elapsed:,.0f} rows/sec)")
+
+
+if __name__ == '__main__':
+    main()
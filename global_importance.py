@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+
+from contributions import ContributionExplainer
+from model_artifacts import load_artifacts
+from whatif import model_digest
+
+IMPORTANCE_FILE = 'feature_importance.json'
+DEFAULT_SAMPLE_SIZE = 2000
+
+
+def compute_importance(model, X, sample_size=DEFAULT_SAMPLE_SIZE, seed=0):
+    """Mean |SHAP| per feature over a random sample of at most ``sample_size`` rows of ``X``, largest first."""
+    if len(X) > sample_size:
+        rows = np.sort(np.random.default_rng(seed).choice(len(X), sample_size, replace=False))
+        X = X.iloc[rows]
+    # XGBoost's own TreeSHAP: exact values without importing shap
+    values, _, _ = ContributionExplainer(model).contributions(X, 'native')
+    importance = np.abs(values).mean(axis=0)
+    order = np.argsort(-importance)
+    return {X.columns[i]: float(importance[i]) for i in order}, len(X)
+
+
+def save_importance(model, X, path=IMPORTANCE_FILE, model_dir='.', sample_size=DEFAULT_SAMPLE_SIZE, seed=0):
+    """Compute global importances and write them with the digest of the model in ``model_dir``."""
+    importance, n_rows = compute_importance(model, X, sample_size, seed)
+    write_importance(importance, n_rows, path, model_dir)
+    return importance
+
+
+def write_importance(importance, n_rows, path=IMPORTANCE_FILE, model_dir='.'):
+    """Write importances from ``compute_importance`` with the digest of the model saved in ``model_dir``."""
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'model_digest': model_digest(model_dir), 'n_rows': n_rows, 'importance': importance}, f, indent=2)
+    os.replace(tmp, path)
+
+
+def load_importance(path=IMPORTANCE_FILE, model_dir='.'):
+    """``{feature: mean |SHAP|}``, largest first, or None if missing or computed for a different model."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        saved = json.load(f)
+    if saved.get('model_digest') != model_digest(model_dir):
+        return None
+    return saved['importance']
+
+
+def main():
+    import pandas as pd
+
+    from preprocessing import ID_COLUMN
+
+    parser = argparse.ArgumentParser(description="Compute global mean-|SHAP| feature importances for the apps.")
+    parser.add_argument('--data', required=True, help="Training CSV to sample the background rows from")
+    parser.add_argument('--sample', type=int, default=DEFAULT_SAMPLE_SIZE)
+    parser.add_argument('--model-dir', default='.', help="Directory holding the model artifacts")
+    parser.add_argument('--output', default=IMPORTANCE_FILE)
+    args = parser.parse_args()
+
+    # Encode with the model's own preprocessor; the importances are stored under its digest
+    artifacts = load_artifacts(args.model_dir)
+    preprocessor = artifacts.preprocessor
+    X = pd.DataFrame(preprocessor.transform(pd.read_csv(args.data, dtype={ID_COLUMN: str})),
+                     columns=preprocessor.columns)
+    model = artifacts.model
+    start = time.perf_counter()
+    importance = save_importance(model, X, args.output, args.model_dir, args.sample)
+    print(f"Mean |SHAP| over {min(len(X), args.sample):,} rows in {time.perf_counter() - start:.2f}s:")
+    for feature, value in importance.items():
+        print(f"  {feature:<18} {value:.4f}")
+    print(f"Saved to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
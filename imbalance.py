@@ -0,0 +1,172 @@
+import argparse
+import multiprocessing
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_STRATEGY = 'smote'
+# Churners SMOTE's nearest-neighbour search is fitted on in the 'sampled_smote' strategy.
+SMOTE_SAMPLE_SIZE = 20_000
+
+
+def _smote(X, y, seed):
+    from imblearn.over_sampling import SMOTE
+    X_res, y_res = SMOTE(random_state=seed).fit_resample(_as_float(X), y)
+    return X_res, y_res, {}, {}
+
+
+def _sampled_smote(X, y, seed, sample_size=SMOTE_SAMPLE_SIZE):
+    """SMOTE whose neighbour search only sees a random sample of churners, appended to the full data.
+
+    The synthetic rows still fill the whole class gap, but the k-NN index is
+    built and queried over at most ``sample_size`` minority rows instead of all of them.
+    """
+    from imblearn.over_sampling import SMOTE
+
+    y = np.asarray(y)
+    positives = np.flatnonzero(y == 1)
+    deficit = len(y) - 2 * len(positives)
+    if len(positives) <= sample_size or deficit <= 0:
+        return _smote(X, y, seed)
+
+    # SMOTE only looks for neighbours among the minority class; a few majority
+    # rows are included because it expects both classes.
+    rng = np.random.default_rng(seed)
+    sample = np.concatenate([rng.choice(positives, sample_size, replace=False),
+                             rng.choice(np.flatnonzero(y == 0), sample_size, replace=False)])
+    smote = SMOTE(random_state=seed, sampling_strategy={1: sample_size + deficit})
+    X_res, _ = smote.fit_resample(_as_float(_take(X, sample)), y[sample])
+    synthetic = _take(X_res, np.arange(len(sample), len(X_res)))
+    X_out = pd.concat([_as_float(X), synthetic], ignore_index=True) if isinstance(X, pd.DataFrame) else np.vstack([X, synthetic])
+    return X_out, np.concatenate([y, np.ones(deficit, dtype=y.dtype)]), {}, {}
+
+
+def _undersample(X, y, seed):
+    from imblearn.under_sampling import RandomUnderSampler
+    X_res, y_res = RandomUnderSampler(random_state=seed).fit_resample(X, y)
+    return X_res, y_res, {}, {}
+
+
+def _scale_pos_weight(X, y, seed):
+    n_pos = int(np.sum(y))
+    return X, y, {}, {'scale_pos_weight': (len(y) - n_pos) / max(n_pos, 1)}
+
+
+def _instance_weights(X, y, seed):
+    y_arr = np.asarray(y)
+    n_pos = int(y_arr.sum())
+    weights = np.where(y_arr == 1, len(y_arr) / (2 * max(n_pos, 1)), len(y_arr) / (2 * max(len(y_arr) - n_pos, 1)))
+    return X, y, {'sample_weight': weights.astype(np.float32)}, {}
+
+
+def _none(X, y, seed):
+    return X, y, {}, {}
+
+
+STRATEGIES = {
+    'smote': _smote,
+    'sampled_smote': _sampled_smote,
+    'undersample': _undersample,
+    'scale_pos_weight': _scale_pos_weight,
+    'weights': _instance_weights,
+    'none': _none,
+}
+
+
+def apply_strategy(name, X, y, seed=42):
+    """Rebalance a training set with one of ``STRATEGIES``.
+
+    Returns ``(X, y, fit_kwargs, model_params)``: the (possibly resampled) data,
+    extra keyword arguments for ``fit`` (e.g. ``sample_weight``) and extra
+    ``XGBClassifier`` parameters (e.g. ``scale_pos_weight``).
+    """
+    if name not in STRATEGIES:
+        raise ValueError(f"Unknown imbalance strategy '{name}', expected one of {', '.join(STRATEGIES)}")
+    return STRATEGIES[name](X, y, seed)
+
+
+def _as_float(X):
+    # SMOTE interpolates between rows; compact int8 category codes would be
+    # truncated back to integers, so resample in float32 as before
+    if isinstance(X, pd.DataFrame) and (X.dtypes != np.float32).any():
+        return X.astype(np.float32)
+    return X
+
+
+def _take(X, rows):
+    return X.iloc[rows].reset_index(drop=True) if isinstance(X, pd.DataFrame) else X[rows]
+
+
+def _peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def evaluate_strategy(name, data_path, seed=42):
+    """Train the churn model with one strategy and report its cost and churn recall.
+
+    Meant to run in a fresh process so the peak RSS belongs to this strategy alone.
+    """
+    from sklearn.metrics import accuracy_score, recall_score, roc_auc_score
+    from sklearn.model_selection import train_test_split
+    from xgboost import XGBClassifier
+
+    from dataset_cache import load_training_data
+
+    X, y, _ = load_training_data(data_path)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed)
+    rss_before = _peak_rss_mb()
+
+    start = time.perf_counter()
+    X_fit, y_fit, fit_kwargs, params = apply_strategy(name, X_train, y_train, seed)
+    resample_s = time.perf_counter() - start
+    model = XGBClassifier(eval_metric='logloss', random_state=seed, **params)
+    model.fit(X_fit, y_fit, **fit_kwargs)
+    total_s = time.perf_counter() - start
+
+    y_prob = model.predict_proba(X_test)[:, 1]
+    y_pred = (y_prob > 0.5).astype(int)
+    return {
+        'strategy': name,
+        'fit_rows': len(y_fit),
+        'resample_s': resample_s,
+        'total_s': total_s,
+        'peak_rss_mb': _peak_rss_mb(),
+        'rss_growth_mb': _peak_rss_mb() - rss_before,
+        'recall': recall_score(y_test, y_pred),
+        'auc': roc_auc_score(y_test, y_prob),
+        'accuracy': accuracy_score(y_test, y_pred),
+    }
+
+
+def compare_strategies(data_path, strategies=tuple(STRATEGIES), seed=42):
+    results = []
+    for name in strategies:
+        # One short-lived process per strategy: ru_maxrss never goes down within a process
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as pool:
+            results.append(pool.submit(evaluate_strategy, name, data_path, seed).result())
+        r = results[-1]
+        print(f"{name}: {r['total_s']:.1f}s, peak {r['peak_rss_mb']:,.0f} MB, recall {r['recall']:.3f}")
+    return pd.DataFrame(results)
+
+
+def main():
+    from dataset_cache import DEFAULT_DATA_PATH
+
+    parser = argparse.ArgumentParser(description="Compare class-imbalance strategies for the churn model.")
+    parser.add_argument('--data', default=DEFAULT_DATA_PATH, help="Telco-format training CSV")
+    parser.add_argument('--strategies', nargs='+', choices=list(STRATEGIES), default=list(STRATEGIES))
+    parser.add_argument('--output', default='imbalance_report.csv')
+    args = parser.parse_args()
+
+    report = compare_strategies(args.data, args.strategies)
+    report.to_csv(args.output, index=False)
+    print(f"\nReport written to {args.output}")
+    print(report.to_string(index=False, float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+import argparse
+import datetime
+import json
+import os
+import subprocess
+import sys
+import threading
+
+from preprocessing import Preprocessor
+
+MANIFEST_FILE = 'model_manifest.json'
+BOOSTER_FILE = 'churn_model.ubj'
+PICKLE_FILE = 'churn_model.pkl'
+COLUMNS_FILE = 'model_columns.pkl'
+PREPROCESSOR_FILE = 'preprocessor.json'
+FORMAT_VERSION = 1
+# Tree-training parameters recorded under training['params']. The native model file
+# does not keep them, and update_model.py needs them to refresh or extend a model
+TRAINING_PARAMS = ('learning_rate', 'max_depth', 'min_child_weight', 'gamma', 'reg_lambda', 'reg_alpha',
+                   'max_delta_step', 'subsample', 'colsample_bytree', 'scale_pos_weight')
+
+
+class ModelArtifacts:
+    """The churn model plus everything needed to feed it, loaded from a model directory.
+
+    The manifest (feature names, encoders, training metadata) is plain JSON and
+    read eagerly; the booster is only deserialised on first access to ``model``.
+    Directories without a manifest fall back to the legacy joblib pickles.
+    """
+
+    def __init__(self, directory='.'):
+        self.directory = directory
+        self._model = None
+        self._model_lock = threading.Lock()
+        manifest_path = os.path.join(directory, MANIFEST_FILE)
+        if os.path.exists(manifest_path):
+            with open(manifest_path) as f:
+                self.manifest = json.load(f)
+            if self.manifest.get('format_version') != FORMAT_VERSION:
+                raise ValueError(f"Unsupported manifest version {self.manifest.get('format_version')}")
+            self.columns = list(self.manifest['feature_names'])
+            self.preprocessor = Preprocessor.from_dict(self.manifest['preprocessor'])
+        else:
+            import joblib
+            from preprocessing import load_preprocessor
+
+            self.manifest = None
+            self.columns = list(joblib.load(os.path.join(directory, COLUMNS_FILE)))
+            self.preprocessor = load_preprocessor(os.path.join(directory, PREPROCESSOR_FILE), self.columns)
+
+    @property
+    def is_native(self):
+        return self.manifest is not None
+
+    @property
+    def model(self):
+        # Locked so a background warm-up and the first request never load it twice.
+        with self._model_lock:
+            if self._model is None:
+                self._model = self._load_model()
+            return self._model
+
+    def _load_model(self):
+        if not self.is_native:
+            import joblib
+            return joblib.load(os.path.join(self.directory, PICKLE_FILE))
+
+        from xgboost import XGBClassifier
+        model = XGBClassifier()
+        model.load_model(os.path.join(self.directory, self.manifest['model_file']))
+        return model
+
+    @property
+    def training(self):
+        return self.manifest.get('training', {}) if self.is_native else {}
+
+
+def load_artifacts(directory='.'):
+    return ModelArtifacts(directory)
+
+
+def save_artifacts(model, preprocessor, directory='.', training=None):
+    """Write ``model`` as native XGBoost UBJSON plus a JSON manifest.
+
+    ``training`` is free-form metadata (metrics, row counts, params) recorded
+    alongside the feature names and encoders.
+    """
+    import xgboost
+
+    os.makedirs(directory, exist_ok=True)
+    model.save_model(os.path.join(directory, BOOSTER_FILE))
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'model_file': BOOSTER_FILE,
+        'feature_names': list(preprocessor.columns),
+        'preprocessor': preprocessor.to_dict(),
+        'training': {
+            'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'xgboost_version': xgboost.__version__,
+            **(training or {}),
+        },
+    }
+    # Write the manifest last and atomically: it is what marks the directory as loadable.
+    tmp = os.path.join(directory, MANIFEST_FILE + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(directory, MANIFEST_FILE))
+
+
+def training_params(model):
+    """Effective ``TRAINING_PARAMS`` (XGBoost defaults included) and tree count of a fitted model.
+
+    Only meaningful for a model fitted in this process or unpickled: a model
+    loaded from the native format reports XGBoost's defaults instead.
+    """
+    learner = json.loads(model.get_booster().save_config())['learner']
+    tree_params = learner['gradient_booster']['tree_train_param']
+    tree_params['scale_pos_weight'] = learner['objective'].get('reg_loss_param', {}).get('scale_pos_weight', '1')
+    params = {name: float(f"{float(tree_params[name]):.6g}") for name in TRAINING_PARAMS}
+    params['max_depth'] = int(params['max_depth'])
+    params['n_estimators'] = model.get_booster().num_boosted_rounds()
+    return params
+
+
+def convert_pickles(directory='.'):
+    """Export the legacy churn_model.pkl / model_columns.pkl pair to the native format."""
+    import joblib
+    from preprocessing import load_preprocessor
+
+    model = joblib.load(os.path.join(directory, PICKLE_FILE))
+    columns = list(joblib.load(os.path.join(directory, COLUMNS_FILE)))
+    preprocessor = load_preprocessor(os.path.join(directory, PREPROCESSOR_FILE), columns)
+    # The pickle keeps the training configuration; record it before it is lost
+    save_artifacts(model, preprocessor, directory, training={'converted_from': PICKLE_FILE,
+                                                             'params': training_params(model)})
+
+
+_PICKLE_STARTUP = (
+    "import joblib, xgboost",
+    "model = joblib.load({pickle!r}); columns = joblib.load({columns!r})\n"
+    "model.predict_proba([[0.0] * len(columns)])",
+)
+
+_NATIVE_STARTUP = (
+    "import xgboost; from model_artifacts import load_artifacts",
+    "artifacts = load_artifacts({directory!r})\n"
+    "artifacts.model.predict_proba([[0.0] * len(artifacts.columns)])",
+)
+
+_TIMER = """
+import time
+_t0 = time.perf_counter()
+{imports}
+_t1 = time.perf_counter()
+{load}
+print(_t1 - _t0, time.perf_counter() - _t1)
+"""
+
+
+def compare_startup(directory='.', repeats=5):
+    """Cold start in a fresh interpreter for pickles vs native artifacts.
+
+    Returns ``{format: (import_seconds, load_seconds)}``, best of ``repeats``;
+    load covers reading the artifacts and the first prediction.
+    """
+    here = os.path.dirname(os.path.abspath(__file__))
+    paths = {'pickle': os.path.join(directory, PICKLE_FILE), 'columns': os.path.join(directory, COLUMNS_FILE),
+             'directory': directory}
+    results = {}
+    for name, (imports, load) in (('pickle', _PICKLE_STARTUP), ('native', _NATIVE_STARTUP)):
+        runs = []
+        for _ in range(repeats):
+            script = _TIMER.format(imports=imports, load=load.format(**paths))
+            out = subprocess.run([sys.executable, '-W', 'ignore', '-c', script],
+                                 cwd=here, capture_output=True, text=True, check=True)
+            runs.append(tuple(float(v) for v in out.stdout.split()[-2:]))
+        results[name] = (min(r[0] for r in runs), min(r[1] for r in runs))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert and benchmark churn model artifacts.")
+    parser.add_argument('command', choices=['convert', 'compare'])
+    parser.add_argument('--dir', default='.', help="Model directory")
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == 'convert':
+        convert_pickles(args.dir)
+        print(f"Wrote {BOOSTER_FILE} and {MANIFEST_FILE} to {args.dir}")
+    else:
+        results = compare_startup(args.dir, args.repeats)
+        print(f"{'format':>7} {'imports ms':>11} {'load ms':>9}   (load = read artifacts + first prediction, "
+              f"best of {args.repeats})")
+        for name, (import_s, load_s) in results.items():
+            print(f"{name:>7} {import_s * 1e3:11.1f} {load_s * 1e3:9.1f}")
+        print(f"load speedup: {results['pickle'][1] / results['native'][1]:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+import argparse
+import os
+import re
+import shutil
+import threading
+import time
+import warnings
+
+from model_artifacts import MANIFEST_FILE, load_artifacts
+
+DEFAULT_REGISTRY_DIR = os.environ.get('CHURNSHIELD_REGISTRY', 'models')
+ACTIVE_FILE = 'ACTIVE'
+# Published alongside the model when present in the source directory
+EXTRA_FILES = ('feature_importance.json', 'drift_baseline.json', 'whatif_surface.npz')
+CHECK_INTERVAL = float(os.environ.get('CHURNSHIELD_RELOAD_INTERVAL', 5.0))
+_VERSION = re.compile(r'^v(\d+)$')
+
+
+class ModelRegistry:
+    """Directory of immutable, numbered model versions plus an ``ACTIVE`` pointer.
+
+    Each version (``v0001``, ``v0002``...) is a model directory as written by
+    ``save_artifacts``. ``ACTIVE`` holds the name of the version the apps
+    serve; it is replaced atomically, so readers see either the old or the
+    new version, never a partial one.
+    """
+
+    def __init__(self, root=DEFAULT_REGISTRY_DIR):
+        self.root = root
+
+    def versions(self):
+        names = [name for name in os.listdir(self.root) if _VERSION.match(name)] if os.path.isdir(self.root) else []
+        return sorted(names, key=lambda name: int(_VERSION.match(name).group(1)))
+
+    def path(self, version):
+        return os.path.join(self.root, version)
+
+    def active_version(self):
+        """Name of the active version, or None if nothing has been activated."""
+        try:
+            with open(os.path.join(self.root, ACTIVE_FILE)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def publish(self, source_dir='.', activate=False):
+        """Copy the model in ``source_dir`` into a new version; returns its name."""
+        manifest_path = os.path.join(source_dir, MANIFEST_FILE)
+        if not os.path.exists(manifest_path):
+            raise FileNotFoundError(f"{manifest_path} not found; only native model directories can be published "
+                                    "(convert pickles with model_artifacts.py first)")
+        artifacts = load_artifacts(source_dir)
+        os.makedirs(self.root, exist_ok=True)
+        existing = self.versions()
+        version = f'v{int(_VERSION.match(existing[-1]).group(1)) + 1 if existing else 1:04d}'
+
+        tmp = os.path.join(self.root, f'.{version}.{os.getpid()}.tmp')
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        # Manifest last, as in save_artifacts: it is what marks the directory as loadable
+        for name in (artifacts.manifest['model_file'],) + EXTRA_FILES + (MANIFEST_FILE,):
+            if os.path.exists(os.path.join(source_dir, name)):
+                shutil.copy2(os.path.join(source_dir, name), os.path.join(tmp, name))
+        os.rename(tmp, self.path(version))
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version '{version}', expected one of {', '.join(self.versions())}")
+        # Load it once so a broken version is never made active
+        load_artifacts(self.path(version)).model
+        tmp = os.path.join(self.root, f'{ACTIVE_FILE}.{os.getpid()}.tmp')
+        with open(tmp, 'w') as f:
+            f.write(version + '\n')
+        os.replace(tmp, os.path.join(self.root, ACTIVE_FILE))
+
+
+class ActiveModel:
+    """The registry's active model, swapped in when the ``ACTIVE`` pointer changes.
+
+    ``current()`` stats the pointer at most once per ``check_interval``
+    seconds. A new version is fully loaded (booster included) before the
+    reference is swapped, so callers get either the old or the new artifacts and
+    never wait on a half-loaded model; a version that fails to load is skipped
+    and the current one kept. Without a registry the local artifacts in
+    ``fallback_dir`` are served as version ``'local'``. Use ``snapshot()`` when
+    the version keys a cache of the artifacts.
+    """
+
+    def __init__(self, root=DEFAULT_REGISTRY_DIR, check_interval=CHECK_INTERVAL, fallback_dir='.'):
+        self.registry = ModelRegistry(root)
+        self.check_interval = check_interval
+        self.fallback_dir = fallback_dir
+        self._pointer = None
+        self._last_check = float('-inf')
+        self._lock = threading.Lock()
+        self._current = ('local', None)
+        self._check()
+
+    @property
+    def version(self):
+        return self._current[0]
+
+    def current(self):
+        """Artifacts of the active version (checking for a newer one if the interval has passed)."""
+        return self.snapshot()[1]
+
+    def snapshot(self):
+        """``(version, artifacts)`` of the active version, read together so a swap can't pair one with the other."""
+        if time.monotonic() - self._last_check >= self.check_interval:
+            self._check()
+        return self._current
+
+    def _check(self):
+        # One session checks and loads; the others keep serving the current model meanwhile
+        if not self._lock.acquire(blocking=self._current[1] is None):
+            return
+        try:
+            self._last_check = time.monotonic()
+            pointer = self._stat_pointer()
+            if pointer == self._pointer and self._current[1] is not None:
+                return
+            version = self.registry.active_version() if pointer is not None else None
+            if version is None:
+                if self._current[1] is None:
+                    self._current = ('local', load_artifacts(self.fallback_dir))
+                self._pointer = pointer
+                return
+            if version == self.version:
+                self._pointer = pointer
+                return
+            try:
+                artifacts = load_artifacts(self.registry.path(version))
+                artifacts.model  # deserialise before the swap
+            except Exception as exc:
+                warnings.warn(f"Could not load model version '{version}', keeping '{self.version}': {exc}")
+                if self._current[1] is None:
+                    self._current = ('local', load_artifacts(self.fallback_dir))
+            else:
+                self._current = (version, artifacts)
+            self._pointer = pointer
+        finally:
+            self._lock.release()
+
+    def _stat_pointer(self):
+        try:
+            st = os.stat(os.path.join(self.registry.root, ACTIVE_FILE))
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Publish, activate and list versioned models.")
+    parser.add_argument('--registry', default=DEFAULT_REGISTRY_DIR, help="Registry directory")
+    sub = parser.add_subparsers(dest='command', required=True)
+    publish = sub.add_parser('publish', help="Copy a model directory into a new version")
+    publish.add_argument('--model-dir', default='.', help="Directory holding the model artifacts to publish")
+    publish.add_argument('--activate', action='store_true', help="Make the new version active")
+    activate = sub.add_parser('activate', help="Point the apps at a version (also used to roll back)")
+    activate.add_argument('version')
+    sub.add_parser('list', help="List versions")
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.registry)
+    if args.command == 'publish':
+        version = registry.publish(args.model_dir, activate=args.activate)
+        print(f"Published {args.model_dir} as {version}" + (" (active)" if args.activate else ""))
+    elif args.command == 'activate':
+        registry.activate(args.version)
+        print(f"Active model is now {args.version}")
+    else:
+        active = registry.active_version()
+        for version in registry.versions():
+            training = load_artifacts(registry.path(version)).training
+            details = ', '.join(f"{k}={training[k]}" for k in ('created_at', 'accuracy', 'auc', 'method')
+                                if k in training)
+            print(f"{'*' if version == active else ' '} {version}  {details}")
+
+
+if __name__ == '__main__':
+    main()
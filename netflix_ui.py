@@ -1,10 +1,13 @@
+import os
+import time
 import streamlit as st
 import pandas as pd
-import joblib
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from streamlit_extras.metric_cards import style_metric_cards
+from app_metrics import StageMetrics, show_debug_panel
+from global_importance import IMPORTANCE_FILE, load_importance
+from model_registry import ActiveModel
+from startup import warm_up
+from whatif import SURFACE_FILE, load_surface
 
 # Netflix-style theme
 st.set_page_config(
@@ -13,6 +16,7 @@ st.set_page_config(
     layout="wide",
     initial_sidebar_state="collapsed"
 )
+rerun_start = time.perf_counter()
 
 # Netflix-inspired CSS
 st.markdown("""
@@ -135,14 +139,87 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# Load the model
+# Load the active model
 @st.cache_resource
-def load_model():
-    model = joblib.load('churn_model.pkl')
-    model_columns = joblib.load('model_columns.pkl')
-    return model, model_columns
+def load_active_model():
+    # Active version of the model registry (model_registry.py), or the local
+    # artifacts when there is none. Each rerun gets the current version; a newly
+    # activated one is picked up and swapped in without restarting the app
+    return ActiveModel()
 
-model, model_columns = load_model()
+@st.cache_resource
+def start_warm_up(_artifacts):
+    # Once per process: load the model in the background after the first
+    # render, so the first analysis finds it ready
+    return warm_up(lambda: _artifacts.model, 'plotly.graph_objects')
+
+@st.cache_resource
+def load_metrics():
+    # Per-stage timings shared by all sessions of this process
+    return StageMetrics('netflix_ui')
+
+@st.cache_resource(max_entries=2)
+def load_whatif_surface(model_dir):
+    # Churn risk precomputed over every input combination by whatif.py, if present
+    # Published with the model into its registry version, so it is checked against that model
+    surface = load_surface(os.path.join(model_dir, SURFACE_FILE), model_dir)
+    if surface is None:
+        raise LookupError(f"no what-if surface for the model in {model_dir}")
+    return surface
+
+@st.cache_resource(max_entries=2)
+def load_global_importance(model_dir):
+    # Mean |SHAP| per feature over a training sample, written by global_importance.py
+    # (or training) for the current model
+    importance = load_importance(os.path.join(model_dir, IMPORTANCE_FILE), model_dir)
+    if importance is None:
+        raise LookupError(f"no feature importance file for the model in {model_dir}")
+    return importance
+
+@st.cache_resource(max_entries=2)
+def fallback_importance(version, _artifacts):
+    # Without a saved file, the booster's total gain per feature (no SHAP cost)
+    scores = _artifacts.model.get_booster().get_score(importance_type='total_gain')
+    return dict(sorted(scores.items(), key=lambda item: -item[1]))
+
+# Display name and one-line reading of each model feature for the Key Factors panel
+FEATURE_LABELS = {
+    'Contract': ("Contract Length", "Longer contracts reduce churn"),
+    'tenure': ("Tenure", "Loyal customers are less likely to leave"),
+    'TechSupport': ("Tech Support", "Customers with support churn less"),
+    'MonthlyCharges': ("Monthly Charges", "Higher charges may increase churn"),
+    'OnlineSecurity': ("Online Security", "Security features reduce churn"),
+    'TotalCharges': ("Total Charges", "Lifetime spend, closely tied to tenure"),
+    'InternetService': ("Internet Service", "Fiber optic customers churn more often"),
+    'PaymentMethod': ("Payment Method", "Electronic check payers churn more often"),
+    'PaperlessBilling': ("Paperless Billing", "Paperless billing is linked to higher churn"),
+    'OnlineBackup': ("Online Backup", "Add-on services increase stickiness"),
+    'DeviceProtection': ("Device Protection", "Add-on services increase stickiness"),
+    'StreamingTV': ("Streaming TV", "Streaming add-ons change engagement"),
+    'StreamingMovies': ("Streaming Movies", "Streaming add-ons change engagement"),
+    'SeniorCitizen': ("Senior Citizen", "Seniors churn somewhat more often"),
+    'Partner': ("Partner", "Customers with partners churn less"),
+    'Dependents': ("Dependents", "Customers with dependents churn less"),
+    'MultipleLines': ("Multiple Lines", "Multiple lines indicate a deeper relationship"),
+    'PhoneService': ("Phone Service", "Phone service has little effect on its own"),
+    'gender': ("Gender", "Gender has little effect on churn"),
+}
+
+def load_if_present(loader, *args):
+    # The loaders above raise LookupError when their file is missing or stale.
+    # Exceptions are not cached, so a file written after startup is picked up on a later rerun
+    try:
+        return loader(*args)
+    except LookupError:
+        return None
+
+metrics = load_metrics()
+active = load_active_model()
+# Version and artifacts from one read, so a hot swap in between cannot pair them wrongly
+version, artifacts = active.snapshot()
+preprocessor = artifacts.preprocessor
+surface = load_if_present(load_whatif_surface, artifacts.directory)
+global_importance = load_if_present(load_global_importance, artifacts.directory)
 
 # Netflix-style header
 st.markdown("""
@@ -229,21 +306,20 @@ input_data = {
     'InternetService': fiber_optic
 }
 
-input_df = pd.DataFrame(input_data, index=[0])
-
-# Align input with model training columns
-for col in model_columns:
-    if col not in input_df.columns:
-        input_df[col] = 0 
-input_df = input_df[model_columns]
+# Align input with model training columns (features not asked for are 0)
+with metrics.span('align'):
+    input_df = pd.DataFrame(preprocessor.align(input_data), columns=preprocessor.columns)
 
 with col2:
     st.markdown("<div class='card' style='min-height: 80vh;'>", unsafe_allow_html=True)
     
     if analyze_btn or 'calculated' in st.session_state:
-        # Make prediction
-        prediction_prob = model.predict_proba(input_df)
-        churn_risk = prediction_prob[0][1]
+        # Make prediction (precomputed surface when the inputs are on its grid, otherwise the model)
+        with metrics.span('predict'):
+            churn_risk = surface.risk_for(input_data) if surface is not None else None
+            if churn_risk is None:
+                prediction_prob = artifacts.model.predict_proba(input_df)
+                churn_risk = prediction_prob[0][1]
         
         # Save to session state
         st.session_state['churn_risk'] = churn_risk
@@ -275,42 +351,58 @@ with col2:
         </div>
         """, unsafe_allow_html=True)
         
-        # Gauge chart
-        fig = go.Figure(go.Indicator(
-            mode = "gauge+number+delta",
-            value = churn_risk * 100,
-            domain = {'x': [0, 1], 'y': [0, 1]},
-            title = {'text': "Churn Risk Score", 'font': {'size': 18, 'color': 'white'}},
-            gauge = {
-                'axis': {'range': [0, 100], 'tickwidth': 1, 'tickcolor': "white"},
-                'bar': {'color': risk_color},
-                'bgcolor': "#1a1a1a",
-                'borderwidth': 2,
-                'bordercolor': "#333",
-                'steps': [
-                    {'range': [0, 40], 'color': "#4CAF50"},
-                    {'range': [40, 70], 'color': "#FFC107"},
-                    {'range': [70, 100], 'color': "#e50914"}
-                ],
-                'threshold': {
-                    'line': {'color': "white", 'width': 3},
-                    'thickness': 0.75,
-                    'value': churn_risk * 100
-                }
-            },
-            number = {'font': {'size': 28, 'color': 'white'}},
-            delta = {'reference': 50, 'increasing': {'color': "#e50914"}, 'decreasing': {'color': "#4CAF50"}}
-        ))
+        # Gauge chart (Plotly is imported on first use to keep startup fast)
+        with metrics.span('plotly'):
+            import plotly.graph_objects as go
+            fig = go.Figure(go.Indicator(
+                mode = "gauge+number+delta",
+                value = churn_risk * 100,
+                domain = {'x': [0, 1], 'y': [0, 1]},
+                title = {'text': "Churn Risk Score", 'font': {'size': 18, 'color': 'white'}},
+                gauge = {
+                    'axis': {'range': [0, 100], 'tickwidth': 1, 'tickcolor': "white"},
+                    'bar': {'color': risk_color},
+                    'bgcolor': "#1a1a1a",
+                    'borderwidth': 2,
+                    'bordercolor': "#333",
+                    'steps': [
+                        {'range': [0, 40], 'color': "#4CAF50"},
+                        {'range': [40, 70], 'color': "#FFC107"},
+                        {'range': [70, 100], 'color': "#e50914"}
+                    ],
+                    'threshold': {
+                        'line': {'color': "white", 'width': 3},
+                        'thickness': 0.75,
+                        'value': churn_risk * 100
+                    }
+                },
+                number = {'font': {'size': 28, 'color': 'white'}},
+                delta = {'reference': 50, 'increasing': {'color': "#e50914"}, 'decreasing': {'color': "#4CAF50"}}
+            ))
         
-        fig.update_layout(
-            height=300,
-            margin=dict(l=20, r=20, t=60, b=10),
-            paper_bgcolor='rgba(0,0,0,0)',
-            font={'color': "white", 'family': "Arial"},
-            plot_bgcolor='rgba(0,0,0,0)'
-        )
+            fig.update_layout(
+                height=300,
+                margin=dict(l=20, r=20, t=60, b=10),
+                paper_bgcolor='rgba(0,0,0,0)',
+                font={'color': "white", 'family': "Arial"},
+                plot_bgcolor='rgba(0,0,0,0)'
+            )
         
-        st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(fig, use_container_width=True)
+
+        # What-if: how the risk would move with tenure, everything else unchanged
+        if surface is not None:
+            with metrics.span('plotly'):
+                curve = surface.tenure_curve_for(input_data)
+                fig = go.Figure(go.Scatter(x=np.arange(len(curve)), y=curve * 100, mode='lines', line={'color': risk_color}))
+                fig.add_vline(x=tenure, line_dash='dash', line_color='white')
+                fig.update_layout(
+                    title={'text': "Churn Risk vs Tenure", 'font': {'size': 16, 'color': 'white'}},
+                    xaxis_title="Tenure (Months)", yaxis_title="Churn Risk (%)", yaxis_range=[0, 100],
+                    height=250, margin=dict(l=20, r=20, t=50, b=10),
+                    paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font={'color': "white"}
+                )
+                st.plotly_chart(fig, use_container_width=True)
         
         # Recommendations
         st.markdown("### 🎯 Recommended Actions")
@@ -355,16 +447,13 @@ with col2:
         # Feature importance
         st.markdown("### 🔍 Key Factors")
         
-        # Mock feature importance (replace with actual SHAP values)
-        features = [
-            ("Contract Length", 0.32, "Longer contracts reduce churn"),
-            ("Tenure", 0.28, "Loyal customers are less likely to leave"),
-            ("Tech Support", 0.18, "Customers with support churn less"),
-            ("Monthly Charges", 0.12, "Higher charges may increase churn"),
-            ("Online Security", 0.10, "Security features reduce churn")
-        ]
+        # Global mean |SHAP| importances, precomputed once per model; shown as a share of the total
+        importance = global_importance if global_importance is not None else fallback_importance(version, artifacts)
+        total = sum(importance.values()) or 1.0
+        features = [(*FEATURE_LABELS.get(name, (name, "")), value / total)
+                    for name, value in list(importance.items())[:5]]
         
-        for feature, value, desc in features:
+        for feature, desc, value in features:
             st.markdown(f"""
             <div style="margin-bottom: 15px;">
                 <div style="display: flex; justify-content: space-between; margin-bottom: 5px;">
@@ -377,6 +466,8 @@ with col2:
                 <div style="color: var(--netflix-gray); font-size: 0.85em; margin-top: 3px;">{desc}</div>
             </div>
             """, unsafe_allow_html=True)
+        if global_importance is None:
+            st.caption("Model gain importances. Run global_importance.py for mean |SHAP| over the training data.")
         
     else:
         st.markdown("""
@@ -402,3 +493,10 @@ st.markdown("""
     </div>
 </div>
 """, unsafe_allow_html=True)
+
+start_warm_up(artifacts)
+
+# Whole-rerun time, then publish the timings (debug panel / Prometheus text file)
+metrics.record('rerun', time.perf_counter() - rerun_start)
+metrics.write()
+show_debug_panel(st, metrics)
@@ -0,0 +1,281 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from model_artifacts import load_artifacts
+from preprocessing import ID_COLUMN
+
+DEFAULT_PORTFOLIO_DIR = os.environ.get('CHURNSHIELD_PORTFOLIO', 'portfolio')
+# Categorical columns the dashboard breaks down by, plus the derived tenure band
+CATEGORY_SEGMENTS = ('Contract', 'InternetService', 'PaymentMethod')
+SEGMENTS = ('Contract', 'InternetService', 'tenure_band', 'PaymentMethod')
+TENURE_EDGES = (13, 25, 49)
+TENURE_BANDS = ['0-12 months', '13-24 months', '25-48 months', '49+ months']
+# Churn probability histogram bins (5 points wide)
+N_BINS = 20
+OTHER = 'Other'
+_COLUMNS = SEGMENTS + ('churn_probability', 'MonthlyCharges')
+_STATS = ('customers', 'expected_churners', 'monthly_revenue', 'revenue_at_risk', 'high_risk')
+
+
+def segment_levels(preprocessor):
+    """Label of every code of each segment column; unseen categories get a trailing 'Other' code."""
+    levels = {col: list(preprocessor.category_levels[col]) + [OTHER] for col in CATEGORY_SEGMENTS}
+    levels['tenure_band'] = list(TENURE_BANDS)
+    return levels
+
+
+def levels_key(levels):
+    """Short digest of the segment levels a partition's codes index into."""
+    return hashlib.sha256(json.dumps(levels, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def score_partition(chunk, model, preprocessor):
+    """Columnar scored partition: int8 segment codes plus float32 probability and monthly charges."""
+    X = preprocessor.transform(chunk)
+    columns = {}
+    for col in CATEGORY_SEGMENTS:
+        codes = X[:, preprocessor.columns.index(col)]
+        columns[col] = np.where(np.isnan(codes), len(preprocessor.category_levels[col]), codes).astype(np.int8)
+    tenure = X[:, preprocessor.columns.index('tenure')]
+    columns['tenure_band'] = np.digitize(np.nan_to_num(tenure), TENURE_EDGES).astype(np.int8)
+    columns['churn_probability'] = model.predict_proba(X)[:, 1].astype(np.float32)
+    columns['MonthlyCharges'] = np.nan_to_num(X[:, preprocessor.columns.index('MonthlyCharges')])
+    return columns
+
+
+def build_portfolio(input_paths, store_dir=DEFAULT_PORTFOLIO_DIR, model_dir='.', chunksize=200_000):
+    """Score each input CSV into fixed-size partitions under ``store_dir``.
+
+    A partition is named ``<file stem>-<chunk number>`` and only rescored and
+    rewritten when its raw rows or the model changed, so the dashboard's cached
+    aggregates for untouched partitions stay valid. Partitions that no longer
+    exist in the inputs are removed. Returns ``(n_written, n_unchanged)``.
+    """
+    from whatif import model_digest
+
+    artifacts = load_artifacts(model_dir)
+    model_hash = model_digest(model_dir)
+    levels = segment_levels(artifacts.preprocessor)
+    key = levels_key(levels)
+    os.makedirs(store_dir, exist_ok=True)
+    meta_path = os.path.join(store_dir, 'meta.json')
+    tmp = f'{meta_path}.{os.getpid()}.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'levels': levels, 'n_bins': N_BINS}, f, indent=2)
+    os.replace(tmp, meta_path)
+
+    seen, written, unchanged = set(), 0, 0
+    for path in input_paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        for i, chunk in enumerate(pd.read_csv(path, chunksize=chunksize, dtype={ID_COLUMN: str})):
+            name = f'{stem}-{i:05d}'
+            seen.add(name)
+            source = f'{model_hash}:{int(pd.util.hash_pandas_object(chunk, index=False).sum()):x}'
+            part_dir = os.path.join(store_dir, name)
+            meta = _read_meta(part_dir)
+            if meta.get('source') == source and meta.get('levels') == key:
+                unchanged += 1
+                continue
+            _write_partition(part_dir, score_partition(chunk, artifacts.model, artifacts.preprocessor), source, key)
+            written += 1
+
+    for name in set(list_partitions(store_dir)) - seen:
+        shutil.rmtree(os.path.join(store_dir, name))
+    return written, unchanged
+
+
+def _read_meta(part_dir):
+    try:
+        with open(os.path.join(part_dir, 'meta.json')) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_partition(part_dir, columns, source, levels):
+    # Write into a sibling directory and swap it in, so readers never see half a partition
+    tmp = f'{part_dir}.{os.getpid()}.tmp'
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for col in _COLUMNS:
+        np.save(os.path.join(tmp, f'{col}.npy'), columns[col])
+    # The version changes on every rewrite; cached aggregates are keyed by it
+    version = f'{source}:{time.time_ns()}'
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump({'source': source, 'version': version, 'levels': levels,
+                   'n_rows': len(columns['churn_probability'])}, f)
+    shutil.rmtree(part_dir, ignore_errors=True)
+    os.replace(tmp, part_dir)
+
+
+def list_partitions(store_dir):
+    return sorted(name for name in os.listdir(store_dir)
+                  if not name.endswith('.tmp') and os.path.exists(os.path.join(store_dir, name, 'meta.json')))
+
+
+def partition_aggregates(part_dir, levels):
+    """Per-segment sums for one partition, from a single ``np.bincount`` pass per statistic.
+
+    For every segment: customer count, summed probability (expected churners),
+    summed monthly charges, summed revenue at risk (charges x probability),
+    high-risk count and a ``(n_levels, N_BINS)`` probability histogram.
+    """
+    probability = np.load(os.path.join(part_dir, 'churn_probability.npy'))
+    charges = np.load(os.path.join(part_dir, 'MonthlyCharges.npy'))
+    bins = np.minimum((probability * N_BINS).astype(np.intp), N_BINS - 1)
+    at_risk = charges * probability
+    high = (probability > 0.7).astype(np.float64)
+    aggregates = {}
+    for segment in SEGMENTS:
+        codes = np.load(os.path.join(part_dir, f'{segment}.npy')).astype(np.intp)
+        n = len(levels[segment])
+        aggregates[segment] = {
+            'customers': np.bincount(codes, minlength=n),
+            'expected_churners': np.bincount(codes, probability, minlength=n),
+            'monthly_revenue': np.bincount(codes, charges, minlength=n),
+            'revenue_at_risk': np.bincount(codes, at_risk, minlength=n),
+            'high_risk': np.bincount(codes, high, minlength=n),
+            'histogram': np.bincount(codes * N_BINS + bins, minlength=n * N_BINS).reshape(n, N_BINS),
+        }
+    return aggregates
+
+
+class Portfolio:
+    """Segment aggregates over a scored portfolio directory written by :func:`build_portfolio`.
+
+    Per-partition aggregates are cached in memory keyed by the partition's
+    version; :meth:`refresh` re-reads only partitions that were added or
+    rewritten since the last call and drops removed ones, then sums the cached
+    partials. The segment levels are re-read on every refresh: when a rebuild
+    with a new model changes them, every cached partial is dropped, and
+    partitions still coded against other levels are skipped until rescored.
+    Safe to share across Streamlit sessions via ``st.cache_resource``.
+    """
+
+    def __init__(self, store_dir=DEFAULT_PORTFOLIO_DIR):
+        self.store_dir = store_dir
+        self.levels = self._read_levels()
+        self._partials = {}
+        self._totals = None
+        self.last_refresh = {'recomputed': 0, 'cached': 0, 'skipped': 0, 'seconds': 0.0}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open_if_exists(cls, store_dir=DEFAULT_PORTFOLIO_DIR):
+        """Return the portfolio, or None when none has been built yet."""
+        if not os.path.exists(os.path.join(store_dir, 'meta.json')):
+            return None
+        return cls(store_dir)
+
+    def _read_levels(self):
+        with open(os.path.join(self.store_dir, 'meta.json')) as f:
+            return json.load(f)['levels']
+
+    def refresh(self):
+        with self._lock:
+            self._refresh()
+        return self
+
+    def _refresh(self):
+        start = time.perf_counter()
+        levels = self._read_levels()
+        if levels != self.levels:
+            self.levels, self._partials, self._totals = levels, {}, None
+        key = levels_key(levels)
+        current = {}
+        recomputed = skipped = 0
+        for name in list_partitions(self.store_dir):
+            part_dir = os.path.join(self.store_dir, name)
+            meta = _read_meta(part_dir)
+            if meta.get('levels') != key:
+                skipped += 1  # coded against other levels; picked up once the rebuild rescores it
+                continue
+            version = meta.get('version')
+            cached = self._partials.get(name)
+            if cached is not None and cached[0] == version:
+                current[name] = cached
+                continue
+            try:
+                current[name] = (version, partition_aggregates(part_dir, self.levels))
+            except FileNotFoundError:
+                continue  # replaced while we were reading it; picked up on the next refresh
+            recomputed += 1
+        if recomputed or current.keys() != self._partials.keys() or self._totals is None:
+            self._totals = _sum_partials((partial for _, partial in current.values()), self.levels)
+        self._partials = current
+        self.last_refresh = {'recomputed': recomputed, 'cached': len(current) - recomputed, 'skipped': skipped,
+                             'seconds': time.perf_counter() - start}
+
+    def summary(self, segment):
+        """One row per level of ``segment`` with counts, mean probability and revenue at risk."""
+        totals = self._totals[segment]
+        customers = totals['customers']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            df = pd.DataFrame({
+                'customers': customers.astype(np.int64),
+                'mean_probability': totals['expected_churners'] / customers,
+                'expected_churners': totals['expected_churners'],
+                'high_risk_share': totals['high_risk'] / customers,
+                'monthly_revenue': totals['monthly_revenue'],
+                'revenue_at_risk': totals['revenue_at_risk'],
+            }, index=pd.Index(self.levels[segment], name=segment))
+        return df[df['customers'] > 0]
+
+    def distribution(self, segment):
+        """Customer counts per probability bin (columns) for each level of ``segment`` (rows)."""
+        histogram = self._totals[segment]['histogram']
+        edges = np.linspace(0, 100, N_BINS + 1)
+        columns = [f'{lo:.0f}-{hi:.0f}%' for lo, hi in zip(edges[:-1], edges[1:])]
+        df = pd.DataFrame(histogram.astype(np.int64), index=pd.Index(self.levels[segment], name=segment), columns=columns)
+        return df[df.sum(axis=1) > 0]
+
+    def totals(self):
+        """Portfolio-wide customers, expected churners, monthly revenue and revenue at risk."""
+        t = self._totals[SEGMENTS[0]]
+        return {key: float(t[key].sum()) for key in _STATS}
+
+
+def _sum_partials(partials, levels):
+    totals = {segment: None for segment in SEGMENTS}
+    for partial in partials:
+        for segment, stats in partial.items():
+            if totals[segment] is None:
+                totals[segment] = {k: v.astype(np.float64) for k, v in stats.items()}
+            else:
+                for k, v in stats.items():
+                    totals[segment][k] += v
+    for segment in SEGMENTS:
+        if totals[segment] is None:
+            n = len(levels[segment])
+            totals[segment] = {k: np.zeros(n) for k in _STATS} | {'histogram': np.zeros((n, N_BINS))}
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score customer CSVs into the partitioned portfolio store.")
+    parser.add_argument('inputs', nargs='+', help="Telco-format CSVs (e.g. one per region or month)")
+    parser.add_argument('--store', default=DEFAULT_PORTFOLIO_DIR, help="Directory to write the partitions to")
+    parser.add_argument('--chunksize', type=int, default=200_000, help="Rows per partition")
+    parser.add_argument('--model-dir', default='.', help="Directory holding the model artifacts")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    written, unchanged = build_portfolio(args.inputs, args.store, args.model_dir, args.chunksize)
+    print(f"Scored {written} partition(s), {unchanged} unchanged, in {time.perf_counter() - start:.2f}s")
+
+    portfolio = Portfolio(args.store).refresh()
+    totals = portfolio.totals()
+    print(f"{totals['customers']:,.0f} customers, {totals['expected_churners']:,.0f} expected churners, "
+          f"${totals['revenue_at_risk']:,.0f} of ${totals['monthly_revenue']:,.0f} monthly revenue at risk")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+import time
+import streamlit as st
+import pandas as pd
+from app_metrics import StageMetrics, show_debug_panel
+from portfolio import DEFAULT_PORTFOLIO_DIR, SEGMENTS, Portfolio
+
+st.set_page_config(page_title="ChurnShield Portfolio", layout="wide")
+rerun_start = time.perf_counter()
+
+SEGMENT_LABELS = {
+    'Contract': "Contract",
+    'InternetService': "Internet Service",
+    'tenure_band': "Tenure Band",
+    'PaymentMethod': "Payment Method",
+}
+
+# 1. Open the scored portfolio once per process
+@st.cache_resource
+def load_portfolio():
+    # Partitions written by portfolio.py; per-partition aggregates stay cached
+    # in this object and only changed partitions are re-read on refresh.
+    # Raising keeps a missing portfolio out of the cache, so one built after startup is picked up
+    portfolio = Portfolio.open_if_exists()
+    if portfolio is None:
+        raise LookupError(f"no portfolio in {DEFAULT_PORTFOLIO_DIR}")
+    return portfolio
+
+@st.cache_resource
+def load_metrics():
+    # Per-stage timings shared by all sessions of this process
+    return StageMetrics('portfolio_app')
+
+metrics = load_metrics()
+
+st.title("📈 ChurnShield: Portfolio Risk")
+
+try:
+    portfolio = load_portfolio()
+except LookupError:
+    st.info(f"No scored portfolio found in `{DEFAULT_PORTFOLIO_DIR}/`. Score your customer base with "
+            "`python portfolio.py customers.csv` and reload this page.")
+    st.stop()
+
+# 2. Pick up partitions added or rescored since the last rerun
+with metrics.span('aggregate'):
+    portfolio.refresh()
+totals = portfolio.totals()
+
+c1, c2, c3, c4 = st.columns(4)
+c1.metric("Customers", f"{totals['customers']:,.0f}")
+c2.metric("Expected Churners", f"{totals['expected_churners']:,.0f}",
+          f"{totals['expected_churners'] / max(totals['customers'], 1):.1%} of base", delta_color="off")
+c3.metric("Monthly Revenue at Risk", f"${totals['revenue_at_risk']:,.0f}",
+          f"{totals['revenue_at_risk'] / max(totals['monthly_revenue'], 1):.1%} of revenue", delta_color="off")
+c4.metric("High-Risk Customers", f"{totals['high_risk']:,.0f}")
+
+# 3. Breakdown by segment
+segment = st.radio("Break down by", SEGMENTS, format_func=SEGMENT_LABELS.get, horizontal=True)
+summary = portfolio.summary(segment)
+
+with metrics.span('render'):
+    left, right = st.columns(2)
+    with left:
+        st.subheader("💸 Revenue at Risk")
+        st.caption("Sum of MonthlyCharges × churn probability per segment")
+        st.bar_chart(summary['revenue_at_risk'])
+    with right:
+        st.subheader("📊 Churn Probability Distribution")
+        st.caption("Customers per 5-point probability bin")
+        st.bar_chart(portfolio.distribution(segment).T)
+
+    table = pd.DataFrame({
+        'Customers': summary['customers'],
+        'Mean churn probability': summary['mean_probability'],
+        'High-risk share': summary['high_risk_share'],
+        'Expected churners': summary['expected_churners'].round(0),
+        'Monthly revenue ($)': summary['monthly_revenue'].round(0),
+        'Revenue at risk ($)': summary['revenue_at_risk'].round(0),
+    })
+    st.dataframe(table.style.format({'Mean churn probability': '{:.1%}', 'High-risk share': '{:.1%}',
+                                     'Expected churners': '{:,.0f}', 'Monthly revenue ($)': '{:,.0f}',
+                                     'Revenue at risk ($)': '{:,.0f}', 'Customers': '{:,}'}),
+                 use_container_width=True)
+
+refresh = portfolio.last_refresh
+st.caption(f"Aggregates: {refresh['recomputed']} partition(s) recomputed, {refresh['cached']} cached, "
+           f"in {refresh['seconds'] * 1e3:.1f} ms")
+if refresh['skipped']:
+    st.warning(f"{refresh['skipped']} partition(s) are still being rescored for the current model and are "
+               "not included yet.")
+
+# Whole-rerun time, then publish the timings (debug panel / Prometheus text file)
+metrics.record('rerun', time.perf_counter() - rerun_start)
+metrics.write()
+show_debug_panel(st, metrics)
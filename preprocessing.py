@@ -0,0 +1,232 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Category levels of every object column in the Telco CSV, in the sorted order
+# LabelEncoder assigned them when churn_model.pkl was trained. Used when a model
+# has no fitted preprocessor.json next to it.
+CATEGORY_LEVELS = {
+    'gender': ['Female', 'Male'],
+    'Partner': ['No', 'Yes'],
+    'Dependents': ['No', 'Yes'],
+    'PhoneService': ['No', 'Yes'],
+    'MultipleLines': ['No', 'No phone service', 'Yes'],
+    'InternetService': ['DSL', 'Fiber optic', 'No'],
+    'OnlineSecurity': ['No', 'No internet service', 'Yes'],
+    'OnlineBackup': ['No', 'No internet service', 'Yes'],
+    'DeviceProtection': ['No', 'No internet service', 'Yes'],
+    'TechSupport': ['No', 'No internet service', 'Yes'],
+    'StreamingTV': ['No', 'No internet service', 'Yes'],
+    'StreamingMovies': ['No', 'No internet service', 'Yes'],
+    'Contract': ['Month-to-month', 'One year', 'Two year'],
+    'PaperlessBilling': ['No', 'Yes'],
+    'PaymentMethod': [
+        'Bank transfer (automatic)',
+        'Credit card (automatic)',
+        'Electronic check',
+        'Mailed check',
+    ],
+    'Churn': ['No', 'Yes'],
+}
+
+ID_COLUMN = 'customerID'
+TARGET_COLUMN = 'Churn'
+# Object columns that hold numbers; blanks are coerced to 0 like in the original scripts.
+COERCED_COLUMNS = ('TotalCharges',)
+
+# Numeric 0/1 columns stored as int8 codes alongside the categorical ones.
+FLAG_COLUMNS = ('SeniorCitizen',)
+# Code of a missing or unseen category in compact (integer) storage.
+MISSING_CODE = -1
+
+# Bump whenever the encoding produced by Preprocessor changes.
+PREPROCESSING_VERSION = 1
+
+
+class Preprocessor:
+    """Fitted cleaning and encoding of Telco records, shared by training and serving.
+
+    Holds the feature order, one category map per categorical column and the
+    list of object columns coerced to numbers. ``transform`` turns a raw frame
+    into a float32 matrix in a single pass without mutating it; ``align`` does
+    the same for the already-encoded partial records the apps collect.
+    """
+
+    def __init__(self, columns=None, category_levels=None, coerced_columns=COERCED_COLUMNS,
+                 target_levels=None):
+        self.columns = list(columns) if columns is not None else None
+        self.category_levels = dict(category_levels or {})
+        self.coerced_columns = list(coerced_columns)
+        self.target_levels = list(target_levels) if target_levels is not None else None
+
+    @classmethod
+    def default(cls, model_columns):
+        """Preprocessor equivalent to the LabelEncoder encoding churn_model.pkl was trained with."""
+        levels = {col: CATEGORY_LEVELS[col] for col in model_columns if col in CATEGORY_LEVELS}
+        return cls(model_columns, levels, target_levels=CATEGORY_LEVELS[TARGET_COLUMN])
+
+    def fit(self, df):
+        """Learn feature order and category maps from a raw Telco frame."""
+        self.columns = [col for col in df.columns if col not in (ID_COLUMN, TARGET_COLUMN)]
+        self.category_levels = {
+            col: sorted(df[col].dropna().astype(str).unique())
+            for col in self.columns
+            if col not in self.coerced_columns and not pd.api.types.is_numeric_dtype(df[col])
+        }
+        if TARGET_COLUMN in df.columns:
+            self.target_levels = sorted(df[TARGET_COLUMN].dropna().astype(str).unique())
+        return self
+
+    def partial_fit(self, df):
+        """Like ``fit`` but merges category levels across calls, for data read in chunks."""
+        levels = self.category_levels
+        target_levels = self.target_levels
+        self.fit(df)
+        for col, seen in levels.items():
+            self.category_levels[col] = sorted(set(seen) | set(self.category_levels.get(col, [])))
+        if target_levels is not None:
+            self.target_levels = sorted(set(target_levels) | set(self.target_levels or []))
+        return self
+
+    def transform(self, df):
+        """Encode a raw frame into a float32 matrix ordered like ``self.columns``.
+
+        Categories never seen during fit become NaN so XGBoost routes them down
+        the missing branch. Columns absent from ``df`` are filled with 0.
+        """
+        X = np.zeros((len(df), len(self.columns)), dtype=np.float32)
+        for j, col in enumerate(self.columns):
+            if col not in df.columns:
+                continue
+            values = df[col]
+            if col in self.category_levels and not pd.api.types.is_numeric_dtype(values):
+                X[:, j] = _codes(values, self.category_levels[col])
+            elif col in self.coerced_columns:
+                X[:, j] = pd.to_numeric(values, errors='coerce').fillna(0).to_numpy()
+            else:
+                X[:, j] = pd.to_numeric(values, errors='coerce').to_numpy()
+        return X
+
+    def column_dtypes(self):
+        """Compact storage dtype of every feature: int8 (or int16) codes for categories and flags, float32 otherwise."""
+        dtypes = {}
+        for col in self.columns:
+            if col in self.category_levels:
+                dtypes[col] = np.dtype(np.int8 if len(self.category_levels[col]) <= 127 else np.int16)
+            elif col in FLAG_COLUMNS:
+                dtypes[col] = np.dtype(np.int8)
+            else:
+                dtypes[col] = np.dtype(np.float32)
+        return dtypes
+
+    def transform_compact(self, df):
+        """Encode a raw frame into ``{column: array}`` using ``column_dtypes``.
+
+        Missing and unseen categories become ``MISSING_CODE``; use
+        ``model_frame`` to turn the result back into model input.
+        """
+        return self.compact(self.transform(df))
+
+    def compact(self, X):
+        """Split a float32 matrix from ``transform``/``align`` into compact per-column arrays."""
+        columns = {}
+        for j, (col, dtype) in enumerate(self.column_dtypes().items()):
+            values = X[:, j]
+            if dtype.kind == 'i':
+                values = np.where(np.isnan(values), MISSING_CODE, values)
+            columns[col] = values.astype(dtype)
+        return columns
+
+    def model_frame(self, columns):
+        """DataFrame for XGBoost from compact columns, without widening them.
+
+        Integer codes are exact in XGBoost's float32 input, so they are passed
+        as-is; only a code column that holds ``MISSING_CODE`` is widened to
+        float32 with NaN, so it still takes the trees' missing branch.
+        """
+        data = {}
+        for col in self.columns:
+            values = columns[col]
+            if values.dtype.kind == 'i' and (values == MISSING_CODE).any():
+                values = np.where(values == MISSING_CODE, np.float32(np.nan), values.astype(np.float32))
+            data[col] = values
+        return pd.DataFrame(data, columns=self.columns, copy=False)
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+    def transform_target(self, df):
+        """Encode the ``Churn`` column as 0/1 int8."""
+        return np.nan_to_num(_codes(df[TARGET_COLUMN], self.target_levels)).astype(np.int8)
+
+    def align(self, data):
+        """Place already-encoded values into a zero-filled float32 matrix in model column order.
+
+        ``data`` maps column name to a scalar or a sequence (one value per row);
+        columns the model does not use are ignored.
+        """
+        n_rows = max((np.size(v) for v in data.values()), default=1)
+        X = np.zeros((n_rows, len(self.columns)), dtype=np.float32)
+        index = {col: j for j, col in enumerate(self.columns)}
+        for col, values in data.items():
+            if col in index:
+                X[:, index[col]] = values
+        return X
+
+    def to_dict(self):
+        return {
+            'version': PREPROCESSING_VERSION,
+            'columns': self.columns,
+            'category_levels': self.category_levels,
+            'coerced_columns': self.coerced_columns,
+            'target_levels': self.target_levels,
+        }
+
+    @classmethod
+    def from_dict(cls, d):
+        if d.get('version') != PREPROCESSING_VERSION:
+            raise ValueError(f"Unsupported preprocessor version {d.get('version')}, "
+                             f"expected {PREPROCESSING_VERSION}")
+        return cls(d['columns'], d['category_levels'], d['coerced_columns'], d['target_levels'])
+
+    def save(self, path='preprocessor.json'):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    @classmethod
+    def load(cls, path='preprocessor.json'):
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def load_preprocessor(path='preprocessor.json', model_columns=None):
+    """Load the fitted preprocessor, falling back to the default Telco encoding for older models."""
+    if os.path.exists(path):
+        return Preprocessor.load(path)
+    if model_columns is None:
+        raise FileNotFoundError(f"{path} not found and no model_columns given for the default encoding")
+    return Preprocessor.default(model_columns)
+
+
+def _codes(values, levels):
+    codes = pd.Categorical(values.astype(str), categories=levels).codes
+    return np.where(codes < 0, np.nan, codes).astype(np.float32)
+
+
+def risk_tier(probabilities):
+    """Map churn probabilities to the High/Medium/Low tiers used in the apps."""
+    return np.select(
+        [probabilities > 0.7, probabilities > 0.4],
+        ['High', 'Medium'],
+        default='Low',
+    )
+
+
+RISK_TIERS = ['Low', 'Medium', 'High']
+
+
+def risk_tier_codes(probabilities):
+    """int8 index into ``RISK_TIERS`` for each probability; the compact form of ``risk_tier``."""
+    return ((probabilities > 0.4).astype(np.int8) + (probabilities > 0.7)).astype(np.int8)
@@ -0,0 +1,285 @@
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from drift import BASELINE_FILE, DriftMonitor
+from model_artifacts import load_artifacts
+from preprocessing import ID_COLUMN, risk_tier
+
+MAX_BODY_BYTES = 32 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """Coalesces concurrent scoring requests into a single ``predict_proba`` call.
+
+    The first request to arrive opens a window of ``max_wait_ms``; every request
+    queued before it closes (or until ``max_batch_rows`` is reached) is scored
+    together in a worker thread, so the event loop never blocks on the model.
+    """
+
+    def __init__(self, model, max_wait_ms=5.0, max_batch_rows=4096, observer=None):
+        self.model = model
+        self.observer = observer
+        self.max_wait = max_wait_ms / 1000
+        self.max_batch_rows = max_batch_rows
+        self.batch_sizes = deque(maxlen=10_000)
+        self._queue = asyncio.Queue()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def score(self, X):
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((X, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            n_rows = len(batch[0][0])
+            deadline = loop.time() + self.max_wait
+            while n_rows < self.max_batch_rows:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                batch.append(item)
+                n_rows += len(item[0])
+
+            X = np.concatenate([x for x, _ in batch])
+            self.batch_sizes.append(len(X))
+            try:
+                probabilities = await loop.run_in_executor(None, self._predict, X)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+            start = 0
+            for x, future in batch:
+                if not future.done():
+                    future.set_result(probabilities[start:start + len(x)])
+                start += len(x)
+
+    def _predict(self, X):
+        probabilities = self.model.predict_proba(X)[:, 1]
+        if self.observer is not None:
+            # Once per micro-batch, in the worker thread
+            self.observer(X, probabilities)
+        return probabilities
+
+
+class LatencyTracker:
+    """Rolling window of request latencies with percentile summaries."""
+
+    def __init__(self, window=10_000):
+        self.latencies = deque(maxlen=window)
+        self.count = 0
+        self.rows = 0
+
+    def record(self, seconds, n_rows):
+        self.latencies.append(seconds)
+        self.count += 1
+        self.rows += n_rows
+
+    def summary(self):
+        summary = {'requests': self.count, 'rows': self.rows}
+        if self.latencies:
+            p50, p90, p99 = np.percentile(np.fromiter(self.latencies, dtype=float), [50, 90, 99]) * 1e3
+            summary.update({'p50_ms': p50, 'p90_ms': p90, 'p99_ms': p99, 'max_ms': max(self.latencies) * 1e3})
+        return summary
+
+
+class ScoringService:
+    """Minimal HTTP/1.1 JSON API over the churn model built on ``asyncio`` streams.
+
+    ``POST /score`` accepts one Telco record, a list of records or
+    ``{"records": [...]}`` and returns a probability and risk tier per record.
+    ``GET /metrics`` reports latency percentiles, micro-batch sizes and the
+    number of requests that failed with a 500,
+    ``GET /drift`` the input drift report (when a ``DriftMonitor`` is given)
+    and ``GET /health`` is a liveness check.
+    """
+
+    def __init__(self, model, preprocessor, max_wait_ms=5.0, max_batch_rows=4096, drift=None):
+        self.preprocessor = preprocessor
+        self.drift = drift
+        observer = (lambda X, p: drift.observe(X, p, preprocessor.columns)) if drift is not None else None
+        self.batcher = MicroBatcher(model, max_wait_ms, max_batch_rows, observer)
+        self.latency = LatencyTracker()
+        self.errors = 0
+        self._server = None
+
+    async def start(self, host='127.0.0.1', port=8000):
+        self.batcher.start()
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        await self.batcher.stop()
+
+    async def score_records(self, records):
+        df = pd.DataFrame.from_records(records)
+        probabilities = await self.batcher.score(self.preprocessor.transform(df))
+        tiers = risk_tier(probabilities)
+        # Records without an ID get null, not NaN (which is not valid JSON)
+        ids = (df[ID_COLUMN].astype(object).where(df[ID_COLUMN].notna(), None).tolist() if ID_COLUMN in df.columns
+               else [None] * len(df))
+        return [
+            {ID_COLUMN: cid, 'churn_probability': float(p), 'risk_tier': str(t)}
+            for cid, p, t in zip(ids, probabilities, tiers)
+        ]
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = await _read_headers(reader)
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    await _respond(writer, 413, {'error': 'request body too large'}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                try:
+                    status, payload = await self._dispatch(method, path, body)
+                except Exception as exc:
+                    # e.g. a transform or predict_proba failure: answer instead of dropping the socket
+                    logger.exception("Error handling %s %s", method, path)
+                    self.errors += 1
+                    status, payload = 500, {'error': f'{type(exc).__name__}: {exc}'}
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await _respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method, path, body):
+        if method == 'GET' and path == '/health':
+            return 200, {'status': 'ok'}
+        if method == 'GET' and path == '/metrics':
+            batch_sizes = list(self.batcher.batch_sizes)
+            return 200, {
+                'latency': self.latency.summary(),
+                'errors': self.errors,
+                'batches': len(batch_sizes),
+                'mean_batch_rows': float(np.mean(batch_sizes)) if batch_sizes else 0.0,
+            }
+        if method == 'GET' and path == '/drift':
+            if self.drift is None:
+                return 404, {'error': f'no drift baseline ({BASELINE_FILE}) next to the model'}
+            report, n_rows = self.drift.report()
+            return 200, {'n_rows': n_rows, 'features': json.loads(report.to_json(orient='records'))}
+        if method == 'POST' and path == '/score':
+            start = time.perf_counter()
+            try:
+                records = _parse_records(json.loads(body))
+            except (ValueError, TypeError) as exc:
+                return 400, {'error': str(exc)}
+            predictions = await self.score_records(records)
+            self.latency.record(time.perf_counter() - start, len(predictions))
+            return 200, {'predictions': predictions}
+        return 404, {'error': f'no route for {method} {path}'}
+
+
+def _parse_records(payload):
+    if isinstance(payload, dict):
+        payload = payload.get('records', [payload])
+    if not isinstance(payload, list) or not payload or not all(isinstance(r, dict) for r in payload):
+        raise ValueError("expected a customer record, a list of records or {\"records\": [...]}")
+    for i, record in enumerate(payload):
+        for name, value in record.items():
+            if value is not None and not isinstance(value, (str, int, float)):
+                raise ValueError(f"record {i}: field '{name}' must be a string, number or null, "
+                                 f"not {type(value).__name__}")
+    return payload
+
+
+async def _read_headers(reader):
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1').strip()
+        if not line:
+            return headers
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+async def _respond(writer, status, payload, keep_alive):
+    body = json.dumps(payload).encode()
+    head = (
+        f"HTTP/1.1 {status} {_REASONS[status]}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    writer.write(head.encode() + body)
+    await writer.drain()
+
+
+async def _serve(args):
+    artifacts = load_artifacts(args.model_dir)
+    drift = None if args.no_drift else DriftMonitor.open_if_exists(os.path.join(args.model_dir, BASELINE_FILE))
+    service = ScoringService(artifacts.model, artifacts.preprocessor, args.max_wait_ms, args.max_batch_rows, drift)
+    host, port = await service.start(args.host, args.port)
+    print(f"Scoring service listening on http://{host}:{port}")
+    try:
+        await service.serve_forever()
+    finally:
+        await service.stop()
+        if drift is not None:
+            drift.write(force=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve churn scores over HTTP with request micro-batching.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-wait-ms', type=float, default=5.0, help="Micro-batch collection window")
+    parser.add_argument('--max-batch-rows', type=int, default=4096)
+    parser.add_argument('--model-dir', default='.', help="Directory holding the model artifacts")
+    parser.add_argument('--no-drift', action='store_true', help="Don't track input drift against the baseline")
+    args = parser.parse_args()
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
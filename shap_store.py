@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from contributions import MODES, ContributionExplainer
+from model_artifacts import load_artifacts
+from preprocessing import ID_COLUMN
+from whatif import model_digest
+
+DEFAULT_STORE_DIR = os.environ.get('CHURNSHIELD_SHAP_STORE', 'shap_store')
+
+_worker_explainer = None
+
+
+def _init_worker(model_dir):
+    global _worker_explainer
+
+    _worker_explainer = ContributionExplainer(load_artifacts(model_dir).model)
+
+
+def _shap_chunk(start, X, mode):
+    values, _, _ = _worker_explainer.contributions(X, mode)
+    return start, values
+
+
+def build_store(input_path, store_dir=DEFAULT_STORE_DIR, model_dir='.', chunksize=50_000, n_jobs=None,
+                mode='exact'):
+    """Compute SHAP values for every customer in ``input_path`` and persist them under ``store_dir``.
+
+    Chunks are explained in a process pool and written straight into ``.npy``
+    memory maps, so only a few chunks are in memory at once. ``mode`` is one of
+    ``contributions.MODES``; 'saabas' trades accuracy for a much faster build.
+    The model's digest is recorded so the apps can ignore a store built from
+    another model. The store is built in a temporary directory and swapped in
+    whole, so an interrupted rebuild never leaves a mixed store behind.
+    Returns the row count.
+    """
+    artifacts = load_artifacts(model_dir)
+    customer_ids = pd.read_csv(input_path, usecols=[ID_COLUMN], dtype=str)[ID_COLUMN].to_numpy(dtype=str)
+    n_rows = len(customer_ids)
+    if n_rows == 0:
+        raise ValueError(f"{input_path} has no customer rows to explain")
+
+    parent = os.path.dirname(os.path.abspath(store_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, prefix=f'.{os.path.basename(os.path.abspath(store_dir))}-')
+    try:
+        _write_store(tmp, input_path, artifacts, customer_ids, model_dir, chunksize, n_jobs, mode)
+        _swap_in(tmp, store_dir)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return n_rows
+
+
+def _write_store(store_dir, input_path, artifacts, customer_ids, model_dir, chunksize, n_jobs, mode):
+    preprocessor = artifacts.preprocessor
+    model_columns = preprocessor.columns
+    n_rows, n_features = len(customer_ids), len(model_columns)
+    shap_values = np.lib.format.open_memmap(os.path.join(store_dir, 'shap_values.npy'), mode='w+',
+                                            dtype=np.float32, shape=(n_rows, n_features))
+    features = np.lib.format.open_memmap(os.path.join(store_dir, 'features.npy'), mode='w+',
+                                         dtype=np.float32, shape=(n_rows, n_features))
+
+    # Sorted ids plus the permutation back to row numbers give O(log n) lookups
+    # without building a dict of every customer on load.
+    order = np.argsort(customer_ids, kind='stable')
+    np.save(os.path.join(store_dir, 'sorted_ids.npy'), customer_ids[order])
+    np.save(os.path.join(store_dir, 'sorted_rows.npy'), order.astype(np.int64))
+
+    n_jobs = n_jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(model_dir,)) as pool:
+        pending = []
+        start = 0
+        for chunk in pd.read_csv(input_path, chunksize=chunksize, dtype={ID_COLUMN: str}):
+            X = preprocessor.transform(chunk)
+            features[start:start + len(X)] = X
+            pending.append(pool.submit(_shap_chunk, start, X, mode))
+            start += len(X)
+            # Bound the number of chunks in flight to keep memory flat.
+            while len(pending) >= 2 * n_jobs:
+                _write_result(shap_values, pending.pop(0).result())
+        for future in pending:
+            _write_result(shap_values, future.result())
+
+    shap_values.flush()
+    features.flush()
+
+    _, base_values, _ = ContributionExplainer(artifacts.model).contributions(features[:1], mode)
+    with open(os.path.join(store_dir, 'meta.json'), 'w') as f:
+        json.dump({'base_value': float(base_values[0]), 'feature_names': model_columns, 'n_rows': n_rows,
+                   'mode': mode, 'model_digest': model_digest(model_dir)}, f, indent=2)
+
+
+def _swap_in(tmp, store_dir):
+    # Readers see the old store or the new one; apps that still map the old files keep them until closed
+    old = None
+    if os.path.exists(store_dir):
+        old = f'{tmp}.old'
+        os.rename(store_dir, old)
+    os.rename(tmp, store_dir)
+    if old is not None:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def _write_result(shap_values, result):
+    start, values = result
+    shap_values[start:start + len(values)] = values
+
+
+class ShapStore:
+    """Read-only, memory-mapped view of a store written by :func:`build_store`."""
+
+    def __init__(self, store_dir=DEFAULT_STORE_DIR):
+        with open(os.path.join(store_dir, 'meta.json')) as f:
+            meta = json.load(f)
+        self.base_value = meta['base_value']
+        self.mode = meta.get('mode', 'exact')
+        self.model_digest = meta.get('model_digest')
+        self.feature_names = meta['feature_names']
+        self.shap_values = np.load(os.path.join(store_dir, 'shap_values.npy'), mmap_mode='r')
+        self.features = np.load(os.path.join(store_dir, 'features.npy'), mmap_mode='r')
+        self._sorted_ids = np.load(os.path.join(store_dir, 'sorted_ids.npy'), mmap_mode='r')
+        self._sorted_rows = np.load(os.path.join(store_dir, 'sorted_rows.npy'), mmap_mode='r')
+
+    @classmethod
+    def open_if_exists(cls, store_dir=DEFAULT_STORE_DIR, model_dir=None):
+        """Return the store, or None when no store has been built yet.
+
+        With ``model_dir``, a store built from a different model than the one
+        in that directory is stale and None is returned too.
+        """
+        if not os.path.exists(os.path.join(store_dir, 'meta.json')):
+            return None
+        store = cls(store_dir)
+        if model_dir is not None and store.model_digest != model_digest(model_dir):
+            return None
+        return store
+
+    def __len__(self):
+        return len(self.shap_values)
+
+    def row_of(self, customer_id):
+        """Row number of ``customer_id``, or None if it is not in the store."""
+        i = np.searchsorted(self._sorted_ids, customer_id)
+        if i < len(self._sorted_ids) and self._sorted_ids[i] == customer_id:
+            return int(self._sorted_rows[i])
+        return None
+
+    def explanation(self, customer_id):
+        """``shap.Explanation`` for one customer, ready for the waterfall/bar plots, or None."""
+        row = self.row_of(customer_id)
+        if row is None:
+            return None
+        import shap
+
+        return shap.Explanation(
+            values=np.array(self.shap_values[row], dtype=np.float64),
+            base_values=self.base_value,
+            data=np.array(self.features[row], dtype=np.float64),
+            feature_names=self.feature_names,
+        )
+
+
+def churn_probability(explanation):
+    """Model probability implied by a log-odds SHAP explanation."""
+    margin = explanation.base_values + explanation.values.sum()
+    return float(1.0 / (1.0 + np.exp(-margin)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute SHAP values for every customer in a Telco CSV.")
+    parser.add_argument('input', help="Telco-format CSV with a customerID column")
+    parser.add_argument('--store', default=DEFAULT_STORE_DIR, help="Directory to write the store to")
+    parser.add_argument('--chunksize', type=int, default=50_000)
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--model-dir', default='.', help="Directory holding the model artifacts")
+    parser.add_argument('--mode', choices=MODES, default='exact',
+                        help="Explanation mode; 'saabas' is approximate but ~100x faster (default: exact)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        n_rows = build_store(args.input, args.store, model_dir=args.model_dir, chunksize=args.chunksize,
+                             n_jobs=args.jobs, mode=args.mode)
+    except ValueError as exc:
+        parser.error(str(exc))
+    elapsed = time.perf_counter() - start
+    print(f"Explained {n_rows:,} customers in {elapsed:.2f}s ({n_rows / max(elapsed, 1e-9):,.0f} rows/sec)")
+    print(f"SHAP store written to {args.store}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+import importlib
+import os
+import threading
+
+WARM_UP_ENABLED = os.environ.get('CHURNSHIELD_WARM_UP', '1') != '0'
+
+
+def warm_up(*tasks):
+    """Run slow imports and loaders in a daemon thread so a later rerun finds them ready.
+
+    Each task is a module name to import or a zero-argument callable. Failures
+    are ignored here; they resurface when the real code path runs. Returns the
+    thread, or None when warm-up is disabled with ``CHURNSHIELD_WARM_UP=0``.
+    """
+    if not WARM_UP_ENABLED:
+        return None
+
+    def run():
+        for task in tasks:
+            try:
+                if isinstance(task, str):
+                    importlib.import_module(task)
+                else:
+                    task()
+            except Exception:
+                pass
+
+    thread = threading.Thread(target=run, name='churnshield-warm-up', daemon=True)
+    thread.start()
+    return thread
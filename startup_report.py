@@ -0,0 +1,58 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+APPS = ('app.py', 'app_enhanced.py', 'netflix_ui.py')
+HEAVY_MODULES = ('xgboost', 'shap', 'matplotlib.pyplot', 'plotly.graph_objects', 'plotly.express')
+
+# Runs in a fresh interpreter so every import the app makes is cold. Streamlit
+# itself is imported before the clock starts, as it is by `streamlit run`.
+_PROBE = """
+import json, sys, time, warnings
+warnings.filterwarnings('ignore')
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file({app!r}, default_timeout=300)
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': elapsed,
+    'errors': [e.message for e in at.exception],
+    'loaded': [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def time_first_render(app_path, repeats=3):
+    """Best-of-``repeats`` time for the first script run of a Streamlit app in a fresh process."""
+    runs = []
+    for _ in range(repeats):
+        out = subprocess.run(
+            [sys.executable, '-c', _PROBE.format(app=os.path.abspath(app_path), heavy=HEAVY_MODULES)],
+            cwd=os.path.dirname(os.path.abspath(app_path)), capture_output=True, text=True, check=True,
+        )
+        runs.append(json.loads(out.stdout.strip().splitlines()[-1]))
+    best = min(runs, key=lambda r: r['seconds'])
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Report time-to-first-render of the Streamlit apps.")
+    parser.add_argument('apps', nargs='*', default=APPS)
+    parser.add_argument('--dir', default='.', help="Checkout to measure, e.g. a git worktree of an older commit")
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'app':<18} {'first render ms':>16}  heavy modules loaded")
+    for app in args.apps:
+        result = time_first_render(os.path.join(args.dir, app), args.repeats)
+        loaded = ', '.join(result['loaded']) or '-'
+        print(f"{app:<18} {result['seconds'] * 1e3:16.0f}  {loaded}")
+        for error in result['errors']:
+            print(f"{'':<18} error: {error}")
+
+
+if __name__ == '__main__':
+    main()
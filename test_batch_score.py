@@ -0,0 +1,77 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from batch_score import score_file, score_to_columns
+from generate_telco import generate
+from model_artifacts import load_artifacts
+from preprocessing import ID_COLUMN
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(scope='module')
+def artifacts():
+    return load_artifacts(MODEL_DIR)
+
+
+@pytest.fixture
+def customers(tmp_path):
+    path = tmp_path / 'customers.csv'
+    generate(str(path), 250, chunksize=250, seed=0)
+    return path
+
+
+def _score_columns(path, output_dir, artifacts, chunksize=100):
+    return score_to_columns(str(path), str(output_dir), artifacts.model, artifacts.preprocessor, chunksize=chunksize)
+
+
+def test_columns_match_csv_output(tmp_path, customers, artifacts):
+    score_file(str(customers), str(tmp_path / 'scores.csv'), artifacts.model, artifacts.preprocessor, chunksize=100)
+    n_rows = _score_columns(customers, tmp_path / 'npy', artifacts)
+
+    expected = pd.read_csv(tmp_path / 'scores.csv', dtype={ID_COLUMN: str})
+    assert n_rows == len(expected) == 250
+    probability = np.load(tmp_path / 'npy' / 'churn_probability.npy')
+    assert probability.dtype == np.float32
+    np.testing.assert_allclose(probability, expected['churn_probability'], atol=1e-6)
+    assert (np.load(tmp_path / 'npy' / f'{ID_COLUMN}.npy').astype(str) == expected[ID_COLUMN]).all()
+    with open(tmp_path / 'npy' / 'meta.json') as f:
+        meta = json.load(f)
+    tiers = np.load(tmp_path / 'npy' / 'risk_tier.npy')
+    assert [meta['risk_tiers'][code] for code in tiers] == expected['risk_tier'].tolist()
+
+
+def test_csv_without_customer_ids(tmp_path, customers, artifacts):
+    no_ids = tmp_path / 'no_ids.csv'
+    pd.read_csv(customers).drop(columns=[ID_COLUMN]).to_csv(no_ids, index=False)
+
+    assert _score_columns(no_ids, tmp_path / 'npy', artifacts) == 250
+    assert np.load(tmp_path / 'npy' / 'churn_probability.npy').shape == (250,)
+    assert np.load(tmp_path / 'npy' / 'risk_tier.npy').shape == (250,)
+    assert not (tmp_path / 'npy' / f'{ID_COLUMN}.npy').exists()
+
+
+def test_id_width_grows_across_chunks(tmp_path, customers, artifacts):
+    df = pd.read_csv(customers, dtype={ID_COLUMN: str})
+    # Short IDs in the first chunk, longer ones later
+    df[ID_COLUMN] = [f'C{i}' for i in range(len(df))]
+    df.to_csv(customers, index=False)
+
+    _score_columns(customers, tmp_path / 'npy', artifacts, chunksize=10)
+    ids = np.load(tmp_path / 'npy' / f'{ID_COLUMN}.npy')
+    assert ids.dtype == np.dtype('S4')
+    assert ids.astype(str).tolist() == df[ID_COLUMN].tolist()
+
+
+def test_non_ascii_ids_round_trip(tmp_path, customers, artifacts):
+    df = pd.read_csv(customers, dtype={ID_COLUMN: str})
+    df[ID_COLUMN] = [f'Zoë-{i}' if i % 2 else f'客户{i}' for i in range(len(df))]
+    df.to_csv(customers, index=False)
+
+    assert _score_columns(customers, tmp_path / 'npy', artifacts) == 250
+    ids = np.load(tmp_path / 'npy' / f'{ID_COLUMN}.npy')
+    assert np.char.decode(ids, 'utf-8').tolist() == df[ID_COLUMN].tolist()
@@ -0,0 +1,94 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from drift import ALERT_FILE, MIN_ROWS, REPORT_FILE, DriftMonitor, DriftSketch, compare, ks, psi
+from generate_telco import generate
+from model_artifacts import load_artifacts
+from preprocessing import ID_COLUMN
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture(scope='module')
+def encoded(tmp_path_factory):
+    """Baseline and fresh rows from one synthetic base, encoded with the model's preprocessor."""
+    path = tmp_path_factory.mktemp('drift') / 'customers.csv'
+    generate(str(path), 3000, chunksize=3000, seed=0)
+    artifacts = load_artifacts(MODEL_DIR)
+    X = artifacts.preprocessor.transform(pd.read_csv(path, dtype={ID_COLUMN: str}))
+    probabilities = artifacts.model.predict_proba(X)[:, 1]
+    baseline = DriftSketch.from_training(X[:2000], artifacts.preprocessor, probabilities[:2000])
+    return artifacts, baseline, X[2000:], probabilities[2000:]
+
+
+def _shifted(artifacts, X):
+    X = X.copy()
+    X[:, artifacts.preprocessor.columns.index('tenure')] += 40
+    return X
+
+
+def test_psi_and_ks():
+    counts = np.array([10.0, 20.0, 30.0, 40.0])
+    assert psi(counts, counts * 3) == pytest.approx(0.0)
+    assert ks(counts, counts * 3) == pytest.approx(0.0)
+    p, q = np.array([50.0, 50.0]), np.array([90.0, 10.0])
+    assert psi(p, q) == pytest.approx((0.9 - 0.5) * np.log(0.9 / 0.5) + (0.1 - 0.5) * np.log(0.1 / 0.5))
+    assert ks(p, q) == pytest.approx(0.4)
+    # Empty bins are floored instead of giving an infinite PSI
+    assert np.isfinite(psi(np.array([1.0, 0.0]), np.array([0.0, 1.0])))
+
+
+def test_compare_same_distribution_is_ok(encoded):
+    artifacts, baseline, X, probabilities = encoded
+    current = baseline.empty()
+    current.update(X, probabilities, artifacts.preprocessor.columns)
+    report = compare(baseline, current).set_index('feature')
+    assert (report['status'] == 'ok').all()
+    assert report.loc['tenure', 'kind'] == 'numeric' and pd.isna(report.loc['Contract', 'ks'])
+
+
+def test_compare_flags_a_shifted_feature(encoded):
+    artifacts, baseline, X, probabilities = encoded
+    current = baseline.empty()
+    current.update(_shifted(artifacts, X), probabilities, artifacts.preprocessor.columns)
+    report = compare(baseline, current).set_index('feature')
+    assert report.loc['tenure', 'status'] == 'alert'
+    assert report.loc['tenure', 'psi'] > 0.25 and report.loc['tenure', 'ks'] > 0.2
+    assert report.loc['Contract', 'status'] == 'ok'
+
+
+def test_no_verdict_below_min_rows(encoded):
+    artifacts, baseline, X, probabilities = encoded
+    current = baseline.empty()
+    current.update(_shifted(artifacts, X)[:MIN_ROWS - 1], probabilities[:MIN_ROWS - 1], artifacts.preprocessor.columns)
+    assert (compare(baseline, current)['status'] == 'insufficient data').all()
+
+
+def test_monitor_writes_and_clears_the_alert(encoded, tmp_path):
+    artifacts, baseline, X, probabilities = encoded
+    columns = artifacts.preprocessor.columns
+    monitor = DriftMonitor(baseline, str(tmp_path), min_write_interval=0.0, half_life=100)
+    monitor.observe(_shifted(artifacts, X), probabilities, columns)
+    with open(tmp_path / ALERT_FILE) as f:
+        assert [row['feature'] for row in json.load(f)['features']] == ['tenure']
+
+    # With a short half-life recent normal traffic outweighs the shifted batch
+    monitor.observe(X, probabilities, columns)
+    assert not (tmp_path / ALERT_FILE).exists()
+    with open(tmp_path / REPORT_FILE) as f:
+        assert json.load(f)['n_rows'] == pytest.approx(monitor.current.n_rows)
+
+    # A restarted monitor resumes from the saved state
+    assert DriftMonitor(baseline, str(tmp_path)).current.n_rows == pytest.approx(monitor.current.n_rows)
+
+
+def test_write_errors_stay_off_the_scoring_path(encoded, tmp_path, caplog):
+    artifacts, baseline, X, probabilities = encoded
+    monitor = DriftMonitor(baseline, str(tmp_path / 'missing'), min_write_interval=0.0)
+    monitor.observe(X, probabilities, artifacts.preprocessor.columns)
+    assert monitor.current.n_rows == len(X)
+    assert 'Could not write the drift state' in caplog.text
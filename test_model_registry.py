@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+from compress_model import truncate
+from model_artifacts import load_artifacts, save_artifacts
+from model_registry import ACTIVE_FILE, ActiveModel, ModelRegistry
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def registry(tmp_path):
+    """Registry with the bundled model as v0001 (active) and a 10-tree cut of it as v0002."""
+    artifacts = load_artifacts(MODEL_DIR)
+    smaller = str(tmp_path / 'smaller')
+    save_artifacts(truncate(artifacts.model, 10), artifacts.preprocessor, smaller)
+    registry = ModelRegistry(str(tmp_path / 'models'))
+    assert registry.publish(MODEL_DIR, activate=True) == 'v0001'
+    assert registry.publish(smaller) == 'v0002'
+    return registry
+
+
+def _n_trees(artifacts):
+    return artifacts.model.get_booster().num_boosted_rounds()
+
+
+def test_publish_and_activate(registry):
+    assert registry.versions() == ['v0001', 'v0002']
+    assert registry.active_version() == 'v0001'
+    with pytest.raises(ValueError, match='Unknown model version'):
+        registry.activate('v0003')
+
+
+def test_swap_and_rollback(registry):
+    active = ActiveModel(registry.root, check_interval=0)
+    version, artifacts = active.snapshot()
+    assert version == 'v0001' and _n_trees(artifacts) == 100
+
+    registry.activate('v0002')
+    version, artifacts = active.snapshot()
+    assert version == 'v0002' and _n_trees(artifacts) == 10
+    assert artifacts.directory == registry.path(version)
+
+    registry.activate('v0001')
+    assert active.snapshot()[0] == 'v0001'
+
+
+def test_swap_waits_for_the_check_interval(registry):
+    active = ActiveModel(registry.root, check_interval=3600)
+    registry.activate('v0002')
+    assert active.snapshot()[0] == 'v0001'
+
+
+def test_broken_version_is_not_served(registry):
+    active = ActiveModel(registry.root, check_interval=0)
+    model_file = load_artifacts(registry.path('v0002')).manifest['model_file']
+    with open(os.path.join(registry.path('v0002'), model_file), 'w') as f:
+        f.write('not a model')
+    with pytest.raises(ValueError):
+        registry.activate('v0002')
+
+    # Even when the pointer is set by hand, the loaded version is kept
+    with open(os.path.join(registry.root, ACTIVE_FILE), 'w') as f:
+        f.write('v0002\n')
+    with pytest.warns(UserWarning, match="keeping 'v0001'"):
+        version, artifacts = active.snapshot()
+    assert version == 'v0001' and _n_trees(artifacts) == 100
+
+
+def test_local_fallback_without_registry(tmp_path):
+    active = ActiveModel(str(tmp_path / 'none'), check_interval=0, fallback_dir=MODEL_DIR)
+    version, artifacts = active.snapshot()
+    assert version == 'local'
+    assert artifacts is active.current()
@@ -0,0 +1,65 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from generate_telco import generate
+from portfolio import Portfolio, build_portfolio
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@pytest.fixture
+def store(tmp_path):
+    paths = []
+    for seed, name in enumerate(['north.csv', 'south.csv']):
+        path = tmp_path / name
+        generate(str(path), 200, chunksize=200, seed=seed)
+        paths.append(str(path))
+    store_dir = str(tmp_path / 'portfolio')
+    assert build_portfolio(paths, store_dir, MODEL_DIR, chunksize=100) == (4, 0)
+    return paths, store_dir
+
+
+def test_refresh_rereads_only_changed_partitions(store):
+    paths, store_dir = store
+    portfolio = Portfolio(store_dir).refresh()
+    assert portfolio.totals()['customers'] == 400
+    assert portfolio.refresh().last_refresh['recomputed'] == 0
+
+    # Change one row of the second partition of north.csv and drop south.csv
+    df = pd.read_csv(paths[0])
+    df.loc[150, 'MonthlyCharges'] += 10
+    df.to_csv(paths[0], index=False)
+    assert build_portfolio(paths[:1], store_dir, MODEL_DIR, chunksize=100) == (1, 1)
+
+    portfolio.refresh()
+    assert (portfolio.last_refresh['recomputed'], portfolio.last_refresh['cached']) == (1, 1)
+    assert portfolio.totals()['customers'] == 200
+    assert portfolio.summary('Contract')['customers'].sum() == 200
+
+
+def test_partitions_coded_against_other_levels_are_skipped(store):
+    paths, store_dir = store
+    portfolio = Portfolio(store_dir).refresh()
+    expected = portfolio.summary('Contract')
+
+    # A rebuild for a model with other levels has rewritten meta.json but no partition yet
+    meta_path = os.path.join(store_dir, 'meta.json')
+    with open(meta_path) as f:
+        meta = json.load(f)
+    meta['levels']['Contract'].insert(0, 'Weekly')
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+    portfolio.refresh()
+    assert portfolio.last_refresh['skipped'] == 4
+    assert portfolio.totals()['customers'] == 0
+    assert portfolio.levels['Contract'][0] == 'Weekly'
+
+    # Once the partitions match the store's levels again they are all read back
+    build_portfolio(paths, store_dir, MODEL_DIR, chunksize=100)
+    portfolio.refresh()
+    assert (portfolio.last_refresh['recomputed'], portfolio.last_refresh['skipped']) == (4, 0)
+    pd.testing.assert_frame_equal(portfolio.summary('Contract'), expected)
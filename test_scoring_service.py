@@ -0,0 +1,72 @@
+import asyncio
+import json
+import os
+
+import pytest
+
+from model_artifacts import load_artifacts
+from scoring_service import ScoringService
+
+MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+CUSTOMER = {'tenure': 3, 'Contract': 'Month-to-month', 'InternetService': 'Fiber optic', 'MonthlyCharges': 90.0}
+
+
+@pytest.fixture(scope='module')
+def artifacts():
+    return load_artifacts(MODEL_DIR)
+
+
+def _strict_json(text):
+    def reject(constant):
+        raise ValueError(f"invalid JSON constant {constant}")
+    return json.loads(text, parse_constant=reject)
+
+
+async def _request(port, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                 + body)
+    response = await reader.read()
+    writer.close()
+    head, _, text = response.decode().partition('\r\n\r\n')
+    return int(head.split()[1]), _strict_json(text)
+
+
+def _serve(model, preprocessor, *requests):
+    async def run():
+        service = ScoringService(model, preprocessor, max_wait_ms=1.0)
+        _, port = await service.start('127.0.0.1', 0)
+        try:
+            return [await _request(port, *request) for request in requests]
+        finally:
+            await service.stop()
+    return asyncio.run(run())
+
+
+def test_mixed_customer_ids_give_valid_json(artifacts):
+    records = [{**CUSTOMER, 'customerID': 'C1'}, CUSTOMER]
+    [(status, payload)] = _serve(artifacts.model, artifacts.preprocessor, ('POST', '/score', records))
+    assert status == 200
+    assert [p['customerID'] for p in payload['predictions']] == ['C1', None]
+    assert all(0 <= p['churn_probability'] <= 1 for p in payload['predictions'])
+
+
+@pytest.mark.parametrize('value', [[1, 2], {'months': 3}])
+def test_non_scalar_field_is_rejected(artifacts, value):
+    [(status, payload)] = _serve(artifacts.model, artifacts.preprocessor,
+                                 ('POST', '/score', {**CUSTOMER, 'tenure': value}))
+    assert status == 400
+    assert "'tenure'" in payload['error']
+
+
+def test_model_failure_returns_500_and_is_counted(artifacts):
+    class Broken:
+        def predict_proba(self, X):
+            raise RuntimeError('boom')
+
+    (status, payload), (_, metrics) = _serve(Broken(), artifacts.preprocessor,
+                                             ('POST', '/score', CUSTOMER), ('GET', '/metrics'))
+    assert status == 500
+    assert 'boom' in payload['error']
+    assert metrics['errors'] == 1
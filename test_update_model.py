@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+from xgboost import XGBClassifier
+
+from compress_model import model_shape
+from generate_telco import generate
+from model_artifacts import load_artifacts, save_artifacts, training_params
+from preprocessing import ID_COLUMN, Preprocessor
+from update_model import continue_boosting, recorded_params, refresh_leaves
+
+
+@pytest.fixture(scope='module')
+def trained(tmp_path_factory):
+    """A model trained with non-default settings, saved and reloaded from the native format."""
+    directory = tmp_path_factory.mktemp('model')
+    generate(str(directory / 'train.csv'), 3000, chunksize=3000, seed=1)
+    df = pd.read_csv(directory / 'train.csv', dtype={ID_COLUMN: str})
+    preprocessor = Preprocessor()
+    X = pd.DataFrame(preprocessor.fit_transform(df), columns=preprocessor.columns)
+    y = preprocessor.transform_target(df)
+    model = XGBClassifier(n_estimators=60, learning_rate=0.05, max_depth=3, reg_lambda=2.0, random_state=0)
+    model.fit(X, y)
+    save_artifacts(model, preprocessor, str(directory), training={'params': training_params(model)})
+    return load_artifacts(str(directory)), X, y
+
+
+def test_params_survive_the_native_format(trained):
+    artifacts, _, _ = trained
+    # The reloaded model no longer knows them; the manifest does
+    assert artifacts.model.get_params()['learning_rate'] is None
+    params = recorded_params(artifacts)
+    assert (params['learning_rate'], params['max_depth'], params['reg_lambda']) == (0.05, 3, 2.0)
+
+
+def test_refresh_on_training_data_keeps_predictions(trained):
+    artifacts, X, y = trained
+    refreshed = refresh_leaves(artifacts.model, X, y, recorded_params(artifacts))
+    before = artifacts.model.predict_proba(X)[:, 1]
+    after = refreshed.predict_proba(X)[:, 1]
+    assert np.abs(after - before).max() < 0.05
+
+
+def test_refresh_on_a_small_batch_keeps_unvisited_leaves(trained):
+    artifacts, X, y = trained
+    refreshed = refresh_leaves(artifacts.model, X.iloc[:50], y[:50], recorded_params(artifacts))
+    contributions = refreshed.get_booster().predict(xgb.DMatrix(X), pred_contribs=True)
+    assert np.isfinite(contributions).all()
+    # No leaf is reset to zero just because none of the 50 rows reached it
+    leaves = refreshed.get_booster().trees_to_dataframe().query("Feature == 'Leaf'")
+    assert (leaves['Gain'] != 0).all()
+
+
+def test_continue_boosting_uses_training_params(trained):
+    artifacts, X, y = trained
+    updated = continue_boosting(artifacts.model, X, y, 10, recorded_params(artifacts))
+    n_trees, depth, _ = model_shape(updated)
+    assert n_trees == 70
+    assert depth <= 3
+
+
+def test_missing_params_are_refused(trained, tmp_path):
+    artifacts, _, _ = trained
+    save_artifacts(artifacts.model, artifacts.preprocessor, str(tmp_path))
+    with pytest.raises(ValueError, match='training params'):
+        recorded_params(load_artifacts(str(tmp_path)))
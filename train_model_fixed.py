@@ -1,53 +1,50 @@
-import pandas as pd
-import numpy as np
+import argparse
+import json
 from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
 from xgboost import XGBClassifier
-from imblearn.over_sampling import SMOTE
 from sklearn.metrics import classification_report, accuracy_score
 import joblib
+from model_artifacts import save_artifacts, training_params
+from dataset_cache import DEFAULT_DATA_PATH, load_training_data
+from drift import save_baseline
+from global_importance import save_importance
+from imbalance import DEFAULT_STRATEGY, STRATEGIES, apply_strategy
 
-# 1. Load Data
+parser = argparse.ArgumentParser(description="Train the churn model.")
+parser.add_argument('--data', default=DEFAULT_DATA_PATH,
+                    help="Telco-format training CSV (default: $CHURNSHIELD_DATA or the Kaggle file in the current directory)")
+parser.add_argument('--imbalance', choices=list(STRATEGIES), default=DEFAULT_STRATEGY,
+                    help="Class-imbalance strategy (compare them with imbalance.py)")
+parser.add_argument('--params', help="JSON file of XGBClassifier params, e.g. best_params.json from tune_model.py")
+args = parser.parse_args()
+
+# 1-4. Load, Clean & Encode Data, Define X (Features) and y (Target)
 print("Loading data...")
-df = pd.read_csv(r'C:\Users\VICTUS\OneDrive\Documents\Data\WA_Fn-UseC_-Telco-Customer-Churn.csv')
+# The preprocessor coerces 'TotalCharges' to numeric (blanks become 0), drops
+# customerID and keeps one category map per categorical column, so the apps and
+# batch scoring encode new customers exactly like the training data.
+# The encoded columns are cached on disk keyed by the CSV's content hash, so
+# repeat runs memory-map them instead of re-parsing the CSV.
+X, y, preprocessor = load_training_data(args.data)
 print("Data loaded successfully!")
 
-# 2. Data Cleaning
-print("\nCleaning data...")
-# 'TotalCharges' is object but should be numeric. Coerce errors to NaN and fill with 0
-df['TotalCharges'] = pd.to_numeric(df['TotalCharges'], errors='coerce').fillna(0)
-# Drop customerID as it's not useful for prediction
-df = df.drop('customerID', axis=1)
-
-# 3. Encoding Categorical Data
-print("Encoding categorical data...")
-# Identify categorical columns
-cat_cols = df.select_dtypes(include=['object']).columns
-le = LabelEncoder()
-
-# We create a dictionary to save encoders if we want to inverse transform later
-encoders = {}
-for col in cat_cols:
-    df[col] = le.fit_transform(df[col])
-    encoders[col] = le
-
-# 4. Define X (Features) and y (Target)
-X = df.drop('Churn', axis=1)
-y = df['Churn']
-
 # 5. Split Data
 print("Splitting data into train and test sets...")
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
 
-# 6. Handle Imbalance with SMOTE (Synthetic Minority Over-sampling Technique)
-print("Handling class imbalance with SMOTE...")
-smote = SMOTE(random_state=42)
-X_train_resampled, y_train_resampled = smote.fit_resample(X_train, y_train)
+# 6. Handle Imbalance (default: SMOTE, Synthetic Minority Over-sampling Technique)
+print(f"Handling class imbalance with {args.imbalance}...")
+X_train_resampled, y_train_resampled, fit_kwargs, imbalance_params = apply_strategy(args.imbalance, X_train, y_train)
 
 # 7. Train Model (XGBoost)
 print("\nTraining XGBoost model...")
-model = XGBClassifier(use_label_encoder=False, eval_metric='logloss', random_state=42)
-model.fit(X_train_resampled, y_train_resampled)
+# Tuned params (tune_model.py writes the best config to best_params.json) override XGBoost's defaults
+params = {}
+if args.params:
+    with open(args.params) as f:
+        params = json.load(f)
+model = XGBClassifier(use_label_encoder=False, eval_metric='logloss', random_state=42, **{**params, **imbalance_params})
+model.fit(X_train_resampled, y_train_resampled, **fit_kwargs)
 print("Training completed!")
 
 # 8. Evaluate
@@ -56,8 +53,30 @@ y_pred = model.predict(X_test)
 print("\nModel Accuracy:", accuracy_score(y_test, y_pred))
 print("\nClassification Report:\n", classification_report(y_test, y_pred))
 
-# 9. Save Model and Column names (for the app)
-print("\nSaving model and columns...")
+# 9. Save Model, Column names and Preprocessor (for the app)
+print("\nSaving model, columns and preprocessor...")
 joblib.dump(model, 'churn_model.pkl')
 joblib.dump(X.columns, 'model_columns.pkl')
-print("Model and columns saved successfully!")
+preprocessor.save('preprocessor.json')
+# Native XGBoost format + JSON manifest, loaded by the apps without unpickling
+save_artifacts(model, preprocessor, training={
+    'n_train_rows': len(X_train_resampled),
+    'imbalance': args.imbalance,
+    'accuracy': accuracy_score(y_test, y_pred),
+    # Effective hyperparameters, needed by update_model.py to refresh or extend this model
+    'params': training_params(model),
+    'params_file': args.params,
+})
+print("Model, columns and preprocessor saved successfully!")
+
+# 10. Global Feature Importance (netflix_ui's Key Factors panel)
+# Mean |SHAP| over a bounded sample of the (un-resampled) training rows, keyed by
+# the saved model's hash so a stale file is ignored after retraining
+save_importance(model, X_train)
+print("Global feature importance saved!")
+
+# 11. Drift Baseline
+# Binned training distribution of every feature and of the model's scores;
+# batch_score.py --drift and scoring_service.py compare live traffic against it
+save_baseline(X_train, preprocessor, model.predict_proba(X_train)[:, 1])
+print("Drift baseline saved!")
@@ -0,0 +1,168 @@
+import argparse
+import os
+import resource
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import accuracy_score, classification_report, roc_auc_score
+from xgboost import XGBClassifier
+
+from model_artifacts import save_artifacts
+from preprocessing import ID_COLUMN, Preprocessor
+
+
+class TelcoChunkIter(xgb.DataIter):
+    """Feeds a Telco CSV to XGBoost one encoded chunk at a time.
+
+    Rows are assigned to the train or test split by a hash of their position in
+    the file, so every pass over the CSV yields the same split without keeping
+    any index in memory.
+    """
+
+    def __init__(self, path, preprocessor, split, test_size=0.2, chunksize=500_000, cache_prefix=None):
+        self.path = path
+        self.preprocessor = preprocessor
+        self.split = split
+        self.test_size = test_size
+        self.chunksize = chunksize
+        self._reader = None
+        self._offset = 0
+        super().__init__(cache_prefix=cache_prefix)
+
+    def reset(self):
+        if self._reader is not None:
+            self._reader.close()
+        self._reader = pd.read_csv(self.path, chunksize=self.chunksize, dtype={ID_COLUMN: str})
+        self._offset = 0
+
+    def next(self, input_data):
+        if self._reader is None:
+            self.reset()
+        for chunk in self._reader:
+            mask = _test_mask(self._offset, len(chunk), self.test_size)
+            self._offset += len(chunk)
+            if self.split == 'train':
+                mask = ~mask
+            if not mask.any():
+                continue
+            input_data(
+                data=self.preprocessor.transform(chunk)[mask],
+                label=self.preprocessor.transform_target(chunk)[mask],
+                feature_names=self.preprocessor.columns,
+            )
+            return True
+        return False
+
+
+def _test_mask(offset, n_rows, test_size):
+    # Cheap deterministic hash of the row number (Knuth multiplicative), mapped to [0, 1).
+    rows = np.arange(offset, offset + n_rows, dtype=np.uint64)
+    hashed = (rows * np.uint64(2654435761)) % np.uint64(2 ** 32)
+    return hashed.astype(np.float64) / 2 ** 32 < test_size
+
+
+def scan(path, test_size, chunksize):
+    """First pass over the CSV: fit category maps and count train-set classes."""
+    preprocessor = Preprocessor()
+    n_pos = n_neg = offset = 0
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype={ID_COLUMN: str}):
+        preprocessor.partial_fit(chunk)
+        train = ~_test_mask(offset, len(chunk), test_size)
+        offset += len(chunk)
+        y = preprocessor.transform_target(chunk)[train]
+        n_pos += int(y.sum())
+        n_neg += int(len(y) - y.sum())
+    return preprocessor, n_pos, n_neg
+
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train the churn model by streaming a Telco CSV in chunks.")
+    parser.add_argument('input', help="Telco-format training CSV")
+    parser.add_argument('--output-dir', default='.', help="Where to write churn_model.pkl and friends")
+    parser.add_argument('--chunksize', type=int, default=500_000)
+    parser.add_argument('--test-size', type=float, default=0.2)
+    parser.add_argument('--rounds', type=int, default=100)
+    parser.add_argument('--max-bin', type=int, default=256)
+    parser.add_argument('--external-memory', action='store_true',
+                        help="Page the quantised data to disk instead of keeping it in RAM")
+    parser.add_argument('--cache-dir', default='.xgb_cache', help="Page cache location for --external-memory")
+    args = parser.parse_args()
+
+    timings = {}
+    start = time.perf_counter()
+
+    # 1. Scan: category maps and class balance
+    print("Scanning data...")
+    preprocessor, n_pos, n_neg = scan(args.input, args.test_size, args.chunksize)
+    timings['scan'] = time.perf_counter() - start
+    print(f"{n_pos + n_neg:,} training rows ({n_pos:,} churners)")
+
+    # 2. Build the quantised training and test matrices chunk by chunk
+    print("Building quantile DMatrix...")
+    t = time.perf_counter()
+    cache_prefix = None
+    if args.external_memory:
+        os.makedirs(args.cache_dir, exist_ok=True)
+        cache_prefix = os.path.join(args.cache_dir, 'cache')
+    train_iter = TelcoChunkIter(args.input, preprocessor, 'train', args.test_size, args.chunksize,
+                                cache_prefix=cache_prefix and cache_prefix + '-train')
+    test_iter = TelcoChunkIter(args.input, preprocessor, 'test', args.test_size, args.chunksize,
+                               cache_prefix=cache_prefix and cache_prefix + '-test')
+    if args.external_memory:
+        dtrain = xgb.ExtMemQuantileDMatrix(train_iter, max_bin=args.max_bin)
+        dtest = xgb.ExtMemQuantileDMatrix(test_iter, max_bin=args.max_bin, ref=dtrain)
+    else:
+        dtrain = xgb.QuantileDMatrix(train_iter, max_bin=args.max_bin)
+        dtest = xgb.QuantileDMatrix(test_iter, max_bin=args.max_bin, ref=dtrain)
+    timings['dmatrix'] = time.perf_counter() - t
+
+    # 3. Train (class imbalance handled with scale_pos_weight, since SMOTE needs all rows in memory)
+    print("Training XGBoost model...")
+    t = time.perf_counter()
+    params = {
+        'objective': 'binary:logistic',
+        'eval_metric': 'logloss',
+        'tree_method': 'hist',
+        'max_bin': args.max_bin,
+        'scale_pos_weight': n_neg / max(n_pos, 1),
+    }
+    booster = xgb.train(params, dtrain, num_boost_round=args.rounds, evals=[(dtest, 'test')], verbose_eval=25)
+    timings['train'] = time.perf_counter() - t
+
+    # 4. Evaluate
+    y_test = dtest.get_label()
+    y_prob = booster.predict(dtest)
+    y_pred = (y_prob > 0.5).astype(int)
+    print("\nModel Accuracy:", accuracy_score(y_test, y_pred))
+    print("ROC AUC:", roc_auc_score(y_test, y_prob))
+    print("\nClassification Report:\n", classification_report(y_test, y_pred))
+
+    # 5. Save in the same formats as train_model.py so the apps can load it
+    model = XGBClassifier()
+    model.load_model(bytearray(booster.save_raw('json')))
+    joblib.dump(model, os.path.join(args.output_dir, 'churn_model.pkl'))
+    joblib.dump(pd.Index(preprocessor.columns), os.path.join(args.output_dir, 'model_columns.pkl'))
+    preprocessor.save(os.path.join(args.output_dir, 'preprocessor.json'))
+    save_artifacts(model, preprocessor, args.output_dir, training={
+        'n_train_rows': n_pos + n_neg,
+        'accuracy': accuracy_score(y_test, y_pred),
+        'auc': roc_auc_score(y_test, y_prob),
+        'params': params,
+        'rounds': args.rounds,
+    })
+
+    timings['total'] = time.perf_counter() - start
+    print("Wall time: " + ", ".join(f"{k} {v:.1f}s" for k, v in timings.items()))
+    print(f"Peak RSS: {peak_rss_mb():,.0f} MB")
+
+
+if __name__ == '__main__':
+    main()
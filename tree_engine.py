@@ -0,0 +1,177 @@
+import argparse
+import json
+import time
+
+import numpy as np
+
+from model_artifacts import load_artifacts
+
+
+class CompiledForest:
+    """XGBoost binary:logistic booster flattened into contiguous NumPy arrays.
+
+    Every tree is stored in one set of node arrays (split feature, threshold,
+    children, default direction, leaf value) with global node ids, so a batch of
+    rows walks all trees at once, one tree level per step. Rows must be float32
+    with columns in ``model_columns`` order; NaN follows the default branch,
+    exactly as in XGBoost.
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, leaf_value, roots,
+                 max_depth, base_margin):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.leaf_value = leaf_value
+        self.roots = roots
+        self.max_depth = max_depth
+        self.base_margin = base_margin
+
+    @classmethod
+    def from_model(cls, model):
+        """Build from an ``XGBClassifier`` (as pickled in churn_model.pkl) or a raw ``Booster``."""
+        booster = model.get_booster() if hasattr(model, 'get_booster') else model
+        learner = json.loads(booster.save_raw('json'))['learner']
+        if learner['objective']['name'] != 'binary:logistic':
+            raise ValueError(f"Unsupported objective: {learner['objective']['name']}")
+
+        gbtree = learner['gradient_booster']['model']
+        trees = gbtree['trees']
+        best_iteration = getattr(model, 'best_iteration', None) if model is not booster else None
+        if best_iteration is not None:
+            trees = trees[:gbtree['iteration_indptr'][best_iteration + 1]]
+
+        base_score = float(learner['learner_model_param']['base_score'].strip('[]'))
+        base_margin = np.float32(np.log(base_score / (1 - base_score)))
+
+        feature, threshold, left, right, default_left, leaf_value, roots = [], [], [], [], [], [], []
+        max_depth = 0
+        offset = 0
+        for tree in trees:
+            lc = np.asarray(tree['left_children'], dtype=np.int32)
+            rc = np.asarray(tree['right_children'], dtype=np.int32)
+            is_leaf = lc == -1
+            # Leaves point at themselves so rows that reach one early stay put.
+            own = np.arange(len(lc), dtype=np.int32)
+            left.append(np.where(is_leaf, own, lc) + offset)
+            right.append(np.where(is_leaf, own, rc) + offset)
+            feature.append(np.where(is_leaf, 0, tree['split_indices']).astype(np.int32))
+            conditions = np.asarray(tree['split_conditions'], dtype=np.float32)
+            threshold.append(np.where(is_leaf, np.float32(np.inf), conditions))
+            default_left.append(np.asarray(tree['default_left'], dtype=bool) | is_leaf)
+            leaf_value.append(np.where(is_leaf, conditions, 0).astype(np.float32))
+            roots.append(offset)
+            max_depth = max(max_depth, _tree_depth(lc, rc))
+            offset += len(lc)
+
+        return cls(
+            feature=np.concatenate(feature),
+            threshold=np.concatenate(threshold),
+            left=np.concatenate(left),
+            right=np.concatenate(right),
+            default_left=np.concatenate(default_left),
+            leaf_value=np.concatenate(leaf_value),
+            roots=np.asarray(roots, dtype=np.int32),
+            max_depth=max_depth,
+            base_margin=base_margin,
+        )
+
+    @classmethod
+    def load(cls, model_dir='.'):
+        return cls.from_model(load_artifacts(model_dir).model)
+
+    def predict_margin(self, X, block_size=16_384):
+        """Raw log-odds for each row of ``X``, evaluated ``block_size`` rows at a time."""
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        margin = np.empty(len(X), dtype=np.float32)
+        for start in range(0, len(X), block_size):
+            margin[start:start + block_size] = self._margin_block(X[start:start + block_size])
+        return margin
+
+    def _margin_block(self, X):
+        flat = X.ravel()
+        row_offset = (np.arange(len(X), dtype=np.int64) * X.shape[1])[:, None]
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+        for _ in range(self.max_depth):
+            x = flat.take(row_offset + self.feature.take(node))
+            go_left = np.where(np.isnan(x), self.default_left.take(node), x < self.threshold.take(node))
+            node = np.where(go_left, self.left.take(node), self.right.take(node))
+        return self.leaf_value.take(node).sum(axis=1, dtype=np.float32) + self.base_margin
+
+    def predict_proba(self, X):
+        """Churn probability for each row, matching ``XGBClassifier.predict_proba(X)[:, 1]``."""
+        return 1.0 / (1.0 + np.exp(-self.predict_margin(X)))
+
+    def predict_one(self, x):
+        """Churn probability for a single float32 feature vector."""
+        return float(self.predict_proba(x)[0])
+
+
+def _tree_depth(left, right):
+    depth = np.zeros(len(left), dtype=np.int32)
+    # XGBoost numbers children after their parents, so one forward pass is enough.
+    for parent in range(len(left)):
+        if left[parent] != -1:
+            depth[left[parent]] = depth[right[parent]] = depth[parent] + 1
+    return int(depth.max())
+
+
+def benchmark(model, n_features, sizes=(1, 10, 100, 1_000, 10_000, 100_000, 1_000_000), repeats=3,
+              seed=42):
+    """Compare CompiledForest against ``predict_proba`` on random rows; returns one dict per size."""
+    forest = CompiledForest.from_model(model)
+    rng = np.random.default_rng(seed)
+    results = []
+    for size in sizes:
+        X = rng.uniform(0, 100, size=(size, n_features)).astype(np.float32)
+        X[:, :] = np.where(rng.random(X.shape) < 0.5, np.round(X / 40), X)
+
+        xgb_time = _best_time(lambda: model.predict_proba(X), repeats)
+        engine_time = _best_time(lambda: forest.predict_proba(X), repeats)
+        max_abs_diff = float(np.abs(model.predict_proba(X)[:, 1] - forest.predict_proba(X)).max())
+        results.append({
+            'batch_size': size,
+            'xgboost_ms': xgb_time * 1e3,
+            'engine_ms': engine_time * 1e3,
+            'speedup': xgb_time / engine_time,
+            'max_abs_diff': max_abs_diff,
+        })
+    return results
+
+
+def _best_time(fn, repeats):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify and benchmark the NumPy tree engine against XGBoost.")
+    parser.add_argument('--model-dir', default='.', help="Directory holding the model artifacts")
+    parser.add_argument('--max-batch', type=int, default=1_000_000)
+    parser.add_argument('--tolerance', type=float, default=1e-5)
+    args = parser.parse_args()
+
+    artifacts = load_artifacts(args.model_dir)
+    model, n_features = artifacts.model, len(artifacts.columns)
+    sizes = [10 ** k for k in range(7) if 10 ** k <= args.max_batch]
+
+    print(f"{'batch':>10} {'xgboost ms':>12} {'engine ms':>12} {'speedup':>9} {'max |diff|':>12}")
+    failed = False
+    for row in benchmark(model, n_features, sizes=sizes):
+        print(f"{row['batch_size']:>10,} {row['xgboost_ms']:>12.3f} {row['engine_ms']:>12.3f} "
+              f"{row['speedup']:>8.1f}x {row['max_abs_diff']:>12.2e}")
+        failed |= row['max_abs_diff'] > args.tolerance
+    if failed:
+        raise SystemExit(f"Engine output differs from predict_proba by more than {args.tolerance}")
+
+
+if __name__ == '__main__':
+    main()
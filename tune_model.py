@@ -0,0 +1,150 @@
+import argparse
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+from sklearn.metrics import accuracy_score, recall_score, roc_auc_score
+from sklearn.model_selection import train_test_split
+from xgboost import XGBClassifier
+
+from dataset_cache import DEFAULT_DATA_PATH, load_training_data
+from imbalance import DEFAULT_STRATEGY, STRATEGIES, apply_strategy
+
+DEFAULT_SPACE = {
+    'max_depth': [3, 4, 6, 8],
+    'learning_rate': [0.03, 0.1, 0.3],
+    'n_estimators': [200, 500, 1000],
+    'subsample': [0.8, 1.0],
+    'colsample_bytree': [0.8, 1.0],
+    'min_child_weight': [1, 5],
+}
+
+_data = None
+
+
+def _init_worker(data):
+    global _data
+    _data = data
+
+
+def sample_configs(space, n_trials=None, seed=42):
+    """Full grid when ``n_trials`` is None, otherwise ``n_trials`` distinct random draws from it."""
+    keys = list(space)
+    grid = [dict(zip(keys, values)) for values in itertools.product(*(space[k] for k in keys))]
+    if n_trials is None or n_trials >= len(grid):
+        return grid
+    return random.Random(seed).sample(grid, n_trials)
+
+
+def run_trial(trial_id, params, early_stopping_rounds=30):
+    """Fit one config with early stopping on the eval split and score it on the test split."""
+    X_fit, y_fit, X_eval, y_eval, X_test, y_test, fit_kwargs, imbalance_params = _data
+    model = XGBClassifier(eval_metric='logloss', early_stopping_rounds=early_stopping_rounds,
+                          tree_method='hist', n_jobs=1, random_state=42, **imbalance_params, **params)
+
+    start = time.perf_counter()
+    model.fit(X_fit, y_fit, eval_set=[(X_eval, y_eval)], verbose=False, **fit_kwargs)
+    fit_time = time.perf_counter() - start
+
+    y_prob = model.predict_proba(X_test)[:, 1]
+    y_pred = (y_prob > 0.5).astype(int)
+    return {
+        'trial': trial_id,
+        **params,
+        'best_iteration': model.best_iteration,
+        'fit_s': fit_time,
+        'latency_1_row_ms': _latency(model, X_test.iloc[:1], repeats=50) * 1e3,
+        'latency_1k_rows_ms': _latency(model, X_test.iloc[:1000], repeats=5) * 1e3,
+        'auc': roc_auc_score(y_test, y_prob),
+        'recall': recall_score(y_test, y_pred),
+        'accuracy': accuracy_score(y_test, y_pred),
+    }
+
+
+def best_params(leaderboard, results, space):
+    """Params of the leaderboard's top trial, ready for ``train_model.py --params``.
+
+    ``n_estimators`` is the number of trees early stopping kept, since
+    train_model.py trains without an eval split to stop on.
+    """
+    best = next(r for r in results if r['trial'] == leaderboard['trial'].iloc[0])
+    params = {name: best[name] for name in space}
+    params['n_estimators'] = int(best['best_iteration']) + 1
+    return params
+
+
+def _latency(model, X, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        model.predict_proba(X)
+        times.append(time.perf_counter() - start)
+    return float(np.median(times))
+
+
+def prepare_splits(X, y, imbalance=DEFAULT_STRATEGY, seed=42):
+    # Same 80/20 train/test split as train_model.py; 20% of train is held out for early stopping.
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=seed)
+    X_fit, X_eval, y_fit, y_eval = train_test_split(X_train, y_train, test_size=0.2, random_state=seed,
+                                                    stratify=y_train)
+    X_fit, y_fit, fit_kwargs, imbalance_params = apply_strategy(imbalance, X_fit, y_fit, seed)
+    return X_fit, y_fit, X_eval, y_eval, X_test, y_test, fit_kwargs, imbalance_params
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel hyperparameter search for the churn model.")
+    parser.add_argument('--data', default=DEFAULT_DATA_PATH, help="Telco-format training CSV")
+    parser.add_argument('--space', help="JSON file mapping XGBClassifier params to candidate values")
+    parser.add_argument('--trials', type=int, default=None, help="Random configs to try (default: full grid)")
+    parser.add_argument('--jobs', type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument('--early-stopping-rounds', type=int, default=30)
+    parser.add_argument('--imbalance', choices=list(STRATEGIES), default=DEFAULT_STRATEGY,
+                        help="Class-imbalance strategy applied to the fit split")
+    parser.add_argument('--no-smote', action='store_const', dest='imbalance', const='none',
+                        help="Same as --imbalance none")
+    parser.add_argument('--output', default='leaderboard.csv')
+    parser.add_argument('--best-params', default='best_params.json',
+                        help="Where to write the top config for train_model.py --params")
+    args = parser.parse_args()
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+    configs = sample_configs(space, args.trials)
+
+    X, y, _ = load_training_data(args.data)
+    data = prepare_splits(X, y, imbalance=args.imbalance)
+
+    n_jobs = args.jobs or os.cpu_count() or 1
+    print(f"Running {len(configs)} trials on {n_jobs} workers...")
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker, initargs=(data,)) as pool:
+        futures = [pool.submit(run_trial, i, params, args.early_stopping_rounds)
+                   for i, params in enumerate(configs)]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            print(f"[{len(results)}/{len(configs)}] trial {result['trial']}: auc={result['auc']:.4f} "
+                  f"recall={result['recall']:.3f} fit={result['fit_s']:.1f}s")
+
+    leaderboard = pd.DataFrame(results).sort_values(['auc', 'latency_1_row_ms'], ascending=[False, True])
+    leaderboard.to_csv(args.output, index=False)
+    print(f"\nSearch finished in {time.perf_counter() - start:.1f}s, leaderboard written to {args.output}")
+    print(leaderboard.head(10).to_string(index=False))
+
+    params = best_params(leaderboard, results, space)
+    with open(args.best_params, 'w') as f:
+        json.dump(params, f, indent=2)
+    print(f"\nBest params written to {args.best_params}; train with: "
+          f"python train_model.py --data {args.data} --params {args.best_params}")
+
+
+if __name__ == '__main__':
+    main()
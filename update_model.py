@@ -0,0 +1,240 @@
+import argparse
+import json
+import os
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import accuracy_score, log_loss, roc_auc_score
+from sklearn.model_selection import train_test_split
+from xgboost import XGBClassifier
+
+from global_importance import IMPORTANCE_FILE, compute_importance, write_importance
+from model_artifacts import (COLUMNS_FILE, PICKLE_FILE, PREPROCESSOR_FILE, TRAINING_PARAMS, load_artifacts,
+                             save_artifacts)
+from preprocessing import ID_COLUMN, TARGET_COLUMN
+
+
+def check_schema(artifacts, df):
+    """Raise ``ValueError`` if the model, its saved column list and ``df`` disagree on features.
+
+    Returns ``{column: n_values}`` for categorical values in ``df`` the encoders
+    have never seen; those rows are still usable (the value is encoded as missing).
+    """
+    columns = list(artifacts.preprocessor.columns)
+    problems = []
+
+    pickled_columns = os.path.join(artifacts.directory, COLUMNS_FILE)
+    if os.path.exists(pickled_columns) and list(joblib.load(pickled_columns)) != columns:
+        problems.append(f"{COLUMNS_FILE} does not match the model's feature list")
+    if list(artifacts.columns) != columns:
+        problems.append("manifest feature names do not match the preprocessor columns")
+    booster = artifacts.model.get_booster()
+    if booster.num_features() != len(columns):
+        problems.append(f"booster expects {booster.num_features()} features, schema has {len(columns)}")
+    if booster.feature_names is not None and list(booster.feature_names) != columns:
+        problems.append("booster feature names differ from the schema")
+
+    missing = [col for col in columns + [TARGET_COLUMN] if col not in df.columns]
+    if missing:
+        problems.append(f"new data is missing columns: {', '.join(missing)}")
+    extra = [col for col in df.columns if col not in columns and col not in (ID_COLUMN, TARGET_COLUMN)]
+    if extra:
+        problems.append(f"new data has columns the model was not trained on: {', '.join(extra)}")
+    if problems:
+        raise ValueError("Feature schema changed, run a full retrain instead:\n  " + "\n  ".join(problems))
+
+    unseen = {}
+    for col, levels in artifacts.preprocessor.category_levels.items():
+        values = df[col].dropna().astype(str)
+        n_unseen = int((~values.isin(levels)).sum())
+        if n_unseen:
+            unseen[col] = n_unseen
+    return unseen
+
+
+def recorded_params(artifacts):
+    """The hyperparameters the model was trained with, from its manifest.
+
+    The native model file does not keep them, and XGBoost's defaults (eta 0.3,
+    depth 6) would silently change a model trained with other settings, so a
+    model without them is refused.
+    """
+    params = artifacts.training.get('params') or {}
+    missing = [name for name in TRAINING_PARAMS if name not in params]
+    if missing:
+        raise ValueError(f"the manifest in {artifacts.directory} does not record the training params "
+                         f"({', '.join(missing)}); retrain with train_model.py, or run "
+                         "'python model_artifacts.py convert' if churn_model.pkl is the trained model")
+    return params
+
+
+def continue_boosting(model, X, y, rounds, params):
+    """Append ``rounds`` trees fitted to ``X, y`` on top of the existing booster, with its training ``params``."""
+    params = {**model.get_params(), **{name: params[name] for name in TRAINING_PARAMS}}
+    params.update(n_estimators=rounds, early_stopping_rounds=None)
+    updated = XGBClassifier(**params)
+    updated.fit(X, y, xgb_model=model.get_booster(), verbose=False)
+    return updated
+
+
+def refresh_leaves(model, X, y, params):
+    """Keep every tree's structure but recompute node statistics and leaf values from ``X, y``.
+
+    Nodes the new rows don't reach, or reach with less hessian than
+    ``min_child_weight``, keep their old leaf value and cover (rescaled to the
+    size of the new data), instead of the zero leaf the refresh updater gives them. Leaf values are re-estimated
+    with the model's own training ``params`` (learning rate, regularisation).
+    """
+    booster = model.get_booster()
+    train_params = {'process_type': 'update', 'updater': 'refresh', 'refresh_leaf': True,
+                    'objective': 'binary:logistic', 'eta': params['learning_rate'], 'max_depth': params['max_depth'],
+                    'lambda': params['reg_lambda'], 'alpha': params['reg_alpha'], 'gamma': params['gamma'],
+                    'min_child_weight': params['min_child_weight'], 'max_delta_step': params['max_delta_step'],
+                    'scale_pos_weight': params['scale_pos_weight']}
+    with warnings.catch_warnings():
+        # The refresh updater has to be named explicitly; XGBoost warns that tree_method is then ignored
+        warnings.filterwarnings('ignore', message='.*manually specified the `updater`', category=UserWarning)
+        refreshed = xgb.train(train_params, xgb.DMatrix(X, label=y), num_boost_round=booster.num_boosted_rounds(),
+                              xgb_model=booster)
+    updated = XGBClassifier()
+    updated.load_model(bytearray(_keep_unvisited_nodes(booster, refreshed, params['min_child_weight'])))
+    return updated
+
+
+def _keep_unvisited_nodes(original, refreshed, min_child_weight):
+    old = json.loads(original.save_raw('json'))
+    new = json.loads(refreshed.save_raw('json'))
+    old_trees = old['learner']['gradient_booster']['model']['trees']
+    for old_tree, tree in zip(old_trees, new['learner']['gradient_booster']['model']['trees']):
+        hessian, left, right = tree['sum_hessian'], tree['left_children'], tree['right_children']
+        scale = hessian[0] / old_tree['sum_hessian'][0] if old_tree['sum_hessian'][0] > 0 else 0.0
+        for node, h in enumerate(hessian):
+            # XGBoost zeroes the weight of any node below min_child_weight
+            if h <= 0 or h < min_child_weight:
+                tree['base_weights'][node] = old_tree['base_weights'][node]
+                hessian[node] = old_tree['sum_hessian'][node] * scale
+                if left[node] == -1:
+                    tree['split_conditions'][node] = old_tree['split_conditions'][node]
+        # Children always have higher ids than their parent: rebuild inner covers bottom-up
+        # so each node's cover is the sum of its children's, as TreeSHAP expects
+        for node in reversed(range(len(hessian))):
+            if left[node] != -1:
+                hessian[node] = hessian[left[node]] + hessian[right[node]]
+    return json.dumps(new).encode()
+
+
+def check_model(model, X):
+    """Raise ``ValueError`` unless ``model`` gives finite scores and SHAP contributions for ``X``."""
+    try:
+        probabilities = model.predict_proba(X)[:, 1]
+        contributions = model.get_booster().predict(xgb.DMatrix(X), pred_contribs=True)
+    except xgb.core.XGBoostError as exc:
+        raise ValueError(f"updated model cannot be explained: {str(exc).splitlines()[0]}") from exc
+    if not (np.isfinite(probabilities).all() and np.isfinite(contributions).all()):
+        raise ValueError("updated model gives non-finite scores or contributions")
+
+
+def _scores(model, X, y):
+    y_prob = model.predict_proba(X)[:, 1]
+    return {
+        'logloss': log_loss(y, y_prob, labels=[0, 1]),
+        'auc': roc_auc_score(y, y_prob) if len(np.unique(y)) > 1 else float('nan'),
+        'accuracy': accuracy_score(y, (y_prob > 0.5).astype(int)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the churn model with newly labeled customers "
+                                                 "instead of retraining from the full history.")
+    parser.add_argument('input', help="Telco-format CSV of newly labeled customers")
+    parser.add_argument('--model-dir', default='.', help="Directory holding the current model artifacts")
+    parser.add_argument('--output-dir', default=None, help="Where to write the updated model (default: --model-dir)")
+    parser.add_argument('--mode', choices=['boost', 'refresh'], default='boost',
+                        help="boost: append trees fitted to the new data; "
+                             "refresh: keep the trees, re-estimate their leaf values")
+    parser.add_argument('--rounds', type=int, default=20, help="Trees to append in boost mode")
+    parser.add_argument('--test-size', type=float, default=0.2, help="Share of new rows held out for evaluation")
+    args = parser.parse_args()
+    output_dir = args.output_dir or args.model_dir
+
+    timings = {}
+    start = time.perf_counter()
+
+    # 1. Load the current model and the new data, and check the feature schema is unchanged
+    artifacts = load_artifacts(args.model_dir)
+    preprocessor = artifacts.preprocessor
+    df = pd.read_csv(args.input, dtype={ID_COLUMN: str})
+    unseen = check_schema(artifacts, df)
+    try:
+        params = recorded_params(artifacts)
+    except ValueError as exc:
+        parser.error(str(exc))
+    for col, n in unseen.items():
+        print(f"Warning: {n:,} values of '{col}' are unseen categories and will be treated as missing")
+    timings['load'] = time.perf_counter() - start
+
+    # 2. Encode with the existing preprocessor (never refit: codes must match the trees)
+    X = pd.DataFrame(preprocessor.transform(df), columns=preprocessor.columns)
+    y = preprocessor.transform_target(df)
+    X_fit, X_test, y_fit, y_test = train_test_split(X, y, test_size=args.test_size, random_state=42)
+    before = _scores(artifacts.model, X_test, y_test)
+    n_trees_before = artifacts.model.get_booster().num_boosted_rounds()
+
+    # 3. Update
+    print(f"Updating model ({args.mode}) on {len(X_fit):,} new rows...")
+    t = time.perf_counter()
+    if args.mode == 'boost':
+        model = continue_boosting(artifacts.model, X_fit, y_fit, args.rounds, params)
+    else:
+        model = refresh_leaves(artifacts.model, X_fit, y_fit, params)
+    timings['update'] = time.perf_counter() - t
+    # Nothing is written unless the updated model still scores and explains the holdout
+    try:
+        check_model(model, X_test)
+    except ValueError as exc:
+        parser.error(f"{exc}; nothing was written")
+    after = _scores(model, X_test, y_test)
+    n_trees = model.get_booster().num_boosted_rounds()
+
+    # 4. Report before/after on the held-out new rows
+    print(f"\nTrees: {n_trees_before} -> {n_trees}")
+    print(f"{'metric':>9} {'before':>8} {'after':>8}")
+    for metric in before:
+        print(f"{metric:>9} {before[metric]:8.4f} {after[metric]:8.4f}")
+
+    # 5. Global importances, computed before anything is written; without them the
+    # apps fall back to the booster's gain, so a failure here only skips the file
+    try:
+        importance, n_importance_rows = compute_importance(model, X_fit)
+    except Exception as exc:
+        importance = None
+        print(f"Warning: global feature importance not updated ({str(exc).splitlines()[0]})")
+
+    # 6. Save in the same formats as train_model.py so the apps can load it
+    os.makedirs(output_dir, exist_ok=True)
+    joblib.dump(model, os.path.join(output_dir, PICKLE_FILE))
+    joblib.dump(pd.Index(preprocessor.columns), os.path.join(output_dir, COLUMNS_FILE))
+    preprocessor.save(os.path.join(output_dir, PREPROCESSOR_FILE))
+    save_artifacts(model, preprocessor, output_dir, training={
+        'update_mode': args.mode,
+        'n_update_rows': len(X_fit),
+        'n_trees': n_trees,
+        'accuracy': after['accuracy'],
+        'auc': after['auc'],
+        'updated_from': artifacts.training.get('created_at'),
+        # Carried over so the updated model can be updated again
+        'params': {**params, 'n_estimators': n_trees},
+    })
+    if importance is not None:
+        write_importance(importance, n_importance_rows, os.path.join(output_dir, IMPORTANCE_FILE), output_dir)
+
+    timings['total'] = time.perf_counter() - start
+    print("\nWall time: " + ", ".join(f"{k} {v:.1f}s" for k, v in timings.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from dataset_cache import file_digest
+from model_artifacts import BOOSTER_FILE, PICKLE_FILE, load_artifacts
+
+SURFACE_FILE = 'whatif_surface.npz'
+
+# Inputs exposed by the apps' sliders and selectboxes, in grid axis order.
+CATEGORICAL_AXES = ('Contract', 'TechSupport', 'OnlineSecurity', 'InternetService')
+MAX_TENURE = 72
+
+
+class WhatIfSurface:
+    """Churn probability precomputed over every combination of the apps' inputs.
+
+    Axes are tenure (0-72 months), the encoded codes of each column in
+    ``CATEGORICAL_AXES`` and a grid of monthly charges. Total charges are taken
+    as tenure x monthly charges (the apps' default); every other feature is 0,
+    as in the apps' input alignment. Inputs on the grid are answered exactly;
+    tenure curves interpolate linearly between monthly-charge grid points.
+    """
+
+    def __init__(self, probabilities, charges, model_digest=None):
+        self.probabilities = probabilities
+        self.charges = charges
+        self.model_digest = model_digest
+
+    @classmethod
+    def build(cls, model, preprocessor, charge_step=1.0, max_charge=150.0, model_digest=None):
+        tenure = np.arange(MAX_TENURE + 1, dtype=np.float32)
+        charges = np.arange(0.0, max_charge + charge_step / 2, charge_step, dtype=np.float32)
+        codes = [np.arange(len(preprocessor.category_levels[col]), dtype=np.float32) for col in CATEGORICAL_AXES]
+
+        axes = [tenure, *codes, charges]
+        mesh = np.meshgrid(*axes, indexing='ij')
+        data = {'tenure': mesh[0], 'MonthlyCharges': mesh[-1], 'TotalCharges': mesh[0] * mesh[-1]}
+        data.update({col: grid for col, grid in zip(CATEGORICAL_AXES, mesh[1:-1])})
+        X = preprocessor.align({col: grid.ravel() for col, grid in data.items()})
+
+        probabilities = model.predict_proba(X)[:, 1].astype(np.float32).reshape(mesh[0].shape)
+        return cls(probabilities, charges, model_digest)
+
+    def save(self, path=SURFACE_FILE):
+        np.savez_compressed(path, probabilities=self.probabilities, charges=self.charges,
+                            model_digest=np.array(self.model_digest or ''))
+
+    @classmethod
+    def load(cls, path=SURFACE_FILE):
+        with np.load(path) as f:
+            return cls(f['probabilities'], f['charges'], str(f['model_digest']) or None)
+
+    def covers(self, tenure, monthly_charges, total_charges, tolerance=0.01):
+        """True if ``lookup`` returns exactly what the model would for this input."""
+        _, w = self._charge_weights(monthly_charges)
+        return (
+            float(tenure).is_integer() and 0 <= tenure <= MAX_TENURE
+            and self.charges[0] <= monthly_charges <= self.charges[-1]
+            and w in (0.0, 1.0)
+            and abs(total_charges - tenure * monthly_charges) <= tolerance
+        )
+
+    def _charge_weights(self, monthly_charges):
+        i = int(np.clip(np.searchsorted(self.charges, monthly_charges, side='right') - 1, 0, len(self.charges) - 2))
+        w = (monthly_charges - self.charges[i]) / (self.charges[i + 1] - self.charges[i])
+        return i, float(np.clip(w, 0.0, 1.0))
+
+    def lookup(self, tenure, contract, tech_support, online_security, internet_service, monthly_charges):
+        """Churn probability for one input combination (interpolated if charges are off the grid)."""
+        return float(self.tenure_curve(contract, tech_support, online_security, internet_service,
+                                       monthly_charges)[int(tenure)])
+
+    def tenure_curve(self, contract, tech_support, online_security, internet_service, monthly_charges):
+        """Churn probability for every tenure 0-72 with the other inputs held fixed."""
+        i, w = self._charge_weights(monthly_charges)
+        block = self.probabilities[:, int(contract), int(tech_support), int(online_security), int(internet_service)]
+        return (1 - w) * block[:, i] + w * block[:, i + 1]
+
+    def risk_for(self, input_data):
+        """Exact churn probability for an app input dict, or None if it is off the grid."""
+        if not self.covers(input_data['tenure'], input_data['MonthlyCharges'], input_data['TotalCharges']):
+            return None
+        return self.lookup(input_data['tenure'], *(input_data[col] for col in CATEGORICAL_AXES),
+                           input_data['MonthlyCharges'])
+
+    def tenure_curve_for(self, input_data):
+        return self.tenure_curve(*(input_data[col] for col in CATEGORICAL_AXES), input_data['MonthlyCharges'])
+
+
+def model_digest(directory='.'):
+    """Digest of the model file the surface was computed from, used to detect a stale surface."""
+    for name in (BOOSTER_FILE, PICKLE_FILE):
+        path = os.path.join(directory, name)
+        if os.path.exists(path):
+            return file_digest(path)
+    return None
+
+
+def load_surface(path=SURFACE_FILE, model_dir='.'):
+    """The saved surface, or None if it is missing or was built from a different model."""
+    if not os.path.exists(path):
+        return None
+    surface = WhatIfSurface.load(path)
+    if surface.model_digest != model_digest(model_dir):
+        return None
+    return surface
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute the what-if churn probability surface for the apps.")
+    parser.add_argument('--model-dir', default='.', help="Directory holding the model artifacts")
+    parser.add_argument('--output', default=SURFACE_FILE)
+    parser.add_argument('--charge-step', type=float, default=1.0)
+    parser.add_argument('--max-charge', type=float, default=150.0)
+    args = parser.parse_args()
+
+    artifacts = load_artifacts(args.model_dir)
+    start = time.perf_counter()
+    surface = WhatIfSurface.build(artifacts.model, artifacts.preprocessor, args.charge_step, args.max_charge,
+                                  model_digest=model_digest(args.model_dir))
+    elapsed = time.perf_counter() - start
+    surface.save(args.output)
+    print(f"Evaluated {surface.probabilities.size:,} grid points in {elapsed:.2f}s, "
+          f"saved to {args.output} ({os.path.getsize(args.output) / 1024:,.0f} KB)")
+
+    # Interpolation error against the model at random off-grid monthly charges (sensitivity curves only)
+    rng = np.random.default_rng(0)
+    n = 2000
+    shape = surface.probabilities.shape
+    samples = np.column_stack([rng.integers(0, size, n) for size in shape[:-1]])
+    monthly = rng.uniform(surface.charges[0], surface.charges[-1], n).astype(np.float32)
+    approx = np.array([surface.lookup(*row, m) for row, m in zip(samples, monthly)])
+    data = {'tenure': samples[:, 0], 'MonthlyCharges': monthly, 'TotalCharges': samples[:, 0] * monthly}
+    data.update({col: samples[:, j + 1] for j, col in enumerate(CATEGORICAL_AXES)})
+    exact = artifacts.model.predict_proba(artifacts.preprocessor.align(data))[:, 1]
+    error = np.abs(approx - exact)
+    print(f"Interpolation error vs model on {n} random inputs: mean {error.mean():.4f}, max {error.max():.4f}")
+
+
+if __name__ == '__main__':
+    main()